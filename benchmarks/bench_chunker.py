@@ -0,0 +1,163 @@
+# benchmarks/bench_chunker.py
+
+"""
+Sentence/token-budget chunker vs the 500/100 character chunker over
+data/processed/cleaned_text.txt.
+
+Per chunker:
+- chunks, total tokens, chunks MiniLM would truncate (> 256 tokens)
+- index size: float32 384-d vectors + chunk text
+- answers kept intact: eval answers that appear whole in some chunk
+  of the expected source (benchmarks/data/eval_questions.jsonl)
+- recall@k: a top-k chunk from the expected source contains the answer
+- embedding time, when sentence-transformers and the model are available
+
+Recall is measured with MiniLM when it can be loaded, otherwise with a
+BM25 stand-in (labelled in the output) so the chunkers can still be
+compared offline.
+
+Run:
+    python -m benchmarks.bench_chunker --k 5
+"""
+
+import argparse
+import json
+import math
+import re
+import time
+from collections import Counter
+
+import numpy as np
+
+from src.embeddings.embedder import (
+    CLEANED_TEXT_PATH,
+    chunk_sections,
+    load_cleaned_text,
+    token_counter,
+)
+
+DIM = 384
+MINILM_MAX_TOKENS = 256
+EVAL_PATH = "benchmarks/data/eval_questions.jsonl"
+WORD = re.compile(r"\w+")
+
+
+def load_questions(path: str = EVAL_PATH):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def is_hit(question: dict, text: str, meta: dict) -> bool:
+    return meta["source"] == question["source"] and any(a in text for a in question["answers"])
+
+
+# ---------- Rankers ----------
+class BM25Ranker:
+    """Plain BM25 over lowercased words; offline stand-in for MiniLM."""
+    def __init__(self, texts, k1: float = 1.2, b: float = 0.75):
+        self.docs = [Counter(WORD.findall(t.lower())) for t in texts]
+        self.lengths = np.array([sum(d.values()) for d in self.docs], dtype=np.float32)
+        self.avg_length = float(self.lengths.mean())
+        self.k1, self.b = k1, b
+
+        df = Counter(term for d in self.docs for term in d)
+        n = len(self.docs)
+        self.idf = {t: math.log(1 + (n - f + 0.5) / (f + 0.5)) for t, f in df.items()}
+
+    def scores(self, question: str) -> np.ndarray:
+        terms = set(WORD.findall(question.lower()))
+        norm = self.k1 * (1 - self.b + self.b * self.lengths / self.avg_length)
+        scores = np.zeros(len(self.docs), dtype=np.float32)
+        for i, doc in enumerate(self.docs):
+            for term in terms & doc.keys():
+                tf = doc[term]
+                scores[i] += self.idf[term] * tf * (self.k1 + 1) / (tf + norm[i])
+        return scores
+
+    def top_k(self, question: str, k: int):
+        return np.argsort(-self.scores(question))[:k]
+
+
+class MiniLMRanker:
+    def __init__(self, texts, embedder):
+        start = time.perf_counter()
+        self.embedder = embedder
+        self.vectors = self._normalize(embedder.embed(texts))
+        self.embed_seconds = time.perf_counter() - start
+
+    @staticmethod
+    def _normalize(vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    def top_k(self, question: str, k: int):
+        query = self._normalize(self.embedder.embed([question]))[0]
+        return np.argsort(-(self.vectors @ query))[:k]
+
+
+def load_embedder():
+    try:
+        from src.embeddings.embedder import MiniLMEmbedder
+        return MiniLMEmbedder()
+    except Exception as e:
+        print(f"MiniLM unavailable ({type(e).__name__}); recall uses BM25 as a stand-in")
+        return None
+
+
+# ---------- Main ----------
+def evaluate(chunker: str, text: str, questions, k: int, embedder, count_tokens) -> dict:
+    start = time.perf_counter()
+    chunks, metas = chunk_sections(text, chunker)
+    chunk_seconds = time.perf_counter() - start
+
+    tokens = np.array([count_tokens(c) for c in chunks])
+    intact = sum(
+        any(is_hit(q, c, m) for c, m in zip(chunks, metas)) for q in questions
+    )
+
+    ranker = MiniLMRanker(chunks, embedder) if embedder else BM25Ranker(chunks)
+    hits = sum(
+        any(is_hit(q, chunks[i], metas[i]) for i in ranker.top_k(q["question"], k))
+        for q in questions
+    )
+
+    return {
+        "chunks": len(chunks),
+        "tokens": int(tokens.sum()),
+        "truncated": int((tokens > MINILM_MAX_TOKENS).sum()),
+        "index_mb": (len(chunks) * DIM * 4 + sum(len(c.encode("utf-8")) for c in chunks)) / 1e6,
+        "intact": intact,
+        "recall": hits / len(questions),
+        "chunk_s": chunk_seconds,
+        "embed_s": getattr(ranker, "embed_seconds", None)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--text", default=CLEANED_TEXT_PATH)
+    parser.add_argument("--questions", default=EVAL_PATH)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--no-embed", action="store_true", help="always use the BM25 stand-in")
+    args = parser.parse_args()
+
+    text = load_cleaned_text(args.text)
+    questions = load_questions(args.questions)
+    embedder = None if args.no_embed else load_embedder()
+    count_tokens = token_counter()
+
+    print(
+        f"{'chunker':<10}{'chunks':>8}{'tokens':>10}{'>256':>6}{'index MB':>10}"
+        f"{'intact':>8}{f'R@{args.k}':>7}{'chunk s':>9}{'embed s':>9}"
+    )
+    for chunker in ["chars", "sentence"]:
+        r = evaluate(chunker, text, questions, args.k, embedder, count_tokens)
+        embed = f"{r['embed_s']:>9.1f}" if r["embed_s"] is not None else f"{'n/a':>9}"
+        print(
+            f"{chunker:<10}{r['chunks']:>8}{r['tokens']:>10}{r['truncated']:>6}{r['index_mb']:>10.1f}"
+            f"{r['intact']:>5}/{len(questions):<2}{r['recall']:>7.2f}{r['chunk_s']:>9.2f}{embed}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# benchmarks/bench_clean_text.py
+
+"""
+Microbenchmark: table-driven clean_text vs the previous implementation,
+over the raw text of every PDF in data/raw (as run_extraction cleans it:
+one call per file on the joined page text).
+
+The previous cleaner is copied here verbatim so the comparison stays
+runnable after the change.
+
+Run:
+    python -m benchmarks.bench_clean_text --repeat 5
+"""
+
+import argparse
+import glob
+import re
+import string
+import time
+
+import fitz  # PyMuPDF
+
+from src.utils.clean_text import clean_text
+
+
+def legacy_clean_text_basic(text: str) -> str:
+    if not text:
+        return ""
+
+    text = ''.join(c for c in text if c in string.printable)
+
+    ligatures = {"ﬁ": "fi", "ﬂ": "fl", "ﬀ": "ff", "ﬃ": "ffi", "ﬄ": "ffl"}
+    for k, v in ligatures.items():
+        text = text.replace(k, v)
+
+    return text
+
+
+def legacy_clean_text(text: str) -> str:
+    if not text:
+        return ""
+
+    # extract_from_pdf_fitz already ran the basic pass on every page
+    text = legacy_clean_text_basic(legacy_clean_text_basic(text))
+    text = re.sub(r'(\w)-\s*\n\s*(\w)', r'\1\2', text)
+    text = re.sub(r'\s+', ' ', text)
+    return text.strip()
+
+
+def load_raw_corpus(pattern: str):
+    files = []
+    for path in sorted(glob.glob(pattern, recursive=True)):
+        with fitz.open(path) as doc:
+            files.append("\n".join(page.get_text() for page in doc))
+    return files
+
+
+def best_of(fn, files, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in files:
+            fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--pattern", default="data/raw/**/*.pdf")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    files = load_raw_corpus(args.pattern)
+    chars = sum(len(t) for t in files)
+    print(f"{len(files)} files, {chars / 1e6:.1f}M characters")
+
+    legacy = best_of(legacy_clean_text, files, args.repeat)
+    current = best_of(clean_text, files, args.repeat)
+
+    print(f"{'cleaner':<12}{'seconds':>10}{'MB/s':>10}")
+    for name, seconds in [("legacy", legacy), ("table", current)]:
+        print(f"{name:<12}{seconds:>10.3f}{chars / seconds / 1e6:>10.1f}")
+    print(f"speedup: {legacy / current:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# benchmarks/bench_context.py
+
+"""
+Prompt size before/after context packing (merge overlaps, drop
+near-duplicates, per-model token budget).
+
+Contexts are the top-k chunks per eval question
+(benchmarks/data/eval_questions.jsonl), ranked by the BM25 stand-in of
+bench_chunker, for both chunkers. Per chunker and model budget:
+- chunks and prompt tokens (system prompt + context + question), raw
+  "\\n\\n".join vs packed
+- questions whose answer text is still in the context
+- packing latency p50/p95
+- estimated prefill seconds at --prefill-tps prompt tokens/second
+  (measure yours with `ollama run --verbose`; 8B Q4 on CPU is tens/s)
+
+Run:
+    python -m benchmarks.bench_context --k 8
+"""
+
+import argparse
+import time
+
+from benchmarks.bench_chunker import BM25Ranker, load_questions
+from benchmarks.bench_vector_index import percentile
+from src.config import CONTEXT_TOKEN_BUDGET
+from src.embeddings.embedder import CLEANED_TEXT_PATH, chunk_sections, load_cleaned_text, token_counter
+from src.generation.context import build_context
+from src.generation.generator import Generator
+
+
+def prompt_tokens(question: str, context, count_tokens) -> int:
+    return count_tokens(Generator.SYSTEM_PROMPT) + count_tokens("\n\n".join(context)) + count_tokens(question)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--k", type=int, default=8, help="retrieved chunks per question")
+    parser.add_argument("--prefill-tps", type=float, default=40.0)
+    args = parser.parse_args()
+
+    text = load_cleaned_text(CLEANED_TEXT_PATH)
+    questions = load_questions()
+    count_tokens = token_counter()
+
+    print(
+        f"{'chunker':<10}{'model':<16}{'chunks':>12}{'prompt tokens':>16}"
+        f"{'answer kept':>13}{'pack p50/p95 ms':>17}{'prefill s':>14}"
+    )
+    for chunker in ["chars", "sentence"]:
+        chunks, metadatas = chunk_sections(text, chunker)
+        ranker = BM25Ranker(chunks)
+        hits = [ranker.top_k(q["question"], args.k) for q in questions]
+        contexts = [[chunks[i] for i in rows] for rows in hits]
+        sources = [[metadatas[i].get("source", "") for i in rows] for rows in hits]
+
+        for model, budget in CONTEXT_TOKEN_BUDGET.items():
+            raw_chunks = packed_chunks = raw_tokens = packed_tokens = 0
+            raw_kept = packed_kept = 0
+            timings = []
+            for q, context, context_sources in zip(questions, contexts, sources):
+                start = time.perf_counter()
+                packed = build_context(context, budget, count_tokens, context_sources)
+                timings.append((time.perf_counter() - start) * 1000)
+
+                raw_chunks += len(context)
+                packed_chunks += len(packed)
+                raw_tokens += prompt_tokens(q["question"], context, count_tokens)
+                packed_tokens += prompt_tokens(q["question"], packed, count_tokens)
+                raw_kept += any(a in c for c in context for a in q["answers"])
+                packed_kept += any(a in c for c in packed for a in q["answers"])
+
+            n = len(questions)
+            print(
+                f"{chunker:<10}{model:<16}"
+                f"{f'{raw_chunks / n:.1f}→{packed_chunks / n:.1f}':>12}"
+                f"{f'{raw_tokens / n:.0f}→{packed_tokens / n:.0f}':>16}"
+                f"{f'{raw_kept}→{packed_kept}/{n}':>13}"
+                f"{f'{percentile(timings, 0.5):.2f}/{percentile(timings, 0.95):.2f}':>17}"
+                f"{f'{raw_tokens / n / args.prefill_tps:.1f}→{packed_tokens / n / args.prefill_tps:.1f}':>14}"
+            )
+
+
+if __name__ == "__main__":
+    main()
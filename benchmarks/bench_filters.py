@@ -0,0 +1,113 @@
+# benchmarks/bench_filters.py
+
+"""
+Metadata-filtered vs unfiltered retrieval on the real chunk layout.
+
+Chunks and their metadata come from data/processed/cleaned_text.txt;
+vectors are random unit vectors (MiniLM size) in a numpy index, so the
+latency numbers cover filter detection + search, not the encoder.
+
+Per eval question (benchmarks/data/eval_questions.jsonl):
+- detected filter, and whether it keeps the expected source
+- share of the index searched
+- top-k chunks from other sources, with and without the filter
+  (BM25 stand-in ranking, as in bench_chunker)
+- search latency of those questions, with and without their filter
+
+Run:
+    python -m benchmarks.bench_filters --k 5
+"""
+
+import argparse
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.bench_chunker import BM25Ranker, load_questions
+from benchmarks.bench_vector_index import percentile, query_vectors
+from src.embeddings.embedder import CLEANED_TEXT_PATH, chunk_sections, load_cleaned_text
+from src.retrieval.filters import detect_filters
+from src.retrieval.numpy_index import NumpyVectorIndex, write_numpy_index
+
+DIM = 384
+
+
+def build_index(path: str, chunks, metas) -> NumpyVectorIndex:
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((len(chunks), DIM)).astype(np.float32)
+    ids = [f"chunk_{i}" for i in range(len(chunks))]
+    write_numpy_index(path, ids, chunks, vectors, metadatas=metas)
+    return NumpyVectorIndex(path)
+
+
+def search_latency_ms(index, questions, k: int, use_filters: bool, repeat: int = 200):
+    queries = query_vectors(len(questions))
+    timings = []
+    for _ in range(repeat):
+        for q, vector in zip(questions, queries):
+            start = time.perf_counter()
+            filters = detect_filters(q["question"]) if use_filters else None
+            index.search(vector, k, filters)
+            timings.append((time.perf_counter() - start) * 1000)
+    return percentile(timings, 0.5), percentile(timings, 0.95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    chunks, metas = chunk_sections(load_cleaned_text(CLEANED_TEXT_PATH))
+    questions = load_questions()
+    sources = np.array([m["source"] for m in metas])
+    ranker = BM25Ranker(chunks)
+
+    print(f"{len(chunks)} chunks, {len(questions)} questions\n")
+    print(f"{'searched':>9}{'kept':>6}{'off-source':>12}{'filtered':>10}  question")
+
+    filtered_questions = kept = 0
+    off_total = off_filtered_total = 0
+    searched_total = 0.0
+    for q in questions:
+        filters = detect_filters(q["question"])
+        allowed = np.isin(sources, filters["source"]) if filters else np.ones(len(chunks), dtype=bool)
+
+        scores = ranker.scores(q["question"])
+        top = np.argsort(-scores)[:args.k]
+        top_filtered = np.argsort(-np.where(allowed, scores, -np.inf))[:args.k]
+
+        off = int((sources[top] != q["source"]).sum())
+        off_filtered = int((sources[top_filtered] != q["source"]).sum())
+        searched = allowed.mean()
+
+        off_total += off
+        off_filtered_total += off_filtered
+        searched_total += searched
+        if filters:
+            filtered_questions += 1
+            kept += q["source"] in filters["source"]
+            print(f"{searched:>9.0%}{'yes' if q['source'] in filters['source'] else 'NO':>6}"
+                  f"{off:>12}{off_filtered:>10}  {q['question']}")
+
+    print(
+        f"\nfiltered {filtered_questions}/{len(questions)} questions, expected source kept in "
+        f"{kept}/{filtered_questions}; mean share searched {searched_total / len(questions):.0%}"
+    )
+    print(f"off-source chunks in top-{args.k}: {off_total} unfiltered → {off_filtered_total} filtered")
+
+    directory = tempfile.mkdtemp(prefix="sage-filters-")
+    try:
+        index = build_index(f"{directory}/idx", chunks, metas)
+        named = [q for q in questions if detect_filters(q["question"])]
+        print(f"\nsearch latency over the {len(named)} filtered questions (detection included):")
+        for label, use_filters in [("unfiltered", False), ("filtered", True)]:
+            p50, p95 = search_latency_ms(index, named, args.k, use_filters)
+            print(f"{label:<11} search p50 {p50:.3f} ms  p95 {p95:.3f} ms")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# benchmarks/bench_generation.py
+
+"""
+Compares generation latency of the two Ollama backends against a local
+fake Ollama server:
+
+- http:       pooled keep-alive client on /api/generate
+- subprocess: `ollama run` spawned per question (fake CLI forwarding to the server)
+
+Run:
+    python -m benchmarks.bench_generation --requests 50
+"""
+
+import argparse
+import statistics
+import time
+
+from benchmarks.fake_ollama import FakeOllamaServer, write_fake_ollama_cli
+from src.generation.backends import OllamaHTTPBackend, OllamaSubprocessBackend
+
+PROMPT = "===== CONTEXT =====\nLibrary timings.\n\n===== USER QUESTION =====\nWhen is the library open?"
+MODEL = "llama3.1:8b"
+
+
+def percentile(samples, pct: float) -> float:
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def run(backend, n: int):
+    backend.generate(PROMPT)  # warm-up (model load, first connection)
+
+    samples = []
+    for _ in range(n):
+        start = time.perf_counter()
+        backend.generate(PROMPT)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--token-delay", type=float, default=0.0,
+                        help="Simulated seconds per generated token")
+    args = parser.parse_args()
+
+    with FakeOllamaServer(token_delay=args.token_delay) as server:
+        cli = write_fake_ollama_cli(server.url)
+
+        backends = [
+            OllamaHTTPBackend(MODEL, host=server.url),
+            OllamaSubprocessBackend(MODEL, cli),
+        ]
+
+        print(f"{'backend':<12}{'p50 ms':>10}{'p95 ms':>10}{'mean ms':>10}")
+        for backend in backends:
+            samples = run(backend, args.requests)
+            print(
+                f"{backend.name:<12}"
+                f"{percentile(samples, 50):>10.2f}"
+                f"{percentile(samples, 95):>10.2f}"
+                f"{statistics.mean(samples):>10.2f}"
+            )
+            backend.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+# benchmarks/bench_hybrid.py
+
+"""
+BM25 + vector hybrid retrieval over the real chunks.
+
+Builds a numpy read index (with its lexical_* postings) from
+data/processed/cleaned_text.txt and reports:
+- lexical index size on disk and build time
+- recall@k on benchmarks/data/eval_questions.jsonl for BM25, vectors
+  and their reciprocal rank fusion (as the Retriever fuses them)
+- BM25 search latency p50/p95 per query
+
+Vectors come from MiniLM when it can be loaded; otherwise they are
+random and only the BM25 numbers are meaningful (labelled in the output).
+
+Run:
+    python -m benchmarks.bench_hybrid --k 5
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.bench_chunker import is_hit, load_embedder, load_questions
+from benchmarks.bench_vector_index import percentile
+from src.config import HYBRID_CANDIDATES, RRF_K
+from src.embeddings.embedder import CLEANED_TEXT_PATH, chunk_sections, load_cleaned_text
+from src.retrieval.numpy_index import NumpyVectorIndex, write_numpy_index
+
+DIM = 384
+
+
+def unit(vectors) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def rrf(*rankings, k: int):
+    fused = {}
+    for ranking in rankings:
+        for rank, row in enumerate(ranking):
+            fused[int(row)] = fused.get(int(row), 0.0) + 1.0 / (RRF_K + rank + 1)
+    return sorted(fused, key=fused.get, reverse=True)[:k]
+
+
+def lexical_size_mb(path: str) -> float:
+    return sum(
+        os.path.getsize(os.path.join(path, name))
+        for name in os.listdir(path) if name.startswith("lexical_")
+    ) / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--no-embed", action="store_true", help="random vectors, BM25 recall only")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    chunks, metas = chunk_sections(load_cleaned_text(CLEANED_TEXT_PATH))
+    questions = load_questions()
+    embedder = None if args.no_embed else load_embedder()
+
+    if embedder:
+        vectors = unit(embedder.embed(chunks))
+        query_vecs = unit(embedder.embed([q["question"] for q in questions]))
+    else:
+        rng = np.random.default_rng(0)
+        vectors = unit(rng.standard_normal((len(chunks), DIM)))
+        query_vecs = unit(rng.standard_normal((len(questions), DIM)))
+
+    directory = tempfile.mkdtemp(prefix="sage-hybrid-")
+    try:
+        path = f"{directory}/idx"
+        ids = [f"chunk_{i}" for i in range(len(chunks))]
+        start = time.perf_counter()
+        write_numpy_index(path, ids, chunks, vectors, metadatas=metas)
+        build_seconds = time.perf_counter() - start
+
+        index = NumpyVectorIndex(path)
+        lexical = index.lexical
+        print(
+            f"{len(chunks)} chunks, {len(lexical.term_ids)} terms, "
+            f"{len(lexical.rows)} postings, lexical index {lexical_size_mb(path):.1f} MB on disk "
+            f"(index export {build_seconds:.1f} s)\n"
+        )
+
+        hits = {"bm25": 0, "vector": 0, "hybrid": 0}
+        for q, query in zip(questions, query_vecs):
+            bm25_rows, _ = lexical.search(q["question"], HYBRID_CANDIDATES)
+            vector_rows = index.search(query, HYBRID_CANDIDATES)[0][0]
+            rankings = {
+                "bm25": bm25_rows[:args.k],
+                "vector": vector_rows[:args.k],
+                "hybrid": rrf(vector_rows, bm25_rows, k=args.k),
+            }
+            # Rows are re-ordered by source at export; read text and metadata back by row
+            for name, rows in rankings.items():
+                hits[name] += any(
+                    is_hit(q, index.document(int(r)), index.metadatas[int(r)]) for r in rows
+                )
+
+        label = "" if embedder else "  (random vectors: MiniLM unavailable)"
+        print(f"{'ranking':<8}{f'R@{args.k}':>7}")
+        for name, n in hits.items():
+            note = label if name != "bm25" else ""
+            print(f"{name:<8}{n / len(questions):>7.2f}{note}")
+
+        timings = []
+        for _ in range(args.repeat):
+            for q in questions:
+                start = time.perf_counter()
+                lexical.search(q["question"], HYBRID_CANDIDATES)
+                timings.append((time.perf_counter() - start) * 1000)
+        print(f"\nBM25 search p50 {percentile(timings, 0.5):.3f} ms  p95 {percentile(timings, 0.95):.3f} ms")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+# benchmarks/bench_ingest_memory.py
+
+"""
+Peak memory of batch vs streaming ingest on a synthetic PDF corpus.
+
+- batch:  extract every PDF to a string, join the corpus, chunk it, embed
+          all chunks in one call (the run_extraction → vector_store path)
+- stream: src.embeddings.ingest generators, embedding INGEST_BATCH_SIZE
+          chunks at a time
+
+Each mode runs in a fresh interpreter and reports VmHWM. The embedder is a
+stand-in that returns float32 384-d vectors (what MiniLM returns), so the
+numbers cover our own buffers, not the model. Run for two corpus sizes to
+see which mode scales with the corpus.
+
+Run:
+    python -m benchmarks.bench_ingest_memory --pdfs 10 40 --pages 150
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.bench_vector_index import peak_rss_mb
+
+DIM = 384
+
+
+def make_corpus(directory: str, pdfs: int, pages: int) -> None:
+    import fitz
+
+    rng = random.Random(0)
+    words = [
+        "semester", "credit", "hostel", "scholarship", "examination", "laboratory",
+        "elective", "regulation", "curriculum", "department", "admission", "fee",
+    ]
+
+    for n in range(pdfs):
+        doc = fitz.open()
+        for _ in range(pages):
+            page = doc.new_page()
+            text = "\n".join(
+                " ".join(rng.choice(words) for _ in range(12)) for _ in range(55)
+            )
+            page.insert_textbox(fitz.Rect(36, 36, 576, 806), text, fontsize=8)
+        doc.save(os.path.join(directory, f"doc_{n:03d}.pdf"))
+        doc.close()
+
+
+def fake_embed(texts):
+    return np.ones((len(texts), DIM), dtype=np.float32)
+
+
+def jobs_for(directory: str):
+    from src.data_extraction.run_extraction import ExtractionJob
+
+    return [
+        ExtractionJob(name, os.path.join(directory, name), f"===== SOURCE: {name} =====")
+        for name in sorted(os.listdir(directory))
+    ]
+
+
+# ---------- Child process ----------
+def child(mode: str, directory: str, batch_size: int):
+    from src.data_extraction.extract_base import extract_from_pdf_fitz
+    from src.embeddings.embedder import chunk_sections
+    from src.embeddings.ingest import iter_corpus_chunks
+    from src.utils.clean_text import clean_text
+
+    jobs = jobs_for(directory)
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    chunks = 0
+
+    if mode == "batch":
+        outputs = [f"{job.header}\n{clean_text(extract_from_pdf_fitz(job.pdf_path))}" for job in jobs]
+        corpus = "\n\n".join(outputs)
+        texts, _ = chunk_sections(corpus)
+        vectors = fake_embed(texts)
+        chunks = len(vectors)
+    else:
+        batch = []
+        for text, _ in iter_corpus_chunks(jobs):
+            batch.append(text)
+            if len(batch) >= batch_size:
+                chunks += len(fake_embed(batch))
+                batch = []
+        chunks += len(fake_embed(batch))
+
+    print(json.dumps({
+        "chunks": chunks,
+        "seconds": time.perf_counter() - start,
+        "peak_mb": peak_rss_mb(),
+        "peak_over_baseline_mb": peak_rss_mb() - baseline
+    }))
+
+
+def run_child(mode: str, directory: str, batch_size: int) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_ingest_memory",
+         "--child", mode, "--dir", directory, "--batch-size", str(batch_size)],
+        capture_output=True, text=True, check=True
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+# ---------- Main ----------
+def main():
+    from src.config import INGEST_BATCH_SIZE
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--pdfs", type=int, nargs="+", default=[10, 40])
+    parser.add_argument("--pages", type=int, default=150)
+    parser.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE)
+    parser.add_argument("--child", choices=["batch", "stream"])
+    parser.add_argument("--dir")
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.dir, args.batch_size)
+        return
+
+    print(f"{'PDFs':>6}{'pages':>8}{'mode':>8}{'chunks':>9}{'sec':>8}{'peak MB':>9}{'+MB':>8}")
+    for pdfs in args.pdfs:
+        directory = tempfile.mkdtemp(prefix="sage-ingest-")
+        try:
+            make_corpus(directory, pdfs, args.pages)
+            for mode in ["batch", "stream"]:
+                r = run_child(mode, directory, args.batch_size)
+                print(
+                    f"{pdfs:>6}{pdfs * args.pages:>8}{mode:>8}{r['chunks']:>9}"
+                    f"{r['seconds']:>8.1f}{r['peak_mb']:>9.0f}{r['peak_over_baseline_mb']:>8.0f}"
+                )
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# benchmarks/bench_rate_limit.py
+
+"""
+Rate limiter cost per check and table size: the old per-IP timestamp
+list vs the token bucket (memory and SQLite stores).
+
+Workloads, with a simulated clock:
+- hot: one client sending at just under the limit, so the old limiter
+  keeps ~RATE_LIMIT_REQUESTS timestamps and rebuilds that list per check
+- unique: a stream of distinct client IPs (a crawler or a NAT pool),
+  the case where the old table grows forever
+
+Reports µs per check (p50 / p95) and the number of clients tracked at
+the end.
+
+Run:
+    python -m benchmarks.bench_rate_limit --unique 200000
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from benchmarks.bench_vector_index import percentile
+from src.config import RATE_LIMIT_REQUESTS, RATE_LIMIT_WINDOW_SECONDS
+from src.utils.rate_limiter import MemoryStore, SQLiteStore, TokenBucketLimiter
+
+
+class ListLimiter:
+    """The limiter sage-backend/main.py used before: timestamps per client."""
+
+    def __init__(self, max_requests: int = RATE_LIMIT_REQUESTS, window: float = RATE_LIMIT_WINDOW_SECONDS):
+        self.max_requests = max_requests
+        self.window = window
+        self.request_tracker = {}
+
+    def allow(self, key: str, now: float) -> bool:
+        if key not in self.request_tracker:
+            self.request_tracker[key] = []
+        self.request_tracker[key] = [t for t in self.request_tracker[key] if now - t < self.window]
+        if len(self.request_tracker[key]) >= self.max_requests:
+            return False
+        self.request_tracker[key].append(now)
+        return True
+
+    def clients(self) -> int:
+        return len(self.request_tracker)
+
+
+def hot(checks: int):
+    """One client, spaced just under the limit."""
+    step = RATE_LIMIT_WINDOW_SECONDS / RATE_LIMIT_REQUESTS * 1.01
+    return [("10.0.0.1", i * step) for i in range(checks)]
+
+
+def unique(checks: int):
+    """A new client every millisecond."""
+    return [(f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}", i / 1000) for i in range(checks)]
+
+
+def measure(allow, workload):
+    timings = []
+    for key, now in workload:
+        start = time.perf_counter()
+        allow(key, now)
+        timings.append((time.perf_counter() - start) * 1e6)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--hot", type=int, default=20000, help="checks in the hot-client workload")
+    parser.add_argument("--unique", type=int, default=200000, help="distinct clients in the unique workload")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="sage-bench-")
+    try:
+        print(f"{'limiter':<14}{'workload':<10}{'µs p50/p95':>14}{'clients at end':>16}")
+        for name, workload in [("hot", hot(args.hot)), ("unique", unique(args.unique))]:
+            path = os.path.join(workdir, f"{name}.sqlite3")
+            limiters = [
+                ("list (old)", ListLimiter()),
+                ("bucket/memory", TokenBucketLimiter(store=MemoryStore(), clock=lambda: 0.0)),
+                ("bucket/sqlite", TokenBucketLimiter(store=SQLiteStore(path), clock=lambda: 0.0)),
+            ]
+            for label, limiter in limiters:
+                timings = measure(limiter.allow, workload)
+                clients = limiter.clients() if isinstance(limiter, ListLimiter) else len(limiter.store)
+                print(
+                    f"{label:<14}{name:<10}"
+                    f"{f'{percentile(timings, 0.5):.2f}/{percentile(timings, 0.95):.2f}':>14}"
+                    f"{clients:>16}"
+                )
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# benchmarks/bench_rerank.py
+
+"""
+Cross-encoder rerank stage: over-fetch, rerank, keep the best chunks
+within the token budget.
+
+First stage is BM25 over the real chunks (MiniLM when it can be loaded,
+as in bench_chunker). Per eval question (benchmarks/data/eval_questions.jsonl):
+- recall@N of the first stage, and recall@candidates (what reranking
+  can at best recover)
+- recall@N and prompt tokens after reranking
+- rerank latency p50/p95 for one batched call over the candidates
+
+Without the cross-encoder, the rerank columns show the retrieval order
+under the same top-N/token budget (labelled in the output).
+
+Run:
+    python -m benchmarks.bench_rerank --candidates 30
+"""
+
+import argparse
+import time
+
+from benchmarks.bench_chunker import BM25Ranker, MiniLMRanker, is_hit, load_embedder, load_questions
+from benchmarks.bench_vector_index import percentile
+from src.config import RERANK_CANDIDATES, RERANK_TOKEN_BUDGET, RERANK_TOP_N
+from src.embeddings.embedder import CLEANED_TEXT_PATH, chunk_sections, load_cleaned_text, token_counter
+from src.retrieval.reranker import CrossEncoderReranker
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--candidates", type=int, default=RERANK_CANDIDATES)
+    parser.add_argument("--top-n", type=int, default=RERANK_TOP_N)
+    parser.add_argument("--token-budget", type=int, default=RERANK_TOKEN_BUDGET)
+    parser.add_argument("--no-embed", action="store_true", help="BM25 first stage")
+    args = parser.parse_args()
+
+    chunks, metas = chunk_sections(load_cleaned_text(CLEANED_TEXT_PATH))
+    questions = load_questions()
+    embedder = None if args.no_embed else load_embedder()
+    ranker = MiniLMRanker(chunks, embedder) if embedder else BM25Ranker(chunks)
+    count_tokens = token_counter()
+
+    reranker = CrossEncoderReranker(
+        top_n=args.top_n,
+        token_budget=args.token_budget,
+        count_tokens=count_tokens
+    )
+    available = reranker.model is not None
+    if not available:
+        print(f"{reranker.model_name} unavailable; rerank columns keep the retrieval order")
+
+    first_hits = ceiling_hits = rerank_hits = 0
+    first_tokens = rerank_tokens = 0
+    timings = []
+    for q in questions:
+        rows = list(ranker.top_k(q["question"], args.candidates))
+        candidates = [chunks[i] for i in rows]
+        source_of = {chunks[i]: metas[i] for i in rows}
+
+        start = time.perf_counter()
+        selected = reranker.rerank(q["question"], candidates)
+        timings.append((time.perf_counter() - start) * 1000)
+
+        first = candidates[:args.top_n]
+        first_hits += any(is_hit(q, c, source_of[c]) for c in first)
+        ceiling_hits += any(is_hit(q, c, source_of[c]) for c in candidates)
+        rerank_hits += any(is_hit(q, c, source_of[c]) for c in selected)
+        first_tokens += sum(count_tokens(c) for c in first)
+        rerank_tokens += sum(count_tokens(c) for c in selected)
+
+    n = len(questions)
+    print(f"{len(chunks)} chunks, {n} questions, first stage {'MiniLM' if embedder else 'BM25'}\n")
+    print(f"{'stage':<24}{'recall':>8}{'prompt tokens':>15}")
+    print(f"{f'first stage top-{args.top_n}':<24}{first_hits / n:>8.2f}{first_tokens / n:>15.0f}")
+    print(f"{f'candidates ({args.candidates})':<24}{ceiling_hits / n:>8.2f}{'':>15}")
+    label = "reranked" if available else "retrieval order"
+    print(f"{f'{label}, budget':<24}{rerank_hits / n:>8.2f}{rerank_tokens / n:>15.0f}")
+
+    if available:
+        print(f"\nrerank p50 {percentile(timings, 0.5):.1f} ms  p95 {percentile(timings, 0.95):.1f} ms "
+              f"({args.candidates} pairs per call)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# benchmarks/bench_startup.py
+
+"""
+Backend cold start: import profile of sage-backend/main.py and time
+from process start to the first successful GET /health.
+
+- import: `python -X importtime -c "import main"` in a fresh
+  interpreter; total, heaviest packages (cumulative) and a check that
+  chromadb / langgraph / torch stay out of the import
+- healthy: `uvicorn main:app` in a fresh process, polled until /health
+  answers 200. This includes the lifespan: Ollama warm-up and pipeline
+  build + model warm-up run concurrently.
+
+Targets: import under IMPORT_TARGET_S, first healthy under
+HEALTHY_TARGET_S (with Ollama and the models cached locally).
+
+Run:
+    python -m benchmarks.bench_startup
+"""
+
+import argparse
+import os
+import re
+import socket
+import subprocess
+import sys
+import time
+
+import requests
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sage-backend")
+
+IMPORT_TARGET_S = 1.0
+HEALTHY_TARGET_S = 15.0
+
+# Must not be imported by `import main`; they load in the lifespan
+DEFERRED = ["chromadb.api", "langgraph.graph", "torch", "sentence_transformers"]
+
+IMPORTTIME = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s+)(\S+)")
+
+
+def import_profile():
+    """[(module, self µs, cumulative µs, depth)] of `import main`, import order."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            rows.append((module, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return rows
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def time_to_healthy(timeout: float) -> float:
+    port = free_port()
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                if requests.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                    return time.perf_counter() - start
+            except requests.ConnectionError:
+                pass
+            if server.poll() is not None:
+                raise RuntimeError(f"backend exited with code {server.returncode}")
+            time.sleep(0.05)
+        raise TimeoutError(f"/health not up after {timeout:.0f} s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--top", type=int, default=10, help="heaviest top-level packages to list")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=120)
+    args = parser.parse_args()
+
+    profiles = [import_profile() for _ in range(args.repeat)]
+    totals = [next(c for m, _, c, _ in rows if m == "main") / 1e6 for rows in profiles]
+    rows = profiles[totals.index(min(totals))]
+
+    packages = {}
+    for module, _, cumulative, _ in rows:
+        top = module.split(".")[0]
+        if module == top and module != "main":
+            packages[top] = packages.get(top, 0) + cumulative
+
+    print(f"import main: {min(totals):.2f} s (best of {args.repeat}), target {IMPORT_TARGET_S:.1f} s "
+          f"→ {'ok' if min(totals) <= IMPORT_TARGET_S else 'MISSED'}")
+    print(f"\n{'package':<28}{'cumulative ms':>14}")
+    for package, cumulative in sorted(packages.items(), key=lambda p: -p[1])[:args.top]:
+        print(f"{package:<28}{cumulative / 1000:>14.1f}")
+
+    imported = {module for module, *_ in rows}
+    leaked = [m for m in DEFERRED if m in imported]
+    print(f"\ndeferred to startup: {', '.join(DEFERRED)} → {'ok' if not leaked else 'imported: ' + ', '.join(leaked)}")
+
+    seconds = time_to_healthy(args.timeout)
+    print(f"\ncold start → first healthy: {seconds:.2f} s, target {HEALTHY_TARGET_S:.0f} s "
+          f"→ {'ok' if seconds <= HEALTHY_TARGET_S else 'MISSED'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+# benchmarks/bench_vector_index.py
+
+"""
+Chroma vs in-process numpy index on the read path.
+
+Measures, for the same vectors:
+- query latency (p50 / p95 of top-k for one query vector)
+- cold start: fresh interpreter → index opened → first result
+- peak RSS of that fresh process
+
+Uses the real collection in data/vector_db when --real is given,
+otherwise a synthetic collection of random unit vectors (MiniLM size).
+Query vectors are given directly, so the encoder is not part of the timing.
+
+Run:
+    python -m benchmarks.bench_vector_index --chunks 5000
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+COLLECTION_NAME = "sage_docs"
+DIM = 384
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def build_synthetic(db_path: str, chunks: int):
+    import chromadb
+
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((chunks, DIM)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    client = chromadb.PersistentClient(path=db_path)
+    collection = client.get_or_create_collection(COLLECTION_NAME, embedding_function=None)
+    for start in range(0, chunks, 5000):
+        end = min(start + 5000, chunks)
+        collection.add(
+            ids=[f"chunk_{i}" for i in range(start, end)],
+            documents=[f"synthetic chunk {i} " + "lorem ipsum " * 40 for i in range(start, end)],
+            embeddings=vectors[start:end].tolist()
+        )
+    return collection
+
+
+def query_vectors(n: int) -> np.ndarray:
+    rng = np.random.default_rng(1)
+    q = rng.standard_normal((n, DIM)).astype(np.float32)
+    return q / np.linalg.norm(q, axis=1, keepdims=True)
+
+
+# ---------- Child process: cold start + RSS ----------
+def peak_rss_mb() -> float:
+    # VmHWM, not ru_maxrss: the latter survives exec and would report the parent's peak
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def child(backend: str, db_path: str, index_path: str, top_k: int):
+    start = time.perf_counter()
+    q = query_vectors(1)
+
+    if backend == "chroma":
+        import chromadb
+        collection = chromadb.PersistentClient(path=db_path).get_collection(COLLECTION_NAME)
+        collection.query(query_embeddings=q.tolist(), n_results=top_k, include=["documents", "distances"])
+    else:
+        from src.retrieval.numpy_index import NumpyVectorIndex
+        index = NumpyVectorIndex(index_path)
+        indices, _ = index.search(q, top_k)
+        [index.document(i) for i in indices[0]]
+
+    print(json.dumps({
+        "cold_start_ms": (time.perf_counter() - start) * 1000,
+        "max_rss_mb": peak_rss_mb()
+    }))
+
+
+def run_child(backend, db_path, index_path, top_k):
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_vector_index",
+         "--child", backend, "--db", db_path, "--index", index_path, "--top-k", str(top_k)],
+        capture_output=True, text=True, check=True
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+# ---------- Main ----------
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--chunks", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--real", action="store_true")
+    parser.add_argument("--child", choices=["chroma", "numpy"])
+    parser.add_argument("--db")
+    parser.add_argument("--index")
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.db, args.index, args.top_k)
+        return
+
+    import chromadb
+    from src.retrieval.numpy_index import NumpyVectorIndex, export_from_chroma
+
+    workdir = tempfile.mkdtemp(prefix="sage-bench-")
+    if args.real:
+        from src.retrieval.retriever import VECTOR_DB_PATH
+        db_path = VECTOR_DB_PATH
+        collection = chromadb.PersistentClient(path=db_path).get_collection(COLLECTION_NAME)
+    else:
+        db_path = os.path.join(workdir, "chroma")
+        collection = build_synthetic(db_path, args.chunks)
+
+    print(f"chunks: {collection.count()}")
+
+    queries = query_vectors(args.queries)
+    rows = []
+
+    chroma_times = []
+    for q in queries:
+        start = time.perf_counter()
+        collection.query(query_embeddings=[q.tolist()], n_results=args.top_k, include=["documents", "distances"])
+        chroma_times.append((time.perf_counter() - start) * 1000)
+    rows.append(("chroma", chroma_times, run_child("chroma", db_path, "", args.top_k)))
+
+    for dtype in ["float32", "float16"]:
+        index_path = os.path.join(workdir, f"numpy_{dtype}")
+        export_from_chroma(collection, path=index_path, dtype=dtype)
+        index = NumpyVectorIndex(index_path)
+
+        times = []
+        for q in queries:
+            start = time.perf_counter()
+            indices, _ = index.search(q, args.top_k)
+            [index.document(i) for i in indices[0]]
+            times.append((time.perf_counter() - start) * 1000)
+        rows.append((f"numpy-{dtype}", times, run_child("numpy", db_path, index_path, args.top_k)))
+
+    print(f"{'backend':<16}{'p50 ms':>10}{'p95 ms':>10}{'cold ms':>10}{'RSS MB':>10}")
+    for name, times, proc in rows:
+        print(
+            f"{name:<16}{percentile(times, 0.5):>10.3f}{percentile(times, 0.95):>10.3f}"
+            f"{proc['cold_start_ms']:>10.0f}{proc['max_rss_mb']:>10.0f}"
+        )
+
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
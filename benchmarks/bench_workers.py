@@ -0,0 +1,160 @@
+# benchmarks/bench_workers.py
+
+"""
+Memory per worker and aggregate retrieval throughput for 1, 2, 4 worker
+processes sharing one read index (what sage-backend/serve.py runs).
+
+Each worker is a fresh process with its own Retriever over the numpy
+read index — vector search plus BM25 (hybrid) — and runs retrieve_many()
+over the eval questions for --seconds. Modes:
+- mmap: the index files are memory-mapped (the serving default), so
+  their pages are shared between workers
+- copy: each worker reads the index into private memory (what every
+  worker loading its own copy costs)
+
+Memory is read from /proc/self/smaps_rollup after the run: RSS, PSS
+(shared pages divided between the processes mapping them) and private.
+Total PSS is what the workers really take together. Query vectors come
+from a random encoder, so the MiniLM weights (~90 MB per worker, not
+shared) are not in these numbers, and the index is synthetic: real chunk
+texts cycled to --chunks rows with random unit vectors.
+
+Run:
+    python -m benchmarks.bench_workers --chunks 50000 --seconds 5
+"""
+
+import argparse
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+import zlib
+
+import numpy as np
+
+from benchmarks.bench_chunker import load_questions
+from benchmarks.bench_vector_index import DIM
+
+WORKER_COUNTS = [1, 2, 4]
+
+
+class RandomEncoder:
+    """Stands in for QueryEncoder: a fixed random unit vector per question."""
+
+    def encode_many(self, texts):
+        vectors = np.stack([
+            np.random.default_rng(zlib.crc32(text.encode("utf-8"))).standard_normal(DIM)
+            for text in texts
+        ]).astype(np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def build_index(path: str, chunks: int) -> None:
+    from src.embeddings.embedder import CLEANED_TEXT_PATH, chunk_sections, load_cleaned_text
+    from src.retrieval.numpy_index import write_numpy_index
+
+    texts, _ = chunk_sections(load_cleaned_text(CLEANED_TEXT_PATH), "chars")
+    rng = np.random.default_rng(0)
+    write_numpy_index(
+        path,
+        ids=[f"chunk_{i}" for i in range(chunks)],
+        documents=[f"{texts[i % len(texts)]} [{i}]" for i in range(chunks)],
+        embeddings=rng.standard_normal((chunks, DIM)).astype(np.float32),
+        index_version="bench",
+        metadatas=[{"source": f"doc_{i % 40}"} for i in range(chunks)]
+    )
+
+
+def memory_mb() -> dict:
+    fields = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    return {
+        "rss": fields.get("Rss", 0.0),
+        "pss": fields.get("Pss", 0.0),
+        "private": fields.get("Private_Clean", 0.0) + fields.get("Private_Dirty", 0.0)
+    }
+
+
+# ---------- Worker process ----------
+def worker(mode: str, questions, seconds: float, batch: int, barrier, results) -> None:
+    from src.retrieval.numpy_index import NUMPY_INDEX_PATH, NumpyVectorIndex
+    from src.retrieval.retriever import Retriever
+
+    retriever = Retriever(backend="numpy", encoder=RandomEncoder(), auto_filter=False, hybrid=True)
+    if mode == "copy":
+        retriever.index = retriever.read_index = NumpyVectorIndex(NUMPY_INDEX_PATH, mmap=False)
+    retriever.retrieve_many(questions[:batch])
+
+    barrier.wait()
+    queries = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        start = queries % len(questions)
+        retriever.retrieve_many(questions[start:start + batch])
+        queries += len(questions[start:start + batch])
+
+    results.put({"queries": queries, **memory_mb()})
+
+
+def run(mode: str, workers: int, questions, seconds: float, batch: int):
+    ctx = multiprocessing.get_context("spawn")
+    barrier = ctx.Barrier(workers)
+    results = ctx.Queue()
+    processes = [
+        ctx.Process(target=worker, args=(mode, questions, seconds, batch, barrier, results))
+        for _ in range(workers)
+    ]
+    for p in processes:
+        p.start()
+    stats = [results.get() for _ in processes]
+    for p in processes:
+        p.join()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--chunks", type=int, default=50000)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--batch", type=int, default=8, help="questions per retrieve_many call")
+    args = parser.parse_args()
+
+    questions = [q["question"] for q in load_questions()]
+
+    workdir = tempfile.mkdtemp(prefix="sage-bench-")
+    index_path = os.path.join(workdir, "numpy_index")
+    try:
+        build_index(index_path, args.chunks)
+        index_mb = sum(e.stat().st_size for e in os.scandir(index_path)) / 1024 / 1024
+        # Inherited by the spawned workers
+        os.environ["SAGE_NUMPY_INDEX_PATH"] = index_path
+        os.environ.setdefault("OMP_NUM_THREADS", "1")
+
+        print(f"index: {args.chunks} chunks, {index_mb:.1f} MB on disk, {os.cpu_count()} CPU(s)\n")
+        print(
+            f"{'mode':<6}{'workers':>8}{'RSS/worker':>12}{'PSS/worker':>12}"
+            f"{'private/worker':>16}{'total PSS':>11}{'q/s':>9}"
+        )
+        for mode in ["mmap", "copy"]:
+            for workers in WORKER_COUNTS:
+                stats = run(mode, workers, questions, args.seconds, args.batch)
+                n = len(stats)
+                print(
+                    f"{mode:<6}{workers:>8}"
+                    f"{sum(s['rss'] for s in stats) / n:>12.1f}"
+                    f"{sum(s['pss'] for s in stats) / n:>12.1f}"
+                    f"{sum(s['private'] for s in stats) / n:>16.1f}"
+                    f"{sum(s['pss'] for s in stats):>11.1f}"
+                    f"{sum(s['queries'] for s in stats) / args.seconds:>9.0f}"
+                )
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+# benchmarks/fake_ollama.py
+
+"""
+Local stand-in for the Ollama server, used by benchmarks and tests.
+
+Implements the subset of the API SAGE uses:
+- POST /api/generate
+- GET  /api/tags
+- GET  /api/version
+
+Latency is simulated: a one-off model load per model, then a fixed
+per-token delay while "generating". Streaming requests get NDJSON chunks,
+one token at a time, like the real server.
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import stat
+import sys
+import tempfile
+import textwrap
+import threading
+import time
+
+DEFAULT_RESPONSE = "The university library is open from 8 AM to 8 PM on weekdays."
+
+
+class FakeOllamaServer:
+    """
+    Threaded fake Ollama server.
+
+    Usage:
+        with FakeOllamaServer(token_delay=0.01) as server:
+            backend = OllamaHTTPBackend("llama3.1:8b", host=server.url)
+    """
+
+    def __init__(
+        self,
+        response: str = DEFAULT_RESPONSE,
+        load_delay: float = 0.0,
+        token_delay: float = 0.0,
+        host: str = "127.0.0.1",
+        port: int = 0
+    ):
+        self.response = response
+        self.load_delay = load_delay
+        self.token_delay = token_delay
+        self.loaded_models = set()
+        self.requests = []
+        self._lock = threading.Lock()
+
+        self.httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def tokens(self):
+        # Keep whitespace attached to the following word, like real models
+        words = self.response.split(" ")
+        return [words[0]] + [f" {w}" for w in words[1:]]
+
+    def _load(self, model: str) -> None:
+        with self._lock:
+            if model in self.loaded_models:
+                return
+            self.loaded_models.add(model)
+        time.sleep(self.load_delay)
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _send_json(self, payload, status=200):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _send_chunk(self, data: bytes):
+                self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+            def _send_stream(self, model, tokens):
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+
+                for token in tokens:
+                    time.sleep(server.token_delay)
+                    line = json.dumps({"model": model, "response": token, "done": False})
+                    self._send_chunk(line.encode("utf-8") + b"\n")
+
+                done = json.dumps({"model": model, "response": "", "done": True})
+                self._send_chunk(done.encode("utf-8") + b"\n")
+                self.wfile.write(b"0\r\n\r\n")
+                self.wfile.flush()
+
+            def do_GET(self):
+                if self.path == "/api/version":
+                    self._send_json({"version": "0.0.0-fake"})
+                elif self.path == "/api/tags":
+                    self._send_json({
+                        "models": [{"name": m} for m in sorted(server.loaded_models)]
+                    })
+                else:
+                    self._send_json({"error": "not found"}, status=404)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+
+                if self.path != "/api/generate":
+                    self._send_json({"error": "not found"}, status=404)
+                    return
+
+                with server._lock:
+                    server.requests.append(payload)
+
+                model = payload.get("model", "")
+                server._load(model)
+
+                tokens = server.tokens() if payload.get("prompt") else []
+
+                # Ollama streams unless told otherwise
+                if payload.get("stream", True):
+                    self._send_stream(model, tokens)
+                    return
+
+                time.sleep(server.token_delay * len(tokens))
+
+                self._send_json({
+                    "model": model,
+                    "response": "".join(tokens),
+                    "done": True
+                })
+
+        return Handler
+
+    def start(self) -> "FakeOllamaServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "FakeOllamaServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def write_fake_ollama_cli(server_url: str, directory: str = None) -> str:
+    """
+    Writes an executable `ollama` stand-in that behaves like `ollama run`:
+    a fresh process per prompt which forwards stdin to the server.
+    Returns the executable path.
+    """
+    directory = directory or tempfile.mkdtemp(prefix="fake_ollama_")
+    path = os.path.join(directory, "ollama")
+
+    script = textwrap.dedent(f"""\
+        #!{sys.executable}
+        import json, sys, urllib.request
+
+        model = sys.argv[2]
+        prompt = sys.stdin.read()
+        request = urllib.request.Request(
+            "{server_url}/api/generate",
+            data=json.dumps({{"model": model, "prompt": prompt, "stream": False}}).encode(),
+            headers={{"Content-Type": "application/json"}},
+        )
+        with urllib.request.urlopen(request) as response:
+            print(json.load(response)["response"])
+    """)
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(script)
+    os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+
+    return path
+
+
+if __name__ == "__main__":
+    with FakeOllamaServer(token_delay=0.02) as server:
+        print(f"Fake Ollama listening on {server.url} (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,121 @@
+# benchmarks/load_test_retrieval.py
+
+"""
+Load test for the retrieval micro-batcher.
+
+N client threads fire questions concurrently (like /ask requests running
+run_rag in worker threads) and we compare throughput of
+- direct:  every request calls Retriever.retrieve on its own
+- batched: requests go through RetrievalBatcher
+
+By default uses the real Retriever (needs data/vector_db and
+sentence-transformers). --simulate swaps in a retriever whose cost model
+is a fixed per-call overhead plus a small per-query cost, for machines
+without the index.
+
+Run:
+    python -m benchmarks.load_test_retrieval --clients 32 --requests 400
+"""
+
+import argparse
+import statistics
+import threading
+import time
+
+from src.retrieval.batcher import RetrievalBatcher
+
+QUESTIONS = [
+    "What are the library working hours?",
+    "What is the hostel fee for first year students?",
+    "Which companies recruit from the university?",
+    "How do I apply for the Pragati scholarship?",
+    "What clubs are present on campus?",
+    "What is the attendance requirement for B.Tech?",
+    "Who is the head of the CSE department?",
+    "How do I pay the semester fees online?",
+]
+
+
+class SimulatedRetriever:
+    """Per call: `overhead_ms` (model call + vector query), plus `per_query_ms` per question."""
+
+    def __init__(self, overhead_ms: float = 8.0, per_query_ms: float = 1.0):
+        self.overhead = overhead_ms / 1000
+        self.per_query = per_query_ms / 1000
+        self._lock = threading.Lock()  # one model / one DB handle at a time
+
+    def retrieve(self, query):
+        return self.retrieve_many([query])[0]
+
+    def retrieve_many(self, queries):
+        with self._lock:
+            time.sleep(self.overhead + self.per_query * len(queries))
+        return [[f"doc for {q}"] for q in queries]
+
+
+def run(retrieve, clients: int, requests: int):
+    latencies = []
+    lock = threading.Lock()
+    per_client = requests // clients
+
+    def client(offset):
+        for i in range(per_client):
+            question = QUESTIONS[(offset + i) % len(QUESTIONS)] + f" #{offset}-{i}"
+            start = time.perf_counter()
+            retrieve(question)
+            with lock:
+                latencies.append((time.perf_counter() - start) * 1000)
+
+    threads = [threading.Thread(target=client, args=(c,)) for c in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "throughput": len(latencies) / elapsed,
+        "p50": latencies[len(latencies) // 2],
+        "p95": latencies[int(len(latencies) * 0.95) - 1],
+        "mean": statistics.mean(latencies)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--wait-ms", type=float, default=5)
+    parser.add_argument("--simulate", action="store_true")
+    args = parser.parse_args()
+
+    if args.simulate:
+        retriever = SimulatedRetriever()
+    else:
+        from src.retrieval.retriever import Retriever
+        retriever = Retriever(top_k=5)
+        retriever.retrieve(QUESTIONS[0])  # load the encoder before timing
+
+    batcher = RetrievalBatcher(
+        retriever,
+        max_batch_size=args.batch_size,
+        max_wait_ms=args.wait_ms,
+        max_queue_depth=args.clients * 2
+    )
+
+    print(f"{'mode':<10}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'mean ms':>10}")
+    for name, fn in [("direct", retriever.retrieve), ("batched", batcher.retrieve)]:
+        r = run(fn, args.clients, args.requests)
+        print(
+            f"{name:<10}{r['throughput']:>10.1f}{r['p50']:>10.2f}"
+            f"{r['p95']:>10.2f}{r['mean']:>10.2f}"
+        )
+
+    print(f"batcher: {batcher.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,10 +5,10 @@ Comprehensive error handling for real-world deployment
 
 from fastapi import FastAPI, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.exceptions import RequestValidationError
 from pydantic import BaseModel, Field, validator
-from typing import Optional, Dict, Any, List
+from typing import Dict, Any
 import logging
 import sys
 import os
@@ -18,13 +18,23 @@ import re
 import asyncio
 from contextlib import asynccontextmanager
 import time
+import json
+import uuid
 
 # Add project root to path
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, BASE_DIR)
 
-from src.pipeline.rag_graph import run_rag
-from src.config import AVAILABLE_MODELS, DEFAULT_MODEL
+from src.pipeline import rag_graph
+from src.pipeline.rag_graph import run_rag, stream_rag, graph_stats, warm_up_pipeline
+from src.retrieval.batcher import BatcherOverloaded
+from src.generation.generator import ResponseReplaced, TIMEOUT_MESSAGE
+from src.generation.scheduler import SchedulerRejected, SchedulerTimeout, generation_scheduler
+from src.generation.registry import registry
+from src.utils.rate_limiter import TokenBucketLimiter
+from src.utils.metrics import HTTP_SECONDS, STAGE_SECONDS, render_metrics
+from src.utils.tracing import start_trace, use_span
+from src.config import AVAILABLE_MODELS, DEFAULT_MODEL, REQUEST_TIMEOUT_SECONDS
 
 # Logging configuration
 os.makedirs('logs', exist_ok=True)
@@ -45,9 +55,7 @@ app_state = {
     "successful_requests": 0,
     "failed_requests": 0,
     "vector_db_loaded": False,
-    "ollama_available": False,
-    "average_response_time": 0,
-    "request_times": []
+    "ollama_available": False
 }
 
 # User-friendly error messages (no internal details exposed)
@@ -75,8 +83,17 @@ async def lifespan(app: FastAPI):
     vector_db_path = os.path.join(BASE_DIR, "data", "vector_db")
     app_state["vector_db_loaded"] = os.path.exists(vector_db_path)
     
-    import shutil
-    app_state["ollama_available"] = shutil.which("ollama") is not None
+    # Probe Ollama and load the default model so the first question
+    # does not pay the model-load time; meanwhile build the pipeline
+    # (Chroma, LangGraph, query encoder), which importing this module
+    # no longer does
+    warmed, _ = await asyncio.gather(
+        asyncio.to_thread(registry.warm_up_all),
+        asyncio.to_thread(warm_up_pipeline)
+    )
+    app_state["ollama_available"] = any(
+        registry.is_healthy(model) for model in warmed
+    )
     
     if app_state["vector_db_loaded"] and app_state["ollama_available"]:
         logger.info("All systems operational")
@@ -86,6 +103,7 @@ async def lifespan(app: FastAPI):
     yield
     
     # Shutdown
+    registry.close()
     logger.info(f"Shutting down - Processed {app_state['total_requests']} requests")
 
 app = FastAPI(
@@ -153,31 +171,37 @@ class HealthResponse(BaseModel):
     status: str
     available: bool
 
-# Rate limiting (in-memory - simple but effective)
-request_tracker: Dict[str, List[float]] = {}
-RATE_LIMIT_WINDOW = 60  # seconds
-RATE_LIMIT_MAX = 30  # requests per window
+# Rate limiting: token bucket per client IP (SAGE_RATE_LIMIT_STORE=sqlite shares it between workers)
+rate_limiter = TokenBucketLimiter()
 
 def check_rate_limit(client_ip: str) -> bool:
     """Check if client has exceeded rate limit"""
-    current_time = time.time()
-    
-    if client_ip not in request_tracker:
-        request_tracker[client_ip] = []
-    
-    # Clean old requests
-    request_tracker[client_ip] = [
-        req_time for req_time in request_tracker[client_ip]
-        if current_time - req_time < RATE_LIMIT_WINDOW
-    ]
+    return rate_limiter.allow(client_ip)
+
+def admit_request(client_ip: str) -> None:
+    """Rate limit and availability checks shared by all question endpoints"""
+    # Rate limiting check
+    if not check_rate_limit(client_ip):
+        logger.warning(f"Rate limit exceeded for {client_ip}")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=FRIENDLY_ERRORS["rate_limit"]
+        )
     
-    # Check limit
-    if len(request_tracker[client_ip]) >= RATE_LIMIT_MAX:
-        return False
+    # System availability check
+    if not app_state["vector_db_loaded"]:
+        logger.error("Vector database not available")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=FRIENDLY_ERRORS["service_unavailable"]
+        )
     
-    # Add current request
-    request_tracker[client_ip].append(current_time)
-    return True
+    if not app_state["ollama_available"]:
+        logger.error("Ollama not available")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=FRIENDLY_ERRORS["service_unavailable"]
+        )
 
 # Exception Handlers - Return only user-friendly messages
 @app.exception_handler(RequestValidationError)
@@ -229,24 +253,43 @@ async def global_exception_handler(request: Request, exc: Exception):
         content=ErrorResponse(error=FRIENDLY_ERRORS["processing_error"]).dict()
     )
 
+async def end_span_with_body(body_iterator, root):
+    """Passes the response body through and ends the request's root span after it"""
+    error = None
+    try:
+        async for chunk in body_iterator:
+            yield chunk
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        root.end(error)
+
 # Middleware for request tracking
 @app.middleware("http")
 async def track_requests(request: Request, call_next):
-    """Track all requests and measure response time"""
-    start_time = time.time()
+    """Track all requests, measure response time and open the request's trace"""
+    start_time = time.perf_counter()
     app_state["total_requests"] += 1
     
-    response = await call_next(request)
+    # Request ID: the caller's (proxy, frontend) or a new one; on every span and echoed back
+    request_id = request.headers.get("x-request-id") or uuid.uuid4().hex
     
-    # Calculate response time
-    response_time = (time.time() - start_time) * 1000  # Convert to ms
+    root = start_trace(f"{request.method} {request.url.path}", request_id, method=request.method)
+    try:
+        with use_span(root):
+            response = await call_next(request)
+    except Exception as e:
+        root.end(e)
+        raise
+    root.set_attribute("status_code", response.status_code)
+    # The root span ends with the body, so a streamed answer's generate/llm spans stay inside it
+    response.body_iterator = end_span_with_body(response.body_iterator, root)
     
-    # Update average response time
-    app_state["request_times"].append(response_time)
-    if len(app_state["request_times"]) > 100:  # Keep last 100
-        app_state["request_times"].pop(0)
-    app_state["average_response_time"] = sum(app_state["request_times"]) / len(app_state["request_times"])
+    # Latency histogram (streamed answers: time until the response starts)
+    HTTP_SECONDS.observe(time.perf_counter() - start_time)
     
+    response.headers["X-Request-ID"] = request_id
     return response
 
 # API Endpoints
@@ -269,6 +312,32 @@ async def health_check():
         available=is_healthy
     )
 
+@app.get("/internal/metrics")
+async def internal_metrics():
+    """Operational metrics for the team (not used by the frontend)"""
+    return {
+        # Counters are per worker process (see serve.py)
+        "worker_pid": os.getpid(),
+        "requests": {
+            "total": app_state["total_requests"],
+            "successful": app_state["successful_requests"],
+            "failed": app_state["failed_requests"],
+            "latency_ms": HTTP_SECONDS.percentiles_ms(),
+            "question_latency_ms": STAGE_SECONDS.percentiles_ms("total")
+        },
+        "answer_cache": rag_graph.answer_cache.stats() if rag_graph.answer_cache is not None else None,
+        "retrieval_batcher": rag_graph.retrieval_batcher.stats() if rag_graph.retrieval_batcher is not None else None,
+        "reranker": rag_graph.reranker.stats() if rag_graph.reranker is not None else None,
+        "graph_branches": graph_stats(),
+        "rate_limiter": rate_limiter.stats(),
+        "generation": generation_scheduler.stats()
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus scrape endpoint: per-stage latency histograms and counters"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 @app.post("/ask", response_model=ChatResponse)
 async def ask_question(request: ChatRequest, req: Request):
     """
@@ -293,28 +362,8 @@ async def ask_question(request: ChatRequest, req: Request):
     start_time = time.time()
     
     try:
-        # Rate limiting check
-        if not check_rate_limit(client_ip):
-            logger.warning(f"Rate limit exceeded for {client_ip}")
-            raise HTTPException(
-                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                detail=FRIENDLY_ERRORS["rate_limit"]
-            )
-        
-        # System availability check
-        if not app_state["vector_db_loaded"]:
-            logger.error("Vector database not available")
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail=FRIENDLY_ERRORS["service_unavailable"]
-            )
-        
-        if not app_state["ollama_available"]:
-            logger.error("Ollama not available")
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail=FRIENDLY_ERRORS["service_unavailable"]
-            )
+        # Rate limiting and system availability checks
+        admit_request(client_ip)
         
         # Log sanitized question (first 100 chars only)
         logger.info(f"Question from {client_ip}: {request.question[:100]}...")
@@ -322,19 +371,32 @@ async def ask_question(request: ChatRequest, req: Request):
         # Get model to use
         model_name = AVAILABLE_MODELS[DEFAULT_MODEL]["name"]
         
-        # Run RAG pipeline with timeout protection
+        # Run RAG pipeline within the request budget. The deadline covers
+        # queueing for retrieval and for a generation slot, and the model
+        # only gets what is left of it.
+        deadline = time.monotonic() + REQUEST_TIMEOUT_SECONDS
         try:
-            # Execute RAG with asyncio timeout
-            answer = await asyncio.wait_for(
-                asyncio.to_thread(run_rag, request.question, model_name),
-                timeout=60.0  # 60 second timeout
-            )
-        except asyncio.TimeoutError:
+            answer = await asyncio.to_thread(run_rag, request.question, model_name, deadline)
+            if answer == TIMEOUT_MESSAGE:
+                raise TimeoutError("generation exceeded request budget")
+        except (SchedulerTimeout, TimeoutError):
             logger.error(f"Timeout processing question from {client_ip}")
             raise HTTPException(
                 status_code=status.HTTP_504_GATEWAY_TIMEOUT,
                 detail=FRIENDLY_ERRORS["timeout"]
             )
+        except SchedulerRejected:
+            logger.error(f"Generation queue full, rejecting question from {client_ip}")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=FRIENDLY_ERRORS["service_unavailable"]
+            )
+        except BatcherOverloaded:
+            logger.error(f"Retrieval queue full, rejecting question from {client_ip}")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=FRIENDLY_ERRORS["service_unavailable"]
+            )
         except FileNotFoundError as e:
             logger.error(f"File not found in RAG pipeline: {str(e)}")
             raise HTTPException(
@@ -378,6 +440,7 @@ async def ask_question(request: ChatRequest, req: Request):
         # Track success
         app_state["successful_requests"] += 1
         processing_time = (time.time() - start_time) * 1000
+        STAGE_SECONDS.observe(processing_time / 1000, "total")
         
         logger.info(f"Successfully answered question from {client_ip} in {processing_time:.0f}ms")
         
@@ -398,6 +461,80 @@ async def ask_question(request: ChatRequest, req: Request):
             detail=FRIENDLY_ERRORS["processing_error"]
         )
 
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/ask/stream")
+async def ask_question_stream(request: ChatRequest, req: Request):
+    """
+    Streaming chat endpoint (Server-Sent Events)
+    
+    Events:
+    - token:   {"text": "..."} - next piece of the answer
+    - replace: {"answer": "..."} - discard the text shown so far, show this instead
+    - error:   {"error": "..."} - friendly error, stream ends
+    - done:    {} - answer complete
+    """
+    
+    client_ip = req.client.host
+    admit_request(client_ip)
+    
+    logger.info(f"Streaming question from {client_ip}: {request.question[:100]}...")
+    
+    model_name = AVAILABLE_MODELS[DEFAULT_MODEL]["name"]
+    
+    deadline = time.monotonic() + REQUEST_TIMEOUT_SECONDS
+    
+    def event_stream():
+        start_time = time.time()
+        first_token_time = None
+        
+        try:
+            for token in stream_rag(request.question, model_name, deadline):
+                if first_token_time is None:
+                    first_token_time = time.time()
+                    STAGE_SECONDS.observe(first_token_time - start_time, "first_token")
+                yield sse_event("token", {"text": token})
+            
+            yield sse_event("done", {})
+            app_state["successful_requests"] += 1
+            
+        except ResponseReplaced as e:
+            yield sse_event("replace", {"answer": e.message})
+            yield sse_event("done", {})
+            app_state["successful_requests"] += 1
+            
+        except (BatcherOverloaded, SchedulerRejected):
+            app_state["failed_requests"] += 1
+            logger.error(f"Queue full, rejecting streamed question from {client_ip}")
+            yield sse_event("error", {"error": FRIENDLY_ERRORS["service_unavailable"]})
+            
+        except (SchedulerTimeout, TimeoutError):
+            app_state["failed_requests"] += 1
+            logger.error(f"Timeout streaming answer to {client_ip}")
+            yield sse_event("error", {"error": FRIENDLY_ERRORS["timeout"]})
+            
+        except Exception as e:
+            app_state["failed_requests"] += 1
+            logger.error(f"Streaming RAG pipeline error: {str(e)}")
+            logger.error(traceback.format_exc())
+            yield sse_event("error", {"error": FRIENDLY_ERRORS["processing_error"]})
+        
+        if first_token_time is not None:
+            STAGE_SECONDS.observe(time.time() - start_time, "total")
+            logger.info(
+                f"Streamed answer to {client_ip} | "
+                f"first token {(first_token_time - start_time) * 1000:.0f}ms | "
+                f"total {(time.time() - start_time) * 1000:.0f}ms"
+            )
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # Development server
 if __name__ == "__main__":
     import uvicorn
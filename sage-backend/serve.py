@@ -0,0 +1,140 @@
+"""
+SAGE University Chatbot - production launcher
+
+Runs N uvicorn workers that share one read-only retrieval index:
+- retrieval uses the numpy read index (SAGE_RETRIEVAL_BACKEND=numpy);
+  embeddings, chunk texts and BM25 postings are memory-mapped files, so
+  every worker maps the same page-cache pages instead of loading its
+  own Chroma client and copy of the vectors
+- the index is exported from Chroma once, here, before workers start
+- the index is re-exported when Chroma has changed since (index_version)
+- CPU threads for the encoder/reranker are split between workers, and
+  the per-model generation slots and queue depth with them (all workers
+  share one Ollama; set values are totals for all workers, divided here);
+  a model keeps at least one slot per worker, so with the default of
+  one, N workers may run N generations and Ollama queues whatever it
+  can't run in parallel (OLLAMA_NUM_PARALLEL)
+- rate limits live in one SQLite file, so a client gets the same budget
+  whichever worker answers
+
+Per worker stay: query encoder and reranker weights, answer cache and
+/internal/metrics counters.
+
+Run:
+    python sage-backend/serve.py --workers 4
+(python -m benchmarks.bench_workers measures memory per worker and throughput)
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DIR = os.path.dirname(BACKEND_DIR)
+sys.path.insert(0, BASE_DIR)
+
+# src.config reads the environment once, at import. The worker settings
+# are set before anything imports it (with --workers 1 uvicorn serves
+# main:app from this process), so their defaults are read here directly.
+GENERATION_CONCURRENCY_VARS = ("SAGE_LLAMA_CONCURRENCY", "SAGE_DEEPSEEK_CONCURRENCY")
+
+# Limits on the one shared Ollama: a set value is the total for all
+# workers and is replaced by each worker's share
+SHARED_LIMIT_VARS = ("SAGE_GENERATION_QUEUE_DEPTH",) + GENERATION_CONCURRENCY_VARS
+
+
+def worker_environment(workers: int) -> dict:
+    """Settings every worker inherits (see apply_worker_environment)."""
+    threads = str(max(1, (os.cpu_count() or 1) // workers))
+    queue_depth = int(os.environ.get("SAGE_GENERATION_QUEUE_DEPTH", 8))
+    env = {
+        "SAGE_RETRIEVAL_BACKEND": "numpy",
+        "OMP_NUM_THREADS": threads,
+        "MKL_NUM_THREADS": threads,
+        "TOKENIZERS_PARALLELISM": "false",
+        "SAGE_RATE_LIMIT_STORE": "sqlite" if workers > 1 else "memory",
+        # Total requests waiting for Ollama stays what one process allowed
+        "SAGE_GENERATION_QUEUE_DEPTH": str(max(1, math.ceil(queue_depth / workers))),
+    }
+    # Likewise the parallel generations per model, down to one per worker
+    for var in GENERATION_CONCURRENCY_VARS:
+        env[var] = str(max(1, int(os.environ.get(var, 1)) // workers))
+    return env
+
+
+def apply_worker_environment(workers: int) -> None:
+    """
+    Sets worker_environment() in this process, for uvicorn to pass on.
+    Explicitly set variables win, except SHARED_LIMIT_VARS: those are
+    totals across workers, always replaced by the per-worker share.
+    """
+    for key, value in worker_environment(workers).items():
+        if key in SHARED_LIMIT_VARS:
+            os.environ[key] = value
+        else:
+            os.environ.setdefault(key, value)
+
+
+def read_index_is_current(path: str) -> bool:
+    """True if the numpy index at `path` was exported from the current Chroma collection."""
+    from src.embeddings.index_version import read_index_version
+
+    try:
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except FileNotFoundError:
+        return False
+    return meta.get("index_version") == read_index_version()
+
+
+def ensure_read_index() -> None:
+    """Exports the numpy read index from Chroma if it is missing or stale."""
+    from src.retrieval.numpy_index import NUMPY_INDEX_PATH, export_from_chroma
+    from src.retrieval.retriever import COLLECTION_NAME, VECTOR_DB_PATH
+
+    if read_index_is_current(NUMPY_INDEX_PATH):
+        return
+    if not os.path.exists(VECTOR_DB_PATH):
+        print(f"⚠️  No vector DB at {VECTOR_DB_PATH} — workers will start without retrieval")
+        return
+
+    import chromadb
+
+    client = chromadb.PersistentClient(path=VECTOR_DB_PATH)
+    count = export_from_chroma(client.get_collection(COLLECTION_NAME))
+    print(f"✅ Exported {count} chunks → {NUMPY_INDEX_PATH}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the SAGE backend with N workers sharing one read index")
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("SAGE_WORKERS", 2)))
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    apply_worker_environment(args.workers)
+
+    if os.environ["SAGE_RETRIEVAL_BACKEND"] == "numpy":
+        ensure_read_index()
+
+    import uvicorn
+
+    print("=" * 60)
+    print(f"  SAGE University Chatbot Backend — {args.workers} workers")
+    print(f"  Starting on http://{args.host}:{args.port}")
+    print("=" * 60)
+
+    uvicorn.run(
+        "main:app",
+        app_dir=BACKEND_DIR,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        log_level="info"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,9 @@ from colorama import init, Fore, Style
 
 from src.pipeline.rag_graph import run_rag
 from src.config import AVAILABLE_MODELS, DEFAULT_MODEL
-from src.utils.logger import logger
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 # Initialize colorama
 init(autoreset=True)
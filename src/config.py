@@ -5,6 +5,8 @@ Central configuration for SAGE Chatbot models.
 Only approved, quantized models are listed here.
 """
 
+import os
+
 AVAILABLE_MODELS = {
     "llama": {
         "name": "llama3.1:8b",
@@ -24,3 +26,163 @@ ALLOWED_MODELS = [
 
 # Key from AVAILABLE_MODELS
 DEFAULT_MODEL = "llama"
+
+# ---------- Ollama ----------
+# "http" talks to the Ollama server API through a pooled keep-alive client,
+# "subprocess" spawns `ollama run` per question (kept as fallback).
+GENERATION_BACKEND = os.environ.get("SAGE_GENERATION_BACKEND", "http")
+
+OLLAMA_HOST = os.environ.get("OLLAMA_HOST", "http://localhost:11434")
+
+# How long Ollama keeps the model resident after the last request
+OLLAMA_KEEP_ALIVE = os.environ.get("OLLAMA_KEEP_ALIVE", "30m")
+
+# Max pooled HTTP connections per model
+OLLAMA_POOL_SIZE = 8
+
+# Models loaded into Ollama at backend startup (others load on first use)
+WARM_UP_MODELS = [AVAILABLE_MODELS[DEFAULT_MODEL]["name"]]
+
+# ---------- Generation Scheduling ----------
+# Parallel generations per model. An 8B model on CPU thrashes when
+# several generations share the cores, so requests queue instead.
+GENERATION_CONCURRENCY = {
+    "llama3.1:8b": int(os.environ.get("SAGE_LLAMA_CONCURRENCY", 1)),
+    "deepseek-r1:8b": int(os.environ.get("SAGE_DEEPSEEK_CONCURRENCY", 1))
+}
+
+# Requests allowed to wait for a slot per model; beyond this they get 503
+GENERATION_QUEUE_DEPTH = int(os.environ.get("SAGE_GENERATION_QUEUE_DEPTH", 8))
+
+# End-to-end budget of one /ask request (queueing included)
+REQUEST_TIMEOUT_SECONDS = 60
+
+# Don't start a generation with less than this left in the budget
+GENERATION_MIN_SECONDS = 5
+
+# ---------- Serving ----------
+# Worker processes started by sage-backend/serve.py. Each worker has its
+# own query encoder, reranker and generation queue; the read index is
+# memory-mapped, so its pages are shared by all of them.
+SERVE_WORKERS = int(os.environ.get("SAGE_WORKERS", 2))
+
+# ---------- Rate Limiting ----------
+# Token bucket per client IP: bursts of up to RATE_LIMIT_REQUESTS, refilled
+# at RATE_LIMIT_REQUESTS per RATE_LIMIT_WINDOW_SECONDS
+RATE_LIMIT_REQUESTS = int(os.environ.get("SAGE_RATE_LIMIT_REQUESTS", 30))
+RATE_LIMIT_WINDOW_SECONDS = 60
+
+# Clients tracked at most; the least recently seen are dropped beyond this
+RATE_LIMIT_MAX_CLIENTS = 10000
+
+# "memory" keeps buckets per process, "sqlite" shares them between the
+# workers of one host (serve.py picks it when running several)
+RATE_LIMIT_STORE = os.environ.get("SAGE_RATE_LIMIT_STORE", "memory")
+
+# ---------- Tracing ----------
+# "jsonl" appends finished spans to logs/traces.jsonl (SAGE_TRACE_PATH),
+# "otlp" posts them to a local OpenTelemetry collector; empty disables it
+TRACE_EXPORTER = os.environ.get("SAGE_TRACE_EXPORTER", "")
+
+# Share of requests traced; the others create no spans at all
+TRACE_SAMPLE_RATE = float(os.environ.get("SAGE_TRACE_SAMPLE_RATE", 1.0))
+
+# OTLP/HTTP base URL (the collector's default port)
+TRACE_OTLP_ENDPOINT = os.environ.get("OTEL_EXPORTER_OTLP_ENDPOINT", "http://localhost:4318")
+
+# ---------- Prompt Context ----------
+# Context tokens per model after merging overlapping chunks and dropping
+# near-duplicates (src.generation.context). Prefill of the prompt is
+# most of the time to first token on CPU; the system prompt and
+# question come on top of this.
+CONTEXT_TOKEN_BUDGET = {
+    "llama3.1:8b": int(os.environ.get("SAGE_LLAMA_CONTEXT_TOKENS", 1024)),
+    "deepseek-r1:8b": int(os.environ.get("SAGE_DEEPSEEK_CONTEXT_TOKENS", 768))
+}
+DEFAULT_CONTEXT_TOKEN_BUDGET = 1024
+
+# Word 3-gram Jaccard similarity at which a chunk repeats a better one
+CONTEXT_DEDUP_SIMILARITY = 0.8
+
+# Shortest shared text that counts as two chunks overlapping
+CONTEXT_MIN_OVERLAP_CHARS = 20
+
+
+# Must match the embedding function the Chroma collection was built with
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+
+# How section bodies are cut before embedding: "sentence" packs whole
+# sentences up to CHUNK_MAX_TOKENS MiniLM tokens, "chars" is the old
+# 500-character window with 100 overlap. Changing either re-embeds the corpus.
+CHUNKER = os.environ.get("SAGE_CHUNKER", "sentence")
+
+# MiniLM truncates at 256 word pieces; the margin covers approximate
+# counts when its tokenizer isn't cached (python -m benchmarks.bench_chunker)
+CHUNK_MAX_TOKENS = int(os.environ.get("SAGE_CHUNK_MAX_TOKENS", 192))
+
+# Relevance gate on cosine similarity (converted from the collection's
+# distance metric): hits below RETRIEVAL_MIN_SCORE, or more than
+# RETRIEVAL_SCORE_GAP below the best hit of the question, are dropped.
+# A question with no hit left is refused without calling the LLM.
+RETRIEVAL_MIN_SCORE = float(os.environ.get("SAGE_RETRIEVAL_MIN_SCORE", 0.2))
+RETRIEVAL_SCORE_GAP = float(os.environ.get("SAGE_RETRIEVAL_SCORE_GAP", 0.25))
+
+# Query vectors kept in the Retriever's LRU cache
+QUERY_CACHE_SIZE = 2048
+
+# Coalesce concurrent retrievals into one embedding pass + one vector query
+RETRIEVAL_BATCHING = os.environ.get("SAGE_RETRIEVAL_BATCHING", "1") != "0"
+RETRIEVAL_BATCH_MAX_SIZE = int(os.environ.get("SAGE_RETRIEVAL_BATCH_MAX_SIZE", 16))
+RETRIEVAL_BATCH_WAIT_MS = float(os.environ.get("SAGE_RETRIEVAL_BATCH_WAIT_MS", 5))
+RETRIEVAL_QUEUE_DEPTH = int(os.environ.get("SAGE_RETRIEVAL_QUEUE_DEPTH", 256))
+
+# "chroma" queries the persistent Chroma collection; "numpy" serves reads
+# from an exported, memory-mapped matrix (python -m src.retrieval.numpy_index)
+RETRIEVAL_BACKEND = os.environ.get("SAGE_RETRIEVAL_BACKEND", "chroma")
+
+# Fuse BM25 over the exported read index with the vector results
+# (reciprocal rank fusion); exact codes, names and amounts rank higher
+RETRIEVAL_HYBRID = os.environ.get("SAGE_RETRIEVAL_HYBRID", "1") != "0"
+HYBRID_CANDIDATES = 20
+RRF_K = 60
+
+# Restrict the search to the sources a question names ("M.Tech CSE ...");
+# see src.retrieval.filters
+RETRIEVAL_AUTO_FILTER = os.environ.get("SAGE_RETRIEVAL_AUTO_FILTER", "1") != "0"
+
+# ---------- Reranking ----------
+# Optional rerank node (SAGE_RERANK=1): retrieve RERANK_CANDIDATES chunks,
+# score them against the question with a CPU cross-encoder (one batched
+# call) and send the best RERANK_TOP_N within RERANK_TOKEN_BUDGET to the
+# LLM. Off by default: it loads the model at startup and over-fetches.
+# Without the model the node keeps the retrieval order.
+RERANK_ENABLED = os.environ.get("SAGE_RERANK", "0") != "0"
+RERANK_MODEL = os.environ.get("SAGE_RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+RERANK_CANDIDATES = int(os.environ.get("SAGE_RERANK_CANDIDATES", 30))
+RERANK_TOP_N = int(os.environ.get("SAGE_RERANK_TOP_N", 5))
+RERANK_TOKEN_BUDGET = int(os.environ.get("SAGE_RERANK_TOKEN_BUDGET", 1024))
+
+# Expected cost of one rerank before any has been measured; the node is
+# skipped when the request budget can't cover it plus GENERATION_MIN_SECONDS
+RERANK_EXPECTED_SECONDS = 0.5
+
+# ---------- Answer Cache ----------
+ANSWER_CACHE_ENABLED = os.environ.get("SAGE_ANSWER_CACHE", "1") != "0"
+ANSWER_CACHE_MAX_ENTRIES = 1024
+ANSWER_CACHE_MAX_BYTES = 16 * 1024 * 1024
+ANSWER_CACHE_TTL_SECONDS = 6 * 60 * 60
+
+# Cosine similarity of MiniLM query embeddings that counts as the same
+# question. Kept high: "CSE fees" and "ECE fees" are already ~0.9 apart.
+ANSWER_CACHE_SIMILARITY = 0.95
+
+# ---------- Data Extraction ----------
+# Processes used by run_extraction (PyMuPDF parsing is CPU-bound per file)
+EXTRACTION_WORKERS = int(os.environ.get("SAGE_EXTRACTION_WORKERS", os.cpu_count() or 1))
+
+# PDFs longer than this are split into page ranges across workers
+EXTRACTION_PAGES_PER_TASK = int(os.environ.get("SAGE_EXTRACTION_PAGES_PER_TASK", 40))
+
+# Chunks embedded and written per batch by the streaming ingest
+# (python -m src.embeddings.ingest); bounds its memory use
+INGEST_BATCH_SIZE = int(os.environ.get("SAGE_INGEST_BATCH_SIZE", 256))
@@ -39,6 +39,12 @@ ACADEMIC_FILES = [
 ]
 
 
+def academic_header(program: str, department: str, filename: str) -> str:
+    return f"""===== PROGRAM: {program} =====
+===== DEPARTMENT: {department} =====
+===== SOURCE FILE: {filename.replace('.pdf','')} ====="""
+
+
 def extract_academics(_: str = "") -> str:
     """
     Extract and merge all academic curriculum PDFs into one structured output.
@@ -58,9 +64,7 @@ def extract_academics(_: str = "") -> str:
             continue
 
         section = f"""
-===== PROGRAM: {program} =====
-===== DEPARTMENT: {department} =====
-===== SOURCE FILE: {filename.replace('.pdf','')} =====
+{academic_header(program, department, filename)}
 {cleaned}
 """
         sections.append(section.strip())
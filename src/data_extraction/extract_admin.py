@@ -15,6 +15,10 @@ ADMIN_REGULATION_FILES = [
     ("B.Tech", "NEP Regulations 2024-25", "PTU NEP Regulations 2024_25_ACM approved.pdf"),
 ]
 
+def regulation_header(program: str, regulation_type: str, filename: str) -> str:
+    return f"--- {program} | {regulation_type} | {filename} ---"
+
+
 def extract_regulations(_: str = "") -> str:
     """
     Extract all administrative regulation PDFs and return a single concatenated cleaned text string.
@@ -30,7 +34,7 @@ def extract_regulations(_: str = "") -> str:
         cleaned = clean_text(raw_text)
 
         # Optionally, add a header for each file
-        header = f"--- {program} | {regulation_type} | {filename} ---"
+        header = regulation_header(program, regulation_type, filename)
         all_cleaned_texts.append(header)
         all_cleaned_texts.append(cleaned)
 
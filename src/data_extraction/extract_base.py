@@ -1,30 +1,47 @@
+from typing import Iterator, Optional
 import fitz  # PyMuPDF
 from ..utils.clean_text import clean_text_basic
 
 
-def extract_from_pdf_fitz(pdf_path: str) -> str:
+def iter_pdf_pages(
+    pdf_path: str,
+    start: int = 0,
+    stop: Optional[int] = None
+) -> Iterator[str]:
+    """
+    Yields the basic-cleaned text of each non-empty page, one page in
+    memory at a time.
+    """
+    with fitz.open(pdf_path) as doc:
+        stop = doc.page_count if stop is None else min(stop, doc.page_count)
+        for page_number in range(start, stop):
+            text = clean_text_basic(doc[page_number].get_text())
+
+            if text.strip():  # skip empty pages
+                yield text
+
+
+def extract_from_pdf_fitz(
+    pdf_path: str,
+    start: int = 0,
+    stop: Optional[int] = None
+) -> str:
     """
     Base PDF extractor.
     Responsibilities:
     - Open PDF using PyMuPDF
-    - Loop through pages
+    - Loop through pages (all, or pages [start, stop))
     - Extract text
     - Apply basic cleaning
     - Skip empty pages
     Returns combined page text.
     """
-    pages = []
-
-    doc = fitz.open(pdf_path)
-    for page in doc:
-        text = page.get_text()
-        text = clean_text_basic(text)
+    return "\n".join(iter_pdf_pages(pdf_path, start, stop))
 
-        if text.strip():  # skip empty pages
-            pages.append(text)
 
-    doc.close()
-    return "\n".join(pages)
+def pdf_page_count(pdf_path: str) -> int:
+    with fitz.open(pdf_path) as doc:
+        return doc.page_count
 
 
 # 🔹 LOCAL TEST (REMOVE BEFORE COMMIT)
@@ -0,0 +1,102 @@
+# src/data_extraction/extraction_cache.py
+
+"""
+Per-PDF cache of cleaned text for run_extraction.
+
+An entry is keyed by the PDF's content hash, the PyMuPDF version and
+CLEANER_VERSION, so a changed file, a PyMuPDF upgrade or a cleaner change
+each force re-extraction of exactly what they affect.
+
+Hashing 50+ MB of PDFs on every run would dominate a no-op rebuild, so
+the manifest also remembers each file's (size, mtime) and reuses its hash
+while those are unchanged.
+
+Layout of CACHE_DIR:
+    manifest.json   pdf path → {size, mtime_ns, sha256}
+    <key>.txt       cleaned text of one PDF
+"""
+
+from typing import Dict, Iterable, Optional
+import hashlib
+import json
+import os
+
+import fitz  # PyMuPDF
+
+from src.utils.clean_text import CLEANER_VERSION
+
+CACHE_DIR = "data/processed/extraction_cache"
+
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class ExtractionCache:
+    def __init__(self, cache_dir: str = CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.manifest_path = os.path.join(cache_dir, "manifest.json")
+        self.manifest: Dict[str, Dict] = {}
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                self.manifest = json.load(f)
+
+    def _file_hash(self, pdf_path: str) -> str:
+        st = os.stat(pdf_path)
+        known = self.manifest.get(pdf_path)
+        if known and known["size"] == st.st_size and known["mtime_ns"] == st.st_mtime_ns:
+            return known["sha256"]
+
+        digest = file_sha256(pdf_path)
+        self.manifest[pdf_path] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": digest}
+        return digest
+
+    def key(self, pdf_path: str) -> str:
+        parts = f"{self._file_hash(pdf_path)}|{fitz.VersionBind}|{CLEANER_VERSION}"
+        return hashlib.sha256(parts.encode("utf-8")).hexdigest()[:32]
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.txt")
+
+    def get(self, pdf_path: str) -> Optional[str]:
+        path = self._entry_path(self.key(pdf_path))
+        if not os.path.exists(path):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    def put(self, pdf_path: str, cleaned: str) -> None:
+        path = self._entry_path(self.key(pdf_path))
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(cleaned)
+        os.replace(tmp_path, path)
+
+    def save(self, keep: Iterable[str]) -> None:
+        """
+        Writes the manifest for the PDFs in `keep` and deletes entries
+        no longer referenced (old versions of changed files).
+        """
+        keep = list(keep)
+        self.manifest = {p: self.manifest[p] for p in keep if p in self.manifest}
+        live = {f"{self.key(p)}.txt" for p in keep}
+
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".txt") and name not in live:
+                os.remove(os.path.join(self.cache_dir, name))
+
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
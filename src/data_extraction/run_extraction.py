@@ -1,62 +1,206 @@
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import List, Tuple
 
-# Barani
-from src.data_extraction.extract_admission import extract_admission
-from src.data_extraction.extract_facilities import extract_facilities
-from src.data_extraction.extract_academics import extract_academics
-
-# Darineesh
-from src.data_extraction.extract_fees import extract_fees
-from src.data_extraction.extract_tech_portals import extract_tech
-from src.data_extraction.extract_research import extract_research
+from src.config import EXTRACTION_PAGES_PER_TASK, EXTRACTION_WORKERS
+from src.data_extraction.extract_base import extract_from_pdf_fitz, pdf_page_count
+from src.data_extraction.extraction_cache import ExtractionCache
+from src.utils.clean_text import clean_text
 
-# Mani
-from src.data_extraction.extract_placement import extract_placement
-from src.data_extraction.extract_faculty import extract_faculty
+# Barani
+from src.data_extraction.extract_academics import ACADEMIC_FILES, ACADEMICS_DIR, academic_header
 
 # Vetri
-from src.data_extraction.extract_student_life import extract_student_life
-from src.data_extraction.extract_admin import extract_regulations
+from src.data_extraction.extract_admin import (
+    ADMIN_REGULATION_FILES,
+    ADMIN_REGULATIONS_DIR,
+    regulation_header,
+)
 
 OUTPUT_PATH = "data/processed/cleaned_text.txt"
 
 
-def run_all_extractions() -> None:
+@dataclass(frozen=True)
+class ExtractionJob:
+    """One PDF → one section of cleaned_text.txt."""
+    name: str
+    pdf_path: str
+    header: str
+
+
+def source_job(name: str) -> ExtractionJob:
+    return ExtractionJob(name, f"data/raw/{name}.pdf", f"===== SOURCE: {name} =====")
+
+
+def build_jobs() -> List[ExtractionJob]:
     """
-    Orchestrates all extractors and writes a single merged cleaned_text.txt
+    Every PDF that goes into cleaned_text.txt, in output order.
     """
-    outputs = []
+    jobs = []
 
     # --- Barani ---
-    outputs.append(extract_admission("data/raw/admission_enrollment.pdf"))
-    outputs.append(extract_facilities("data/raw/campus_facilities.pdf"))
-    outputs.append(extract_academics("data/raw/academics"))
+    jobs.append(source_job("admission_enrollment"))
+    jobs.append(source_job("campus_facilities"))
+    for program, department, filename in ACADEMIC_FILES:
+        jobs.append(ExtractionJob(
+            f"academics/{filename}",
+            os.path.join(ACADEMICS_DIR, filename),
+            academic_header(program, department, filename)
+        ))
 
     # --- Darineesh ---
-    outputs.append(extract_fees("data/raw/fees_scholarships.pdf"))
-    outputs.append(extract_tech("data/raw/tech_portals.pdf"))
-    outputs.append(extract_research("data/raw/research_innovation.pdf"))
+    jobs.append(source_job("fees_scholarships"))
+    jobs.append(source_job("tech_portals"))
+    jobs.append(source_job("research_innovation"))
 
     # --- Mani ---
-    outputs.append(extract_placement("data/raw/placement_internship.pdf"))
-    outputs.append(extract_faculty("data/raw/faculty_staff.pdf"))
+    jobs.append(source_job("placement_internship"))
+    jobs.append(source_job("faculty_staff"))
 
     # --- Vetri ---
-    outputs.append(extract_student_life("data/raw/student_life.pdf"))
-    outputs.append(extract_regulations("data/raw/administration_regulations"))
+    jobs.append(source_job("student_life"))
+    for program, regulation_type, filename in ADMIN_REGULATION_FILES:
+        jobs.append(ExtractionJob(
+            f"regulations/{filename}",
+            os.path.join(ADMIN_REGULATIONS_DIR, filename),
+            regulation_header(program, regulation_type, filename)
+        ))
+
+    return jobs
+
+
+# ---------- Workers ----------
+def _extract_range(task: Tuple[str, int, int]) -> Tuple[str, float]:
+    pdf_path, start, stop = task
+    t0 = time.perf_counter()
+    text = extract_from_pdf_fitz(pdf_path, start, stop)
+    return text, time.perf_counter() - t0
+
+
+def _clean(raw_text: str) -> Tuple[str, float]:
+    t0 = time.perf_counter()
+    cleaned = clean_text(raw_text)
+    return cleaned, time.perf_counter() - t0
+
+
+# ---------- Orchestration ----------
+def _map_ordered(executor, fn, args: list, weights: List[int]) -> list:
+    """
+    Runs fn over args, heaviest first, and returns results in input order
+    so the output file is identical whatever the worker count.
+    """
+    if executor is None:
+        return [fn(a) for a in args]
+
+    order = sorted(range(len(args)), key=lambda k: -weights[k])
+    futures = {k: executor.submit(fn, args[k]) for k in order}
+    return [futures[k].result() for k in range(len(args))]
+
+
+def extract_jobs(
+    jobs: List[ExtractionJob],
+    workers: int = EXTRACTION_WORKERS,
+    pages_per_task: int = EXTRACTION_PAGES_PER_TASK
+) -> List[str]:
+    """
+    Extracts and cleans every job's PDF, returning cleaned texts in job order.
+
+    - each PDF is split into page ranges of `pages_per_task` pages
+    - ranges run across a process pool, longest PDFs first
+    - page texts are joined per file, then each file is cleaned in the pool
+    """
+    page_counts = [pdf_page_count(job.pdf_path) for job in jobs]
+
+    tasks = []  # (job index, (pdf_path, start, stop))
+    for i, (job, pages) in enumerate(zip(jobs, page_counts)):
+        for start in range(0, max(pages, 1), pages_per_task):
+            tasks.append((i, (job.pdf_path, start, start + pages_per_task)))
+
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        range_results = _map_ordered(
+            executor, _extract_range, [t for _, t in tasks], [page_counts[i] for i, _ in tasks]
+        )
+
+        raw_texts = [[] for _ in jobs]
+        seconds = [0.0 for _ in jobs]
+        for (i, _), (text, elapsed) in zip(tasks, range_results):
+            if text:
+                raw_texts[i].append(text)
+            seconds[i] += elapsed
+
+        clean_results = _map_ordered(
+            executor, _clean, ["\n".join(parts) for parts in raw_texts], page_counts
+        )
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    for job, pages, (_, clean_seconds), extract_seconds in zip(jobs, page_counts, clean_results, seconds):
+        print(f"  {extract_seconds + clean_seconds:6.2f}s  {pages:4d} pages  {job.name}")
+
+    return [cleaned for cleaned, _ in clean_results]
+
+
+def run_all_extractions(
+    workers: int = EXTRACTION_WORKERS,
+    pages_per_task: int = EXTRACTION_PAGES_PER_TASK,
+    use_cache: bool = True
+) -> None:
+    """
+    Orchestrates all extractors and writes a single merged cleaned_text.txt
+
+    Unchanged PDFs are served from the extraction cache; only new or
+    modified ones are parsed.
+    """
+    start = time.perf_counter()
+
+    jobs = []
+    for job in build_jobs():
+        if os.path.exists(job.pdf_path):
+            jobs.append(job)
+        else:
+            print(f"⚠️ Skipping missing PDF: {job.pdf_path}")
+
+    cache = ExtractionCache() if use_cache else None
+    texts = [cache.get(job.pdf_path) if cache else None for job in jobs]
+    stale = [i for i, text in enumerate(texts) if text is None]
+
+    print(f"Extracting {len(stale)} of {len(jobs)} PDFs with {workers} worker(s)...")
+    if stale:
+        fresh = extract_jobs([jobs[i] for i in stale], workers, pages_per_task)
+        for i, text in zip(stale, fresh):
+            texts[i] = text
+            if cache:
+                cache.put(jobs[i].pdf_path, text)
+
+    if cache:
+        cache.save(job.pdf_path for job in jobs)
 
     # Ensure output directory exists
     os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
 
     # Write once
     with open(OUTPUT_PATH, "w", encoding="utf-8") as f:
-        for block in outputs:
-            if block and block.strip():
-                f.write(block)
+        for job, cleaned in zip(jobs, texts):
+            if cleaned.strip():
+                f.write(f"{job.header}\n{cleaned}")
                 f.write("\n\n")
 
-    print("✅ Extraction complete → data/processed/cleaned_text.txt")
+    print(
+        f"✅ Extraction complete in {time.perf_counter() - start:.2f}s "
+        f"({len(jobs) - len(stale)} cached) → {OUTPUT_PATH}"
+    )
 
 
 if __name__ == "__main__":
-    run_all_extractions()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Extract and clean all PDFs into cleaned_text.txt")
+    parser.add_argument("--workers", type=int, default=EXTRACTION_WORKERS)
+    parser.add_argument("--no-cache", action="store_true", help="re-extract every PDF")
+    args = parser.parse_args()
+
+    run_all_extractions(workers=args.workers, use_cache=not args.no_cache)
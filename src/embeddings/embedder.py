@@ -1,8 +1,14 @@
 # src/embeddings/embedder.py
 
-from sentence_transformers import SentenceTransformer
-from typing import List
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 import os
+import re
+
+from src.config import CHUNK_MAX_TOKENS, CHUNKER, EMBEDDING_MODEL
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 
 # ---------- Path Resolution ----------
@@ -13,6 +19,36 @@ CLEANED_TEXT_PATH = os.path.join(
 
 
 # ---------- Chunking ----------
+def iter_chunks(
+    pieces: Iterable[str],
+    chunk_size: int = 500,
+    overlap: int = 100
+) -> Iterator[str]:
+    """
+    Overlapping character-based chunks over a stream of text pieces.
+    Yields the same chunks as chunk_text("".join(pieces)) while holding
+    at most one chunk plus one piece in memory.
+    """
+    step = chunk_size - overlap
+    buffer = ""
+    pos = 0
+
+    for piece in pieces:
+        buffer = buffer[pos:] + piece
+        pos = 0
+        while len(buffer) - pos >= chunk_size:
+            chunk = buffer[pos:pos + chunk_size].strip()
+            if chunk:
+                yield chunk
+            pos += step
+
+    while pos < len(buffer):
+        chunk = buffer[pos:pos + chunk_size].strip()
+        if chunk:
+            yield chunk
+        pos += step
+
+
 def chunk_text(
     text: str,
     chunk_size: int = 500,
@@ -21,18 +57,231 @@ def chunk_text(
     """
     Splits text into overlapping character-based chunks.
     """
-    chunks = []
-    start = 0
-    text_length = len(text)
+    return list(iter_chunks([text], chunk_size, overlap))
 
-    while start < text_length:
-        end = start + chunk_size
-        chunk = text[start:end].strip()
-        if chunk:
-            chunks.append(chunk)
-        start = end - overlap
 
-    return chunks
+# ---------- Token Counting ----------
+WORD_OR_PUNCT = re.compile(r"\w+|[^\w\s]")
+
+
+def _approximate_word_tokens(word: str) -> int:
+    if word.isalpha() or not word.isalnum():
+        return 1 + len(word) // 8
+    if word.isdigit():
+        return 1 + len(word) // 4
+    return 1 + len(word) // 2  # course codes: CSUC106 → cs ##uc ##10 ##6
+
+
+def approximate_tokens(text: str) -> int:
+    """
+    WordPiece-like estimate: one token per punctuation mark or common
+    word, more for long words, numbers and course codes. Meant to err
+    high so chunks stay under the model limit.
+    """
+    return sum(_approximate_word_tokens(w) for w in WORD_OR_PUNCT.findall(text))
+
+
+@lru_cache(maxsize=1)
+@lru_cache(maxsize=None)
+def token_counter() -> Callable[[str], int]:
+    """
+    Counts tokens with the embedding model's own tokenizer (special
+    tokens excluded). Falls back to approximate_tokens() when the
+    tokenizer can't be loaded, e.g. offline (HF_HUB_OFFLINE=1) without
+    a model cache. Loaded once per process; the prompt builder calls
+    this on every request.
+    """
+    try:
+        from huggingface_hub import hf_hub_download
+        from tokenizers import Tokenizer
+        path = hf_hub_download(f"sentence-transformers/{EMBEDDING_MODEL}", "tokenizer.json")
+        tokenizer = Tokenizer.from_file(path)
+        tokenizer.no_truncation()
+    except Exception as e:
+        logger.warning(f"{EMBEDDING_MODEL} tokenizer unavailable ({e}); approximating token counts")
+        return approximate_tokens
+
+    return lambda text: len(tokenizer.encode(text, add_special_tokens=False).ids)
+
+
+# ---------- Sentence Chunking ----------
+# Cleaned text is one whitespace-collapsed line per source, so sentence
+# ends are only recognisable from punctuation followed by a capital/digit.
+# Not after initials, list numbers or the abbreviations of the corpus
+# ("Dr. G. Ramakrishna", "2. Electricity", "Rs. 30,000").
+SENTENCE_END = re.compile(
+    r"(?<=[.!?])(?<!\b[A-Za-z]\.)(?<!\b\d\.)(?<!\b\d\d\.)"
+    r"(?<!\bRs\.)(?<!\bDr\.)(?<!\bMr\.)(?<!\bMs\.)(?<!\bNo\.)(?<!\bSt\.)(?<!\bSl\.)"
+    r"(?<!\bMrs\.)(?<!\bProf\.)(?<!\bviz\.)"
+    r"\s+(?=[A-Z0-9\"(])"
+)
+
+
+def _split_long(sentence: str, max_tokens: int, count_tokens: Callable[[str], int]) -> Iterator[Tuple[str, int]]:
+    """Cuts a sentence over the budget at word boundaries."""
+    words, total = [], 0
+    for word in sentence.split():
+        n = count_tokens(word)
+        if words and total + n > max_tokens:
+            yield " ".join(words), total
+            words, total = [], 0
+        words.append(word)
+        total += n
+    if words:
+        yield " ".join(words), total
+
+
+def _pack_sentences(
+    sentences: Iterable[str],
+    max_tokens: int,
+    count_tokens: Callable[[str], int]
+) -> Iterator[str]:
+    """Greedily packs whole sentences into chunks of at most max_tokens."""
+    chunk: List[str] = []
+    total = 0
+
+    for sentence in sentences:
+        n = count_tokens(sentence)
+        parts = _split_long(sentence, max_tokens, count_tokens) if n > max_tokens else [(sentence, n)]
+        for part, n in parts:
+            if chunk and total + n > max_tokens:
+                yield " ".join(chunk)
+                chunk, total = [], 0
+            chunk.append(part)
+            total += n
+
+    if chunk:
+        yield " ".join(chunk)
+
+
+def _iter_sentences(pieces: Iterable[str]) -> Iterator[str]:
+    """
+    Sentences over a stream of text pieces. The text after the last
+    sentence end is held back until the next piece (or the end).
+    """
+    buffer = ""
+    for piece in pieces:
+        buffer += piece
+        start = 0
+        for match in SENTENCE_END.finditer(buffer):
+            sentence = buffer[start:match.start()].strip()
+            if sentence:
+                yield sentence
+            start = match.end()
+        buffer = buffer[start:]
+
+    if buffer.strip():
+        yield buffer.strip()
+
+
+def iter_sentence_chunks(
+    pieces: Iterable[str],
+    max_tokens: int = CHUNK_MAX_TOKENS,
+    count_tokens: Optional[Callable[[str], int]] = None
+) -> Iterator[str]:
+    """
+    Packs whole sentences into chunks of at most `max_tokens` tokens
+    (no overlap). Sentences longer than the budget, e.g. curriculum
+    tables, are cut at word boundaries.
+    """
+    # Long sentences are counted word by word; the vocabulary is small
+    count_tokens = lru_cache(maxsize=1 << 16)(count_tokens or token_counter())
+    return _pack_sentences(_iter_sentences(pieces), max_tokens, count_tokens)
+
+
+def iter_body_chunks(pieces: Iterable[str], chunker: str = CHUNKER) -> Iterator[str]:
+    """
+    Chunks of one section body with the configured chunker:
+    "sentence" (token-budgeted sentences) or "chars" (500/100 windows).
+    """
+    if chunker == "sentence":
+        return iter_sentence_chunks(pieces)
+    if chunker == "chars":
+        return iter_chunks(pieces)
+    raise ValueError(f"Unknown chunker: {chunker}")
+
+
+# ---------- Sections ----------
+# Headers written by the extractors (src/data_extraction)
+SOURCE_HEADER = re.compile(r"^===== SOURCE: (.+?) =====$")
+FIELD_HEADER = re.compile(r"^===== (PROGRAM|DEPARTMENT|SOURCE FILE): (.+?) =====$")
+REGULATION_HEADER = re.compile(r"^--- (.+?) \| (.+?) \| (.+?) ---$")
+
+
+def split_sections(text: str) -> List[Tuple[Dict[str, str], str]]:
+    """
+    Splits cleaned_text.txt at the extractor headers.
+    Returns (metadata, body) per section; metadata always has "source".
+    """
+    sections = []
+    meta: Dict[str, str] = {"source": "unknown"}
+    body: List[str] = []
+    in_header = False
+
+    def flush():
+        content = "\n".join(body).strip()
+        if content:
+            sections.append((meta, content))
+
+    for line in text.splitlines():
+        stripped = line.strip()
+
+        match = SOURCE_HEADER.match(stripped)
+        if match:
+            flush()
+            meta, body, in_header = {"source": match.group(1)}, [], False
+            continue
+
+        match = FIELD_HEADER.match(stripped)
+        if match:
+            if not in_header:
+                flush()
+                meta, body, in_header = {}, [], True
+            key, value = match.groups()
+            if key == "SOURCE FILE":
+                meta["source"] = value
+            else:
+                meta[key.lower()] = value
+            continue
+
+        match = REGULATION_HEADER.match(stripped)
+        if match:
+            flush()
+            program, regulation, filename = match.groups()
+            meta = {"source": os.path.splitext(filename)[0], "program": program, "regulation": regulation}
+            body, in_header = [], False
+            continue
+
+        if in_header:
+            meta.setdefault("source", "unknown")
+            in_header = False
+        body.append(line)
+
+    flush()
+    return sections
+
+
+def header_metadata(header: str) -> Dict[str, str]:
+    """Metadata split_sections() would attach to text under `header`."""
+    sections = split_sections(f"{header}\n.")
+    return sections[0][0] if sections else {"source": "unknown"}
+
+
+def chunk_sections(
+    text: str,
+    chunker: str = CHUNKER
+) -> Tuple[List[str], List[Dict[str, str]]]:
+    """
+    Chunks each source section on its own, so no chunk straddles two
+    documents and editing one PDF only changes the chunks of that source.
+    Every chunk carries its section's metadata.
+    """
+    chunks, metadatas = [], []
+    for meta, body in split_sections(text):
+        for chunk in iter_body_chunks([body], chunker):
+            chunks.append(chunk)
+            metadatas.append(meta)
+    return chunks, metadatas
 
 
 # ---------- Load Text ----------
@@ -53,6 +302,7 @@ class MiniLMEmbedder:
     Wrapper around MiniLM sentence transformer.
     """
     def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
+        from sentence_transformers import SentenceTransformer
         self.model = SentenceTransformer(model_name)
 
     def embed(self, texts: List[str]):
@@ -72,7 +322,7 @@ if __name__ == "__main__":
     text = load_cleaned_text(CLEANED_TEXT_PATH)
 
     print("Chunking text...")
-    chunks = chunk_text(text)
+    chunks, _ = chunk_sections(text)
 
     print(f"Total chunks created: {len(chunks)}")
 
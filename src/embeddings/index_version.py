@@ -0,0 +1,38 @@
+# src/embeddings/index_version.py
+
+"""
+Version stamp of the vector index.
+
+The vector store rewrites this small file whenever it changes the
+collection; anything derived from retrieval results (e.g. the answer
+cache) compares stamps and drops stale state. Kept free of chromadb
+imports so readers stay cheap.
+"""
+
+import os
+import time
+import uuid
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+INDEX_VERSION_PATH = os.path.join(BASE_DIR, "data", "vector_db", "index_version")
+
+
+def bump_index_version(path: str = INDEX_VERSION_PATH) -> str:
+    version = f"{time.time():.6f}-{uuid.uuid4().hex[:8]}"
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(tmp_path, path)
+
+    return version
+
+
+def read_index_version(path: str = INDEX_VERSION_PATH) -> str:
+    """Returns the current stamp, or "" if the index was never stamped."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return ""
@@ -0,0 +1,90 @@
+# src/embeddings/ingest.py
+
+"""
+Streaming ingest: PDFs → pages → clean → chunk → batched embed → store.
+
+The batch path (run_extraction → cleaned_text.txt → vector_store) holds
+whole files and the whole corpus as strings several times over. Here
+every stage is a generator, so at any moment only one page, one chunk
+buffer and one embedding batch are in memory, whatever the corpus size.
+
+Chunks and chunk IDs are identical to the batch path, so both can sync
+the same collection without re-embedding anything.
+"""
+
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import os
+import time
+
+from src.config import CHUNKER, INGEST_BATCH_SIZE
+from src.data_extraction.extract_base import iter_pdf_pages
+from src.data_extraction.run_extraction import ExtractionJob, build_jobs
+from src.embeddings.embedder import header_metadata, iter_body_chunks
+from src.utils.clean_text import iter_clean_text
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def iter_job_chunks(
+    job: ExtractionJob,
+    chunker: str = CHUNKER
+) -> Iterator[Tuple[str, Dict[str, str]]]:
+    meta = header_metadata(job.header)
+    pages = iter_pdf_pages(job.pdf_path)
+    for chunk in iter_body_chunks(iter_clean_text(pages), chunker):
+        yield chunk, meta
+
+
+def iter_corpus_chunks(
+    jobs: Iterable[ExtractionJob],
+    chunker: str = CHUNKER
+) -> Iterator[Tuple[str, Dict[str, str]]]:
+    for job in jobs:
+        start = time.perf_counter()
+        count = 0
+        for item in iter_job_chunks(job, chunker):
+            count += 1
+            yield item
+        logger.info(f"{job.name}: {count} chunks in {time.perf_counter() - start:.2f}s")
+
+
+def available_jobs(jobs: Optional[List[ExtractionJob]] = None) -> List[ExtractionJob]:
+    available = []
+    for job in jobs if jobs is not None else build_jobs():
+        if os.path.exists(job.pdf_path):
+            available.append(job)
+        else:
+            logger.warning(f"Skipping missing PDF: {job.pdf_path}")
+    return available
+
+
+def ingest(
+    store,
+    jobs: Optional[List[ExtractionJob]] = None,
+    batch_size: int = INGEST_BATCH_SIZE
+) -> Dict[str, int]:
+    """
+    Streams every PDF into `store` (a ChromaVectorStore) and returns
+    its added / removed / unchanged counts.
+    """
+    return store.sync_stream(iter_corpus_chunks(available_jobs(jobs)), batch_size)
+
+
+# ---------- Run ----------
+if __name__ == "__main__":
+    from src.embeddings.vector_store import ChromaVectorStore
+    from src.retrieval.numpy_index import NUMPY_INDEX_PATH, export_from_chroma
+
+    start = time.perf_counter()
+    store = ChromaVectorStore()
+    counts = ingest(store)
+
+    print(
+        f"✅ {store.count()} chunks stored in {time.perf_counter() - start:.1f}s | "
+        f"added={counts['added']} removed={counts['removed']} unchanged={counts['unchanged']}"
+    )
+
+    if counts["added"] or counts["removed"] or not os.path.exists(NUMPY_INDEX_PATH):
+        print("Exporting numpy read index...")
+        export_from_chroma(store.collection)
@@ -1,21 +1,38 @@
 # src/embeddings/vector_store.py
 
+import hashlib
+import json
 import os
 import chromadb
 from chromadb.utils import embedding_functions
-from typing import List
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 
-from src.embeddings.embedder import load_cleaned_text, chunk_text, MiniLMEmbedder
+from src.embeddings.embedder import load_cleaned_text, chunk_sections
+from src.embeddings.index_version import bump_index_version
+from src.retrieval.numpy_index import NUMPY_INDEX_PATH, export_from_chroma
 
 # ---------- Paths ----------
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
 VECTOR_DB_PATH = os.path.join(BASE_DIR, "data", "vector_db")
 CLEANED_TEXT_PATH = os.path.join(BASE_DIR, "data", "processed", "cleaned_text.txt")
 
-os.makedirs(VECTOR_DB_PATH, exist_ok=True)
+
+# ---------- Chunk IDs ----------
+def chunk_id(text: str, metadata: Optional[Dict[str, str]] = None) -> str:
+    """
+    Content-addressed chunk ID: same text from the same source always
+    gets the same ID, whatever its position in the corpus.
+    """
+    h = hashlib.sha256()
+    h.update(json.dumps(metadata or {}, sort_keys=True).encode("utf-8"))
+    h.update(b"\0")
+    h.update(text.encode("utf-8"))
+    return h.hexdigest()[:32]
+
 
 class ChromaVectorStore:
     def __init__(self, collection_name: str = "sage_docs"):
+        os.makedirs(VECTOR_DB_PATH, exist_ok=True)
         self.client = chromadb.PersistentClient(path=VECTOR_DB_PATH)
 
         self.collection = self.client.get_or_create_collection(
@@ -25,17 +42,91 @@ class ChromaVectorStore:
             )
         )
 
+    def stored_ids(self, page_size: int = 10000) -> Set[str]:
+        ids: Set[str] = set()
+        offset = 0
+        while True:
+            page = self.collection.get(include=[], limit=page_size, offset=offset)
+            if not page["ids"]:
+                return ids
+            ids.update(page["ids"])
+            offset += len(page["ids"])
+
+    def sync_documents(
+        self,
+        texts: List[str],
+        metadatas: Optional[List[Dict[str, str]]] = None,
+        batch_size: int = 5000
+    ) -> Dict[str, int]:
+        """
+        Makes the collection hold exactly `texts`:
+        - only chunks whose ID is not stored yet are embedded and upserted
+        - stored chunks that are no longer produced are deleted
+        Returns added / removed / unchanged counts.
+        """
+        metadatas = metadatas or [{"source": "unknown"} for _ in texts]
+        return self.sync_stream(zip(texts, metadatas), batch_size)
+
+    def sync_stream(
+        self,
+        chunks: Iterable[Tuple[str, Dict[str, str]]],
+        batch_size: int = 5000
+    ) -> Dict[str, int]:
+        """
+        sync_documents() over an iterator of (text, metadata): new chunks
+        are embedded and upserted batch by batch as they arrive, so only
+        one batch of texts is held in memory (plus the set of IDs).
+        """
+        stored = self.stored_ids()
+        seen: Set[str] = set()
+        added = 0
+        batch: List[Tuple[str, str, Dict[str, str]]] = []
+
+        def flush():
+            self.collection.upsert(
+                ids=[cid for cid, _, _ in batch],
+                documents=[text for _, text, _ in batch],
+                metadatas=[meta for _, _, meta in batch]
+            )
+            batch.clear()
+
+        for text, meta in chunks:
+            cid = chunk_id(text, meta)
+            if cid in seen:
+                continue  # identical chunks collapse
+            seen.add(cid)
+
+            if cid not in stored:
+                batch.append((cid, text, meta))
+                added += 1
+                if len(batch) >= batch_size:
+                    flush()
+
+        if batch:
+            flush()
+
+        stale_ids = sorted(stored - seen)
+        for start in range(0, len(stale_ids), batch_size):
+            self.collection.delete(ids=stale_ids[start:start + batch_size])
+
+        counts = {
+            "added": added,
+            "removed": len(stale_ids),
+            "unchanged": len(seen) - added
+        }
+
+        # Invalidates answer caches built on the previous index
+        if added or stale_ids:
+            bump_index_version()
+
+        return counts
+
     def add_documents(self, texts: List[str], batch_size: int = 5000):
         if not texts:
             print("❌ No texts to store")
             return
 
-        for start in range(0, len(texts), batch_size):
-            end = start + batch_size
-            self.collection.add(
-                documents=texts[start:end],
-                ids=[f"chunk_{i}" for i in range(start, min(end, len(texts)))]
-            )
+        return self.sync_documents(texts, batch_size=batch_size)
 
     def count(self) -> int:
         return self.collection.count()
@@ -47,10 +138,17 @@ if __name__ == "__main__":
     text = load_cleaned_text(CLEANED_TEXT_PATH)
 
     print("Chunking...")
-    chunks = chunk_text(text)
+    chunks, metadatas = chunk_sections(text)
 
-    print("Storing in ChromaDB...")
+    print("Syncing ChromaDB...")
     store = ChromaVectorStore()
-    store.add_documents(chunks)
+    counts = store.sync_documents(chunks, metadatas)
+
+    print(
+        f"✅ {store.count()} chunks stored | added={counts['added']} "
+        f"removed={counts['removed']} unchanged={counts['unchanged']}"
+    )
 
-    print(f"✅ Stored {store.count()} chunks")
+    if counts["added"] or counts["removed"] or not os.path.exists(NUMPY_INDEX_PATH):
+        print("Exporting numpy read index...")
+        export_from_chroma(store.collection)
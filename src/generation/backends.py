@@ -0,0 +1,275 @@
+# src/generation/backends.py
+
+from typing import Iterator, Optional
+import codecs
+import json
+import os
+import shutil
+import subprocess
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.config import OLLAMA_HOST, OLLAMA_KEEP_ALIVE, OLLAMA_POOL_SIZE
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class BackendError(RuntimeError):
+    """The model backend returned an error."""
+
+
+class BackendUnavailable(BackendError):
+    """The model backend could not be reached at all."""
+
+
+class BackendTimeout(BackendError):
+    """The model backend did not answer in time."""
+
+
+def normalize_host(host: str) -> str:
+    """
+    Accepts OLLAMA_HOST in the forms Ollama itself accepts
+    ("localhost:11434", "http://localhost:11434/").
+    """
+    host = host.strip().rstrip("/")
+    if "://" not in host:
+        host = f"http://{host}"
+    return host
+
+
+# ---------- HTTP Backend ----------
+class OllamaHTTPBackend:
+    """
+    Talks to the Ollama server API (/api/generate).
+
+    One requests.Session per backend keeps TCP connections alive between
+    questions, and `keep_alive` keeps the model resident in Ollama.
+    """
+
+    name = "http"
+
+    def __init__(
+        self,
+        model_name: str,
+        host: str = OLLAMA_HOST,
+        keep_alive: str = OLLAMA_KEEP_ALIVE,
+        timeout: int = 60,
+        pool_size: int = OLLAMA_POOL_SIZE
+    ):
+        self.model_name = model_name
+        self.host = normalize_host(host)
+        self.keep_alive = keep_alive
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def generate(self, prompt: str, timeout: Optional[float] = None) -> str:
+        payload = {
+            "model": self.model_name,
+            "prompt": prompt,
+            "stream": False,
+            "keep_alive": self.keep_alive
+        }
+
+        try:
+            response = self.session.post(
+                f"{self.host}/api/generate",
+                json=payload,
+                timeout=timeout or self.timeout
+            )
+        except requests.Timeout as e:
+            raise BackendTimeout(str(e)) from e
+        except requests.ConnectionError as e:
+            raise BackendUnavailable(str(e)) from e
+
+        if response.status_code != 200:
+            raise BackendError(
+                f"Ollama HTTP {response.status_code}: {response.text[:200]}"
+            )
+
+        return response.json().get("response", "")
+
+    def health(self) -> bool:
+        """True if the Ollama server answers."""
+        try:
+            response = self.session.get(f"{self.host}/api/version", timeout=2)
+            return response.status_code == 200
+        except requests.RequestException:
+            return False
+
+    def warm_up(self) -> bool:
+        """
+        Loads the model into memory without generating anything
+        (an empty /api/generate request), so the first question
+        does not pay the model-load time.
+        """
+        try:
+            response = self.session.post(
+                f"{self.host}/api/generate",
+                json={"model": self.model_name, "keep_alive": self.keep_alive},
+                timeout=self.timeout
+            )
+            return response.status_code == 200
+        except requests.RequestException as e:
+            logger.warning(f"Warm-up failed for {self.model_name}: {e}")
+            return False
+
+    def stream(self, prompt: str, timeout: Optional[float] = None) -> Iterator[str]:
+        """
+        Yields tokens as Ollama produces them (NDJSON, one object per token).
+        `timeout` bounds the wait for each chunk, not the whole answer.
+        """
+        payload = {
+            "model": self.model_name,
+            "prompt": prompt,
+            "stream": True,
+            "keep_alive": self.keep_alive
+        }
+
+        try:
+            response = self.session.post(
+                f"{self.host}/api/generate",
+                json=payload,
+                timeout=timeout or self.timeout,
+                stream=True
+            )
+        except requests.Timeout as e:
+            raise BackendTimeout(str(e)) from e
+        except requests.ConnectionError as e:
+            raise BackendUnavailable(str(e)) from e
+
+        with response:
+            if response.status_code != 200:
+                raise BackendError(
+                    f"Ollama HTTP {response.status_code}: {response.text[:200]}"
+                )
+
+            try:
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get("error"):
+                        raise BackendError(chunk["error"])
+                    if chunk.get("response"):
+                        yield chunk["response"]
+                    if chunk.get("done"):
+                        return
+            except requests.Timeout as e:
+                raise BackendTimeout(str(e)) from e
+            except requests.ConnectionError as e:
+                raise BackendError(str(e)) from e
+
+    def close(self) -> None:
+        self.session.close()
+
+
+# ---------- Subprocess Backend ----------
+class OllamaSubprocessBackend:
+    """
+    Spawns `ollama run <model>` for every prompt.
+    Slow (process start + CLI handshake per question) but needs no server
+    configuration, so it stays as the fallback path.
+    """
+
+    name = "subprocess"
+
+    def __init__(self, model_name: str, ollama_path: str, timeout: int = 60):
+        self.model_name = model_name
+        self.ollama_path = ollama_path
+        self.timeout = timeout
+
+    def generate(self, prompt: str, timeout: Optional[float] = None) -> str:
+        try:
+            result = subprocess.run(
+                [self.ollama_path, "run", self.model_name],
+                input=prompt,
+                capture_output=True,
+                text=True,
+                encoding="utf-8",
+                errors="replace",
+                timeout=timeout or self.timeout
+            )
+        except subprocess.TimeoutExpired as e:
+            raise BackendTimeout(str(e)) from e
+        except FileNotFoundError as e:
+            raise BackendUnavailable(str(e)) from e
+
+        if result.returncode != 0 and not result.stdout.strip():
+            raise BackendError(f"ollama exited with code {result.returncode}")
+
+        return result.stdout
+
+    def health(self) -> bool:
+        return os.path.exists(self.ollama_path) or shutil.which(self.ollama_path) is not None
+
+    def warm_up(self) -> bool:
+        # Nothing stays resident between `ollama run` processes
+        return self.health()
+
+    def stream(self, prompt: str, timeout: Optional[float] = None) -> Iterator[str]:
+        """
+        Yields stdout of `ollama run` as it arrives.
+        The process is killed if it runs past `timeout`.
+        """
+        try:
+            proc = subprocess.Popen(
+                [self.ollama_path, "run", self.model_name],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL
+            )
+        except FileNotFoundError as e:
+            raise BackendUnavailable(str(e)) from e
+
+        timed_out = threading.Event()
+
+        def kill():
+            timed_out.set()
+            proc.kill()
+
+        timer = threading.Timer(timeout or self.timeout, kill)
+        timer.start()
+
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        produced = False
+
+        try:
+            proc.stdin.write(prompt.encode("utf-8"))
+            proc.stdin.close()
+
+            while True:
+                data = proc.stdout.read1(4096)
+                if not data:
+                    break
+                text = decoder.decode(data)
+                if text:
+                    produced = True
+                    yield text
+
+            tail = decoder.decode(b"", final=True)
+            if tail:
+                produced = True
+                yield tail
+
+            returncode = proc.wait()
+        finally:
+            timer.cancel()
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+
+        if timed_out.is_set():
+            raise BackendTimeout(f"ollama run exceeded {timeout or self.timeout}s")
+
+        if returncode != 0 and not produced:
+            raise BackendError(f"ollama exited with code {returncode}")
+
+    def close(self) -> None:
+        pass
@@ -0,0 +1,128 @@
+# src/generation/context.py
+
+"""
+Context packing for the prompt.
+
+Retrieved chunks often repeat each other: the character chunker
+overlaps neighbours by 100 characters, and the same paragraph can appear
+in several documents. build_context():
+1. merges chunks of the same source that overlap (one ends with the
+   text the other starts with — neighbours in the document) and drops
+   chunks contained in another
+2. drops near-duplicates: word 3-gram (shingle) Jaccard similarity at
+   or above CONTEXT_DEDUP_SIMILARITY with a better-ranked chunk
+3. packs what is left, best first, into the model's token budget
+"""
+
+from typing import Callable, FrozenSet, List, Optional, Tuple
+
+from src.config import CONTEXT_DEDUP_SIMILARITY, CONTEXT_MIN_OVERLAP_CHARS
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+SHINGLE_SIZE = 3
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> FrozenSet[Tuple[str, ...]]:
+    words = text.lower().split()
+    if len(words) <= size:
+        return frozenset([tuple(words)])
+    return frozenset(tuple(words[i:i + size]) for i in range(len(words) - size + 1))
+
+
+def jaccard(a: FrozenSet, b: FrozenSet) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def merge_overlap(first: str, second: str, min_overlap: int = CONTEXT_MIN_OVERLAP_CHARS) -> Optional[str]:
+    """
+    `first` + `second` without the repeated part, if `first` ends with
+    at least `min_overlap` characters that `second` starts with.
+    """
+    if len(second) < min_overlap:
+        return None
+    head = second[:min_overlap]
+    # Longest overlap first: the earliest match in `first`
+    start = first.find(head, max(0, len(first) - len(second)))
+    while start != -1:
+        if second.startswith(first[start:]):
+            return first[:start] + second
+        start = first.find(head, start + 1)
+    return None
+
+
+def _merge(kept: str, chunk: str, same_source: bool) -> Optional[str]:
+    if chunk in kept:
+        return kept
+    if kept in chunk:
+        return chunk
+    if not same_source:
+        return None
+    return merge_overlap(kept, chunk) or merge_overlap(chunk, kept)
+
+
+def dedupe(
+    chunks: List[str],
+    similarity: float = CONTEXT_DEDUP_SIMILARITY,
+    sources: Optional[List[str]] = None
+) -> List[str]:
+    """
+    Merges overlapping chunks and drops near-duplicates; keeps rank order.
+    With `sources` (one per chunk), only chunks of the same source merge.
+    """
+    if sources is None:
+        sources = ["" for _ in chunks]
+
+    kept: List[str] = []
+    kept_sources: List[str] = []
+    kept_shingles: List[FrozenSet] = []
+
+    for chunk, source in zip(chunks, sources):
+        chunk = chunk.strip()
+        if not chunk:
+            continue
+
+        for i, existing in enumerate(kept):
+            merged = _merge(existing, chunk, kept_sources[i] == source)
+            if merged is not None:
+                kept[i] = merged
+                kept_shingles[i] = shingles(merged)
+                break
+        else:
+            chunk_shingles = shingles(chunk)
+            if any(jaccard(chunk_shingles, s) >= similarity for s in kept_shingles):
+                continue
+            kept.append(chunk)
+            kept_sources.append(source)
+            kept_shingles.append(chunk_shingles)
+
+    return kept
+
+
+def pack(chunks: List[str], token_budget: int, count_tokens: Callable[[str], int]) -> List[str]:
+    """Best-first chunks within token_budget; the first is always kept."""
+    packed: List[str] = []
+    used = 0
+    for chunk in chunks:
+        tokens = count_tokens(chunk)
+        if packed and used + tokens > token_budget:
+            continue
+        packed.append(chunk)
+        used += tokens
+    return packed
+
+
+def build_context(
+    chunks: List[str],
+    token_budget: int,
+    count_tokens: Optional[Callable[[str], int]] = None,
+    sources: Optional[List[str]] = None
+) -> List[str]:
+    if count_tokens is None:
+        from src.embeddings.embedder import token_counter
+        count_tokens = token_counter()
+
+    return pack(dedupe(chunks, sources=sources), token_budget, count_tokens)
@@ -1,20 +1,137 @@
 # src/generation/generator.py
 
-from typing import List
-import subprocess
+from typing import Iterator, List, Optional
+import logging
 import os
 import shutil
-
-from src.config import ALLOWED_MODELS
+import time
+
+from src.config import (
+    ALLOWED_MODELS,
+    CONTEXT_TOKEN_BUDGET,
+    DEFAULT_CONTEXT_TOKEN_BUDGET,
+    GENERATION_BACKEND,
+)
+from src.generation.backends import (
+    BackendError,
+    BackendTimeout,
+    BackendUnavailable,
+    OllamaHTTPBackend,
+    OllamaSubprocessBackend,
+)
+from src.embeddings.embedder import token_counter
+from src.generation.context import build_context
 from src.utils.logger import get_logger
+from src.utils.metrics import REFUSALS, STAGE_SECONDS, TIMEOUTS
+from src.utils.tracing import span, start_span
 
 logger = get_logger(__name__)
 
+BACKENDS = ("http", "subprocess")
+
+
+REFUSAL_MESSAGE = (
+    "I don't have that information in my knowledge base. "
+    "Please contact the university administration or check the official website."
+)
+
+FORBIDDEN_PHRASES = [
+    "as an ai",
+    "i believe",
+    "based on my knowledge",
+    "generally",
+    "typically",
+    "usually"
+]
+
+EMPTY_RESPONSE_MESSAGE = "I couldn't generate a response. Please try again."
+TIMEOUT_MESSAGE = "Response generation timed out. Please try again."
+UNAVAILABLE_MESSAGE = "Language model not available. Please try again later."
+BACKEND_ERROR_MESSAGE = "The language model encountered an internal error."
+UNEXPECTED_ERROR_MESSAGE = "An unexpected error occurred while generating the response."
+
+# Transient failures — callers must not cache or reuse these as answers
+ERROR_MESSAGES = (
+    EMPTY_RESPONSE_MESSAGE,
+    TIMEOUT_MESSAGE,
+    UNAVAILABLE_MESSAGE,
+    BACKEND_ERROR_MESSAGE,
+    UNEXPECTED_ERROR_MESSAGE,
+)
+
+
+class ResponseReplaced(Exception):
+    """
+    Raised by Generator.stream when text already streamed to the user
+    must be replaced (forbidden phrase detected, or the model failed
+    mid-answer). `message` is the text to show instead.
+    """
+
+    def __init__(self, message: str):
+        super().__init__(message)
+        self.message = message
+
+
+class ForbiddenPhraseGuard:
+    """
+    Incremental forbidden-phrase check over a token stream.
+
+    The last (longest phrase - 1) characters are held back, so a phrase
+    split across tokens is caught before any part of it reaches the user.
+    """
+
+    def __init__(self, phrases: List[str] = FORBIDDEN_PHRASES):
+        self.phrases = phrases
+        self.holdback = max(len(p) for p in phrases) - 1
+        self.text = ""
+        self.emitted = 0
+        self.scanned = 0
+        self.blocked = False
+
+    def feed(self, token: str) -> str:
+        """Adds a token; returns the text that is now safe to emit."""
+        if self.blocked:
+            return ""
+
+        self.text += token
+
+        # Only re-scan the part a new phrase could touch
+        window = self.text[max(0, self.scanned - self.holdback):].lower()
+        self.scanned = len(self.text)
+
+        if any(p in window for p in self.phrases):
+            self.blocked = True
+            return ""
+
+        if not self.emitted:
+            # Match generate(): no leading whitespace in the answer
+            stripped = len(self.text) - len(self.text.lstrip())
+            self.emitted = stripped
+
+        safe_end = max(self.emitted, len(self.text) - self.holdback)
+        out = self.text[self.emitted:safe_end]
+        self.emitted = safe_end
+        return out
+
+    @property
+    def has_output(self) -> bool:
+        """True once any visible text was released to the caller."""
+        return bool(self.text[:self.emitted].strip())
+
+    def flush(self) -> str:
+        """Returns the held-back tail once the stream has ended."""
+        if self.blocked:
+            return ""
+        out = self.text[self.emitted:].rstrip()
+        self.emitted = len(self.text)
+        return out
+
 
 class Generator:
     """
     Generator class for SAGE Chatbot.
-    Uses Ollama safely on Windows / Linux / servers.
+    Uses Ollama safely on Windows / Linux / servers, through the HTTP API
+    by default and `ollama run` as a fallback.
     """
 
     SYSTEM_PROMPT = """You are SAGE, a knowledgeable assistant for university students and staff.
@@ -28,8 +145,13 @@ YOUR CORE RULES (NEVER VIOLATE):
 5. If the question is ambiguous, ask for clarification
 """
 
-    def __init__(self, model_name: str = "llama3.1:8b", timeout: int = 60):
-        logger.info(f"Initializing Generator | model={model_name}")
+    def __init__(
+        self,
+        model_name: str = "llama3.1:8b",
+        timeout: int = 60,
+        backend: str = GENERATION_BACKEND
+    ):
+        logger.info(f"Initializing Generator | model={model_name} | backend={backend}")
 
         if model_name not in ALLOWED_MODELS:
             logger.error(f"Blocked model requested: {model_name}")
@@ -38,28 +160,59 @@ YOUR CORE RULES (NEVER VIOLATE):
                 f"Allowed models: {ALLOWED_MODELS}"
             )
 
+        if backend not in BACKENDS:
+            raise ValueError(
+                f"Unknown generation backend '{backend}'. "
+                f"Available backends: {BACKENDS}"
+            )
+
         self.model_name = model_name
         self.timeout = timeout
+        self.context_budget = CONTEXT_TOKEN_BUDGET.get(model_name, DEFAULT_CONTEXT_TOKEN_BUDGET)
 
         self.ollama_path = os.environ.get("OLLAMA_PATH") or shutil.which("ollama")
-        if not self.ollama_path:
-            logger.critical("Ollama executable not found")
-            raise FileNotFoundError(
-                "Ollama executable not found. "
-                "Install Ollama or set OLLAMA_PATH."
+
+        self.backend = None
+        self.fallback = None
+
+        if backend == "http":
+            self.backend = OllamaHTTPBackend(model_name, timeout=timeout)
+            if self.ollama_path:
+                self.fallback = OllamaSubprocessBackend(
+                    model_name, self.ollama_path, timeout=timeout
+                )
+        else:
+            if not self.ollama_path:
+                logger.critical("Ollama executable not found")
+                raise FileNotFoundError(
+                    "Ollama executable not found. "
+                    "Install Ollama or set OLLAMA_PATH."
+                )
+            self.backend = OllamaSubprocessBackend(
+                model_name, self.ollama_path, timeout=timeout
             )
 
         logger.info("Generator initialized successfully")
 
-    def generate(self, query: str, context: List[str]) -> str:
-        if not context or all(not c.strip() for c in context):
-            logger.warning("Empty context — refusing to generate")
-            return (
-                "I don't have that information in my knowledge base. "
-                "Please contact the university administration or check the official website."
+    def pack_context(self, context: List[str], sources: Optional[List[str]] = None) -> List[str]:
+        """Merged, de-duplicated context within the model's token budget."""
+        count_tokens = token_counter()
+        start = time.perf_counter()
+        packed = build_context(context, self.context_budget, count_tokens, sources)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        logger.info(f"Context packed | chunks {len(context)}→{len(packed)} | {elapsed_ms:.1f} ms")
+        # Counting tokens again costs a tokenizer pass per chunk; only when asked for
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                f"Context tokens {sum(map(count_tokens, context))}→{sum(map(count_tokens, packed))}"
             )
+        return packed
 
-        context_text = "\n\n".join(context)
+    def build_prompt(self, query: str, context: List[str], sources: Optional[List[str]] = None) -> str:
+        start = time.perf_counter()
+        with span("build_prompt", chunks=len(context)):
+            context_text = "\n\n".join(self.pack_context(context, sources))
 
         prompt = f"""{self.SYSTEM_PROMPT}
 
@@ -71,190 +224,213 @@ YOUR CORE RULES (NEVER VIOLATE):
 
 ===== YOUR ANSWER =====
 """
-
+        STAGE_SECONDS.observe(time.perf_counter() - start, "prompt")
+        return prompt
+
+    def _complete(self, prompt: str, timeout: Optional[float] = None) -> str:
+        """
+        Runs the prompt on the primary backend, falling back to
+        `ollama run` when the Ollama server cannot be reached.
+        """
         try:
-            logger.info("Invoking Ollama")
-
-            result = subprocess.run(
-                [self.ollama_path, "run", self.model_name],
-                input=prompt,
-                capture_output=True,
-                text=True,
-                encoding="utf-8",
-                errors="replace",
-                timeout=self.timeout
+            with span("llm", backend=self.backend.name, model=self.model_name):
+                return self.backend.generate(prompt, timeout=timeout)
+        except BackendUnavailable:
+            if self.fallback is None:
+                raise
+            logger.warning(
+                f"{self.backend.name} backend unreachable — "
+                f"falling back to {self.fallback.name}"
             )
+            with span("llm", backend=self.fallback.name, model=self.model_name):
+                return self.fallback.generate(prompt, timeout=timeout)
+
+    def generate(
+        self,
+        query: str,
+        context: List[str],
+        timeout: Optional[float] = None,
+        sources: Optional[List[str]] = None
+    ) -> str:
+        """
+        Returns the full answer. `timeout` overrides the per-instance
+        timeout (e.g. with what is left of the request budget).
+        """
+        if not context or all(not c.strip() for c in context):
+            logger.warning("Empty context — refusing to generate")
+            return REFUSAL_MESSAGE
 
-            if result.returncode != 0 and not result.stdout.strip():
-                logger.error("Ollama returned non-zero exit code")
-                return "The language model encountered an internal error."
+        prompt = self.build_prompt(query, context, sources)
+
+        try:
+            logger.info(f"Invoking Ollama | backend={self.backend.name}")
 
-            output = result.stdout.strip()
+            start = time.perf_counter()
+            output = self._complete(prompt, timeout=timeout).strip()
+            STAGE_SECONDS.observe(time.perf_counter() - start, "generate")
 
             if not output:
                 logger.warning("Empty response from model")
-                return "I couldn't generate a response. Please try again."
-
-            forbidden_phrases = [
-                "as an ai",
-                "i believe",
-                "based on my knowledge",
-                "generally",
-                "typically",
-                "usually"
-            ]
-
-            if any(p in output.lower() for p in forbidden_phrases):
+                return EMPTY_RESPONSE_MESSAGE
+
+            if any(p in output.lower() for p in FORBIDDEN_PHRASES):
                 logger.warning("Hallucination pattern detected — response blocked")
-                return (
-                    "I don't have that information in my knowledge base. "
-                    "Please contact the university administration or check the official website."
-                )
+                REFUSALS.inc("blocked")
+                return REFUSAL_MESSAGE
 
             logger.info("Response generated successfully")
             return output
 
-        except subprocess.TimeoutExpired:
+        except BackendTimeout:
             logger.error("Ollama call timed out")
-            return "Response generation timed out. Please try again."
-
-        except Exception:
-            logger.exception("Unexpected generation error")
-            return "An unexpected error occurred while generating the response."
-
-
-# ----------------- Local Test -----------------
-if __name__ == "__main__":
-    context = [
-        "The university library is open from 8 AM to 8 PM on weekdays.",
-        "On weekends, the library is open from 9 AM to 5 PM."
-    ]
-
-    gen = Generator(model_name="llama3.1:8b")
-    print(gen.generate("What are the library working hours?", context))
-# src/generation/generator.py
+            TIMEOUTS.inc("generate")
+            return TIMEOUT_MESSAGE
 
-from typing import List
-import subprocess
-import os
-import shutil
+        except BackendUnavailable:
+            logger.error("Ollama is not reachable")
+            return UNAVAILABLE_MESSAGE
 
-from src.config import ALLOWED_MODELS
-from src.utils.logger import get_logger
+        except BackendError as e:
+            logger.error(f"Ollama returned an error: {e}")
+            return BACKEND_ERROR_MESSAGE
 
-logger = get_logger(__name__)
-
-
-class Generator:
-    """
-    Generator class for SAGE Chatbot.
-    Uses Ollama safely on Windows / Linux / servers.
-    """
-
-    SYSTEM_PROMPT = """You are SAGE, a knowledgeable assistant for university students and staff.
-
-YOUR CORE RULES (NEVER VIOLATE):
-1. Answer ONLY using information from the provided Context section
-2. If the Context does not contain the answer, respond with:
-   "I don't have that information in my knowledge base. Please contact the university administration or check the official website."
-3. Do NOT make assumptions or infer missing details
-4. Do NOT use external knowledge
-5. If the question is ambiguous, ask for clarification
-"""
+        except Exception:
+            logger.exception("Unexpected generation error")
+            return UNEXPECTED_ERROR_MESSAGE
+
+    def _stream_tokens(self, prompt: str, timeout: Optional[float] = None) -> Iterator[str]:
+        """Streaming counterpart of _complete(), with the same fallback."""
+        # Not made current: the stream is resumed on different threads
+        llm_span = start_span("llm", backend=self.backend.name, model=self.model_name, stream=True)
+        start = time.perf_counter()
+        error = None
+        try:
+            try:
+                tokens = self.backend.stream(prompt, timeout=timeout)
+                first = next(tokens, None)
+            except BackendUnavailable:
+                if self.fallback is None:
+                    raise
+                logger.warning(
+                    f"{self.backend.name} backend unreachable — "
+                    f"falling back to {self.fallback.name}"
+                )
+                llm_span.set_attribute("backend", self.fallback.name)
+                tokens = self.fallback.stream(prompt, timeout=timeout)
+                first = next(tokens, None)
+
+            llm_span.set_attribute("first_token_ms", round((time.perf_counter() - start) * 1000, 1))
+            if first is None:
+                return
+            yield first
+            yield from tokens
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            llm_span.end(error)
+
+    def stream(
+        self,
+        query: str,
+        context: List[str],
+        timeout: Optional[float] = None,
+        sources: Optional[List[str]] = None
+    ) -> Iterator[str]:
+        """
+        Streams the answer token by token, within `timeout` seconds overall.
+
+        The forbidden-phrase check runs on every token. If it trips, or the
+        model fails after text was already sent, ResponseReplaced is raised
+        and the caller should replace what it showed with `.message`.
+        Failures before the first token are yielded as the answer text,
+        exactly as generate() would return them.
+        """
+        if not context or all(not c.strip() for c in context):
+            logger.warning("Empty context — refusing to generate")
+            yield REFUSAL_MESSAGE
+            return
 
-    def __init__(self, model_name: str = "llama3.1:8b", timeout: int = 60):
-        logger.info(f"Initializing Generator | model={model_name}")
+        prompt = self.build_prompt(query, context, sources)
+        guard = ForbiddenPhraseGuard()
 
-        if model_name not in ALLOWED_MODELS:
-            logger.error(f"Blocked model requested: {model_name}")
-            raise ValueError(
-                f"Model '{model_name}' is not allowed. "
-                f"Allowed models: {ALLOWED_MODELS}"
-            )
+        def fail(message: str) -> Iterator[str]:
+            if guard.has_output:
+                raise ResponseReplaced(message)
+            yield message
 
-        self.model_name = model_name
-        self.timeout = timeout
+        try:
+            logger.info(f"Streaming from Ollama | backend={self.backend.name}")
 
-        self.ollama_path = os.environ.get("OLLAMA_PATH") or shutil.which("ollama")
-        if not self.ollama_path:
-            logger.critical("Ollama executable not found")
-            raise FileNotFoundError(
-                "Ollama executable not found. "
-                "Install Ollama or set OLLAMA_PATH."
-            )
+            start = time.perf_counter()
+            deadline = time.monotonic() + (timeout or self.timeout)
 
-        logger.info("Generator initialized successfully")
-
-    def generate(self, query: str, context: List[str]) -> str:
-        if not context or all(not c.strip() for c in context):
-            logger.warning("Empty context — refusing to generate")
-            return (
-                "I don't have that information in my knowledge base. "
-                "Please contact the university administration or check the official website."
-            )
+            for token in self._stream_tokens(prompt, timeout=timeout):
+                if time.monotonic() > deadline:
+                    raise BackendTimeout("answer not finished within the time budget")
 
-        context_text = "\n\n".join(context)
+                safe = guard.feed(token)
+                if guard.blocked:
+                    break
+                if safe:
+                    yield safe
 
-        prompt = f"""{self.SYSTEM_PROMPT}
+            STAGE_SECONDS.observe(time.perf_counter() - start, "generate")
 
-===== CONTEXT =====
-{context_text}
+            if guard.blocked:
+                logger.warning("Hallucination pattern detected — stream blocked")
+                REFUSALS.inc("blocked")
+                yield from fail(REFUSAL_MESSAGE)
+                return
 
-===== USER QUESTION =====
-{query}
+            tail = guard.flush()
+            if tail:
+                yield tail
 
-===== YOUR ANSWER =====
-"""
+            if not guard.text.strip():
+                logger.warning("Empty response from model")
+                yield EMPTY_RESPONSE_MESSAGE
+                return
 
-        try:
-            logger.info("Invoking Ollama")
-
-            result = subprocess.run(
-                [self.ollama_path, "run", self.model_name],
-                input=prompt,
-                capture_output=True,
-                text=True,
-                encoding="utf-8",
-                errors="replace",
-                timeout=self.timeout
-            )
+            logger.info("Response streamed successfully")
 
-            if result.returncode != 0 and not result.stdout.strip():
-                logger.error("Ollama returned non-zero exit code")
-                return "The language model encountered an internal error."
+        except BackendTimeout:
+            logger.error("Ollama stream timed out")
+            TIMEOUTS.inc("generate")
+            yield from fail(TIMEOUT_MESSAGE)
 
-            output = result.stdout.strip()
+        except BackendUnavailable:
+            logger.error("Ollama is not reachable")
+            yield from fail(UNAVAILABLE_MESSAGE)
 
-            if not output:
-                logger.warning("Empty response from model")
-                return "I couldn't generate a response. Please try again."
-
-            forbidden_phrases = [
-                "as an ai",
-                "i believe",
-                "based on my knowledge",
-                "generally",
-                "typically",
-                "usually"
-            ]
-
-            if any(p in output.lower() for p in forbidden_phrases):
-                logger.warning("Hallucination pattern detected — response blocked")
-                return (
-                    "I don't have that information in my knowledge base. "
-                    "Please contact the university administration or check the official website."
-                )
-
-            logger.info("Response generated successfully")
-            return output
+        except BackendError as e:
+            logger.error(f"Ollama returned an error: {e}")
+            yield from fail(BACKEND_ERROR_MESSAGE)
 
-        except subprocess.TimeoutExpired:
-            logger.error("Ollama call timed out")
-            return "Response generation timed out. Please try again."
+        except ResponseReplaced:
+            raise
 
         except Exception:
-            logger.exception("Unexpected generation error")
-            return "An unexpected error occurred while generating the response."
+            logger.exception("Unexpected streaming error")
+            yield from fail(UNEXPECTED_ERROR_MESSAGE)
+
+    def health_check(self) -> bool:
+        """True if the primary backend (or the fallback) can serve requests."""
+        if self.backend.health():
+            return True
+        return self.fallback is not None and self.fallback.health()
+
+    def warm_up(self) -> bool:
+        """Loads the model ahead of the first question."""
+        logger.info(f"Warming up model {self.model_name}")
+        if self.backend.warm_up():
+            return True
+        return self.fallback is not None and self.fallback.warm_up()
+
+    def close(self) -> None:
+        self.backend.close()
+        if self.fallback is not None:
+            self.fallback.close()
 
 
 # ----------------- Local Test -----------------
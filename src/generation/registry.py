@@ -0,0 +1,87 @@
+# src/generation/registry.py
+
+from typing import Dict, List, Optional
+import threading
+
+from src.config import ALLOWED_MODELS, WARM_UP_MODELS
+from src.generation.generator import Generator
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class GeneratorRegistry:
+    """
+    Process-wide cache of Generator instances, one per allowed model.
+
+    Generators are created lazily on first use and then reused, so the
+    allowlist check, Ollama lookup and HTTP connection pool are set up
+    once per model instead of once per question.
+    """
+
+    def __init__(self, models: List[str] = ALLOWED_MODELS):
+        self.models = list(models)
+        self._generators: Dict[str, Generator] = {}
+        self._health: Dict[str, bool] = {}
+        self._lock = threading.Lock()
+
+    def get(self, model_name: str) -> Generator:
+        generator = self._generators.get(model_name)
+        if generator is not None:
+            return generator
+
+        with self._lock:
+            generator = self._generators.get(model_name)
+            if generator is None:
+                if model_name not in self.models:
+                    logger.error(f"Blocked model requested: {model_name}")
+                    raise ValueError(
+                        f"Model '{model_name}' is not allowed. "
+                        f"Allowed models: {self.models}"
+                    )
+                generator = Generator(model_name=model_name)
+                self._generators[model_name] = generator
+                logger.info(f"Registered generator for {model_name}")
+
+        return generator
+
+    def probe(self, model_name: str) -> bool:
+        """Health probe for one model's backend."""
+        try:
+            healthy = self.get(model_name).health_check()
+        except Exception:
+            logger.exception(f"Health probe failed for {model_name}")
+            healthy = False
+
+        self._health[model_name] = healthy
+        return healthy
+
+    def warm_up(self, model_name: str) -> bool:
+        """Probes the backend and, if healthy, loads the model."""
+        if not self.probe(model_name):
+            logger.warning(f"Skipping warm-up, backend unhealthy: {model_name}")
+            return False
+
+        warmed = self.get(model_name).warm_up()
+        logger.info(f"Warm-up {'completed' if warmed else 'failed'} | model={model_name}")
+        return warmed
+
+    def warm_up_all(self, models: Optional[List[str]] = None) -> Dict[str, bool]:
+        return {m: self.warm_up(m) for m in (models or WARM_UP_MODELS)}
+
+    def is_healthy(self, model_name: str) -> bool:
+        """Result of the last probe (False if never probed)."""
+        return self._health.get(model_name, False)
+
+    def close(self) -> None:
+        with self._lock:
+            for generator in self._generators.values():
+                generator.close()
+            self._generators.clear()
+
+
+registry = GeneratorRegistry()
+
+
+def get_generator(model_name: str) -> Generator:
+    return registry.get(model_name)
@@ -0,0 +1,155 @@
+# src/generation/scheduler.py
+
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+import threading
+import time
+
+from src.config import (
+    GENERATION_CONCURRENCY,
+    GENERATION_MIN_SECONDS,
+    GENERATION_QUEUE_DEPTH,
+)
+from src.utils.logger import get_logger
+from src.utils.metrics import TIMEOUTS
+
+logger = get_logger(__name__)
+
+
+class SchedulerRejected(RuntimeError):
+    """The model's wait queue is full; reject the request right away."""
+
+
+class SchedulerTimeout(RuntimeError):
+    """The request's budget ran out while waiting for a generation slot."""
+
+
+class _ModelQueue:
+    def __init__(self, limit: int, max_waiting: int):
+        self.limit = limit
+        self.max_waiting = max_waiting
+        self.cond = threading.Condition()
+        self.active = 0
+        self.waiting = 0
+
+        self.admitted = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+
+class GenerationScheduler:
+    """
+    Admission control for LLM generation.
+
+    - At most `concurrency[model]` generations run per model
+    - At most `max_waiting` further requests wait for a slot; beyond
+      that, requests are rejected immediately (SchedulerRejected)
+    - Time spent waiting counts against the request deadline; a request
+      that cannot start with GENERATION_MIN_SECONDS left times out
+      (SchedulerTimeout) and the generation gets only what remains
+    """
+
+    def __init__(
+        self,
+        concurrency: Dict[str, int] = GENERATION_CONCURRENCY,
+        max_waiting: int = GENERATION_QUEUE_DEPTH,
+        min_generation_seconds: float = GENERATION_MIN_SECONDS,
+        default_concurrency: int = 1
+    ):
+        self.concurrency = dict(concurrency)
+        self.max_waiting = max_waiting
+        self.min_generation_seconds = min_generation_seconds
+        self.default_concurrency = default_concurrency
+
+        self._queues: Dict[str, _ModelQueue] = {}
+        self._lock = threading.Lock()
+
+    def _queue(self, model_name: str) -> _ModelQueue:
+        q = self._queues.get(model_name)
+        if q is None:
+            with self._lock:
+                q = self._queues.setdefault(
+                    model_name,
+                    _ModelQueue(
+                        self.concurrency.get(model_name, self.default_concurrency),
+                        self.max_waiting
+                    )
+                )
+        return q
+
+    @contextmanager
+    def slot(self, model_name: str, deadline: Optional[float] = None) -> Iterator[Optional[float]]:
+        """
+        Holds a generation slot for `model_name`.
+        `deadline` is a time.monotonic() timestamp; yields the seconds
+        left for generation (None if unbounded).
+        """
+        q = self._queue(model_name)
+        start = time.monotonic()
+        wait_until = deadline - self.min_generation_seconds if deadline is not None else None
+
+        with q.cond:
+            if q.active >= q.limit:
+                if q.waiting >= q.max_waiting:
+                    q.rejected += 1
+                    logger.warning(f"Generation queue full | model={model_name}")
+                    raise SchedulerRejected(f"generation queue for {model_name} is full")
+
+                q.waiting += 1
+                try:
+                    while q.active >= q.limit:
+                        remaining = wait_until - time.monotonic() if wait_until is not None else None
+                        if remaining is not None and remaining <= 0:
+                            q.timeouts += 1
+                            TIMEOUTS.inc("queue")
+                            logger.warning(f"Timed out waiting for generation slot | model={model_name}")
+                            raise SchedulerTimeout(f"no generation slot for {model_name} in time")
+                        q.cond.wait(remaining)
+                finally:
+                    q.waiting -= 1
+
+            if wait_until is not None and time.monotonic() >= wait_until:
+                q.timeouts += 1
+                TIMEOUTS.inc("queue")
+                # This request may have been woken for a free slot; hand the
+                # wakeup on so the next waiter doesn't sleep until its deadline
+                q.cond.notify()
+                raise SchedulerTimeout("request budget exhausted before generation")
+
+            q.active += 1
+            waited = time.monotonic() - start
+            q.admitted += 1
+            q.wait_total += waited
+            q.wait_max = max(q.wait_max, waited)
+
+        if waited > 0.01:
+            logger.info(f"Generation slot acquired after {waited * 1000:.0f}ms | model={model_name}")
+
+        try:
+            yield deadline - time.monotonic() if deadline is not None else None
+        finally:
+            with q.cond:
+                q.active -= 1
+                q.cond.notify()
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        out = {}
+        for model_name, q in list(self._queues.items()):
+            with q.cond:
+                out[model_name] = {
+                    "concurrency": q.limit,
+                    "active": q.active,
+                    "queue_depth": q.waiting,
+                    "max_queue_depth": q.max_waiting,
+                    "admitted": q.admitted,
+                    "rejected": q.rejected,
+                    "timeouts": q.timeouts,
+                    "average_wait_ms": round(q.wait_total / q.admitted * 1000, 1) if q.admitted else 0.0,
+                    "max_wait_ms": round(q.wait_max * 1000, 1)
+                }
+        return out
+
+
+generation_scheduler = GenerationScheduler()
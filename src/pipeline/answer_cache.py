@@ -0,0 +1,268 @@
+# src/pipeline/answer_cache.py
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+import threading
+import time
+
+import numpy as np
+
+from src.config import (
+    ANSWER_CACHE_MAX_BYTES,
+    ANSWER_CACHE_MAX_ENTRIES,
+    ANSWER_CACHE_SIMILARITY,
+    ANSWER_CACHE_TTL_SECONDS,
+)
+from src.embeddings.index_version import read_index_version
+from src.utils.clean_text import normalize_query
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Rough per-entry bookkeeping cost (dict slot, dataclass, key tuple)
+ENTRY_OVERHEAD_BYTES = 256
+
+# Miss embeddings kept around for the put() that follows
+PENDING_EMBEDDINGS = 64
+
+
+@dataclass
+class CacheEntry:
+    question: str
+    answer: str
+    embedding: Optional[np.ndarray]
+    created_at: float
+    latency_ms: float
+    size: int
+
+
+class AnswerCache:
+    """
+    Answer cache in front of run_rag.
+
+    - Exact hits on the normalized question (per model)
+    - Semantic hits on near-duplicate questions: cosine similarity of
+      the query embeddings above `similarity_threshold`
+    - LRU eviction bounded by entry count and approximate memory,
+      plus a TTL per entry
+    - Cleared automatically when the vector index version changes
+    """
+
+    def __init__(
+        self,
+        max_entries: int = ANSWER_CACHE_MAX_ENTRIES,
+        max_bytes: int = ANSWER_CACHE_MAX_BYTES,
+        ttl_seconds: float = ANSWER_CACHE_TTL_SECONDS,
+        similarity_threshold: float = ANSWER_CACHE_SIMILARITY,
+        embed_fn: Optional[Callable[[str], np.ndarray]] = None,
+        version_fn: Callable[[], str] = read_index_version,
+        version_check_interval: float = 1.0
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.embed_fn = embed_fn
+        self.version_fn = version_fn
+        self.version_check_interval = version_check_interval
+
+        self._entries: "OrderedDict[Tuple[str, str], CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        # Embeddings computed on recent misses, reused by put()
+        self._pending: "OrderedDict[str, np.ndarray]" = OrderedDict()
+
+        # Stacked embeddings per model, rebuilt lazily after changes
+        self._matrix: Dict[str, Tuple[List[Tuple[str, str]], np.ndarray]] = {}
+
+        self._version = version_fn()
+        self._version_checked_at = time.monotonic()
+
+        self.hits_exact = 0
+        self.hits_semantic = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.saved_latency_ms = 0.0
+
+    # ---------- Lookup ----------
+    def get(self, question: str, model_name: str) -> Optional[str]:
+        """
+        Returns a cached answer or None.
+        On a miss the query embedding is kept so put() can reuse it.
+        """
+        self._check_version()
+
+        key = (model_name, normalize_query(question))
+
+        with self._lock:
+            entry = self._live_entry(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits_exact += 1
+                self.saved_latency_ms += entry.latency_ms
+                return entry.answer
+
+        embedding = self._embed(question)
+        if embedding is not None:
+            with self._lock:
+                match = self._semantic_match(model_name, embedding)
+                if match is not None:
+                    self._entries.move_to_end(match)
+                    entry = self._entries[match]
+                    self.hits_semantic += 1
+                    self.saved_latency_ms += entry.latency_ms
+                    logger.info(
+                        f"Semantic cache hit | '{question[:60]}' ~ '{entry.question[:60]}'"
+                    )
+                    return entry.answer
+
+        with self._lock:
+            self.misses += 1
+            if embedding is not None:
+                self._pending[key[1]] = embedding
+                if len(self._pending) > PENDING_EMBEDDINGS:
+                    self._pending.popitem(last=False)
+        return None
+
+    def put(
+        self,
+        question: str,
+        model_name: str,
+        answer: str,
+        latency_ms: float = 0.0
+    ) -> None:
+        normalized = normalize_query(question)
+        if not normalized or not answer:
+            return
+
+        key = (model_name, normalized)
+        with self._lock:
+            embedding = self._pending.pop(normalized, None)
+        if embedding is None:
+            embedding = self._embed(question)
+
+        size = (
+            len(question.encode("utf-8"))
+            + len(answer.encode("utf-8"))
+            + (embedding.nbytes if embedding is not None else 0)
+            + ENTRY_OVERHEAD_BYTES
+        )
+        if size > self.max_bytes:
+            return
+
+        entry = CacheEntry(
+            question=question,
+            answer=answer,
+            embedding=embedding,
+            created_at=time.monotonic(),
+            latency_ms=latency_ms,
+            size=size
+        )
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = entry
+            self._bytes += size
+            self._matrix.pop(model_name, None)
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._matrix.clear()
+            self._pending.clear()
+            self._bytes = 0
+
+    # ---------- Metrics ----------
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            hits = self.hits_exact + self.hits_semantic
+            lookups = hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits_exact": self.hits_exact,
+                "hits_semantic": self.hits_semantic,
+                "misses": self.misses,
+                "hit_ratio": hits / lookups if lookups else 0.0,
+                "saved_latency_ms": round(self.saved_latency_ms, 1),
+                "evictions": self.evictions,
+                "invalidations": self.invalidations
+            }
+
+    # ---------- Internals ----------
+    def _live_entry(self, key) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry.created_at > self.ttl_seconds:
+            self._remove(key)
+            return None
+        return entry
+
+    def _remove(self, key) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        self._matrix.pop(key[0], None)
+
+    def _semantic_match(self, model_name: str, embedding: np.ndarray):
+        if model_name not in self._matrix:
+            keys = [
+                k for k, e in self._entries.items()
+                if k[0] == model_name and e.embedding is not None
+            ]
+            if not keys:
+                return None
+            self._matrix[model_name] = (
+                keys,
+                np.stack([self._entries[k].embedding for k in keys])
+            )
+
+        keys, matrix = self._matrix[model_name]
+        scores = matrix @ embedding
+        best = int(np.argmax(scores))
+
+        if scores[best] < self.similarity_threshold:
+            return None
+
+        # Expired entries stay in the matrix until the next rebuild
+        if self._live_entry(keys[best]) is None:
+            return None
+        return keys[best]
+
+    def _embed(self, question: str) -> Optional[np.ndarray]:
+        # The question as asked, like retrieval embeds it: embed_fn is the
+        # retriever's encoder, whose cache this lookup fills
+        if self.embed_fn is None or not question.strip():
+            return None
+        try:
+            vector = np.asarray(self.embed_fn(question), dtype=np.float32)
+        except Exception:
+            logger.exception("Query embedding failed — semantic cache disabled")
+            self.embed_fn = None
+            return None
+
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def _check_version(self) -> None:
+        now = time.monotonic()
+        if now - self._version_checked_at < self.version_check_interval:
+            return
+        self._version_checked_at = now
+
+        version = self.version_fn()
+        if version != self._version:
+            logger.info("Vector index changed — clearing answer cache")
+            self._version = version
+            self.clear()
+            self.invalidations += 1
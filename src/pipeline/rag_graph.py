@@ -5,13 +5,33 @@ import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
 
-from typing import TypedDict, List
-from langgraph.graph import StateGraph, END
+from collections import Counter
+from typing import Dict, Iterator, Optional, TypedDict, List
+import threading
+import time
 
+from src.embeddings.embedder import token_counter
 from src.retrieval.retriever import Retriever
-from src.generation.generator import Generator
-from src.config import AVAILABLE_MODELS, DEFAULT_MODEL
-from src.utils.logger import logger
+from src.retrieval.batcher import RetrievalBatcher
+from src.retrieval.reranker import CrossEncoderReranker
+from src.generation.registry import get_generator
+from src.generation.generator import ERROR_MESSAGES, REFUSAL_MESSAGE
+from src.generation.scheduler import generation_scheduler
+from src.pipeline.answer_cache import AnswerCache
+from src.config import (
+    AVAILABLE_MODELS,
+    DEFAULT_MODEL,
+    ANSWER_CACHE_ENABLED,
+    RERANK_CANDIDATES,
+    RERANK_ENABLED,
+    RERANK_TOP_N,
+    RETRIEVAL_BATCHING,
+)
+from src.utils.logger import get_logger
+from src.utils.metrics import ANSWER_CACHE, REFUSALS, STAGE_SECONDS
+from src.utils.tracing import span, start_span, traced
+
+logger = get_logger(__name__)
 
 
 DEFAULT_MODEL_NAME = AVAILABLE_MODELS[DEFAULT_MODEL]["name"]
@@ -20,11 +40,26 @@ DEFAULT_MODEL_NAME = AVAILABLE_MODELS[DEFAULT_MODEL]["name"]
 class RAGState(TypedDict):
     question: str
     context: List[str]
+    # cosine similarity of each context chunk to the question
+    scores: List[float]
+    # source document of each context chunk (overlaps merge only within one)
+    sources: List[str]
     answer: str
     model_name: str
+    # time.monotonic() by which the answer is due (None = no budget)
+    deadline: Optional[float]
 
 
-retriever = Retriever(top_k=5)
+# Pipeline components, built by init_pipeline() on first use (or at
+# backend startup) so importing this module stays cheap: no Chroma
+# client, LangGraph compile or model loads at import time.
+retriever: Optional[Retriever] = None
+reranker: Optional[CrossEncoderReranker] = None
+retrieval_batcher: Optional[RetrievalBatcher] = None
+answer_cache: Optional[AnswerCache] = None
+rag_app = None
+
+_init_lock = threading.Lock()
 
 
 def resolve_model_name(model_key_or_name: str) -> str:
@@ -41,25 +76,110 @@ def resolve_model_name(model_key_or_name: str) -> str:
     return resolved
 
 
+def remaining_budget(state: RAGState) -> Optional[float]:
+    if state.get("deadline") is None:
+        return None
+    return max(0.0, state["deadline"] - time.monotonic())
+
+
+# ---------- Branch Counters ----------
+_branch_counts: Counter = Counter()
+_branch_lock = threading.Lock()
+
+
+def count_branch(branch: str) -> None:
+    with _branch_lock:
+        _branch_counts[branch] += 1
+
+
+def graph_stats() -> Dict[str, float]:
+    """How often each branch after retrieval was taken."""
+    with _branch_lock:
+        counts = dict(_branch_counts)
+    total = sum(counts.values())
+    return {
+        **counts,
+        "refused_share": counts.get("refuse", 0) / total if total else 0.0
+    }
+
+
+# ---------- Nodes ----------
+@traced("retrieve")
 def retrieve_node(state: RAGState) -> RAGState:
     logger.info(f"Retrieval started for question: {state['question']}")
+    start = time.perf_counter()
+
+    if retrieval_batcher is not None:
+        scored = retrieval_batcher.retrieve(
+            state["question"],
+            timeout=remaining_budget(state)
+        )
+    else:
+        scored = retriever.retrieve_sourced(state["question"])
+
+    STAGE_SECONDS.observe(time.perf_counter() - start, "retrieve")
+    logger.info(f"Retrieved {len(scored)} context chunks")
+
+    return {
+        **state,
+        "context": [doc for doc, _, _ in scored],
+        "scores": [score for _, score, _ in scored],
+        "sources": [source for _, _, source in scored]
+    }
 
-    docs = retriever.retrieve(state["question"])
 
-    logger.info(f"Retrieved {len(docs)} context chunks")
+def route_after_retrieve(state: RAGState) -> str:
+    """
+    "refuse" when no chunk is relevant enough to answer from (the
+    refusal then costs no model load, slot or HTTP call), else "answer".
+    """
+    best = max((s for s in state["scores"] if s == s), default=None)   # NaN-safe
+    if not state["context"] or (best is not None and best < retriever.min_score):
+        branch = "refuse"
+    else:
+        branch = "answer"
 
+    count_branch(branch)
+    return branch
+
+
+@traced("refuse")
+def refuse_node(state: RAGState) -> RAGState:
+    logger.info("No relevant context — refusing without generation")
+    REFUSALS.inc("no_context")
     return {
         **state,
-        "context": docs
+        "answer": REFUSAL_MESSAGE
     }
 
 
+@traced("rerank")
+def rerank_node(state: RAGState) -> RAGState:
+    start = time.perf_counter()
+    order = reranker.rerank_indices(state["question"], state["context"], state.get("deadline"))
+    STAGE_SECONDS.observe(time.perf_counter() - start, "rerank")
+
+    return {
+        **state,
+        "context": [state["context"][i] for i in order],
+        "sources": [state["sources"][i] for i in order]
+    }
+
+
+@traced("generate")
 def generate_node(state: RAGState) -> RAGState:
     resolved_model = resolve_model_name(state["model_name"])
     logger.info(f"Generation started using model: {resolved_model}")
 
-    generator = Generator(model_name=resolved_model)
-    answer = generator.generate(state["question"], state["context"])
+    generator = get_generator(resolved_model)
+
+    with generation_scheduler.slot(resolved_model, state.get("deadline")) as remaining:
+        answer = generator.generate(
+            state["question"],
+            state["context"],
+            timeout=remaining,
+            sources=state["sources"]
+        )
 
     logger.info("Generation completed")
 
@@ -69,32 +189,202 @@ def generate_node(state: RAGState) -> RAGState:
     }
 
 
-graph = StateGraph(RAGState)
+# ---------- Pipeline ----------
+def build_graph(with_rerank: bool):
+    from langgraph.graph import StateGraph, END
 
-graph.add_node("retrieve", retrieve_node)
-graph.add_node("generate", generate_node)
+    graph = StateGraph(RAGState)
 
-graph.set_entry_point("retrieve")
-graph.add_edge("retrieve", "generate")
-graph.add_edge("generate", END)
+    graph.add_node("retrieve", retrieve_node)
+    graph.add_node("refuse", refuse_node)
+    graph.add_node("generate", generate_node)
 
-rag_app = graph.compile()
+    graph.set_entry_point("retrieve")
+    if with_rerank:
+        graph.add_node("rerank", rerank_node)
+        graph.add_edge("rerank", "generate")
+    graph.add_conditional_edges(
+        "retrieve",
+        route_after_retrieve,
+        {"refuse": "refuse", "answer": "rerank" if with_rerank else "generate"}
+    )
+    graph.add_edge("refuse", END)
+    graph.add_edge("generate", END)
 
+    return graph.compile()
 
-def run_rag(question: str, model_name: str = DEFAULT_MODEL_NAME) -> str:
+
+def init_pipeline() -> None:
+    """Builds the retriever, caches and compiled graph once (thread-safe)."""
+    global retriever, reranker, retrieval_batcher, answer_cache, rag_app
+
+    if rag_app is not None:
+        return
+
+    with _init_lock:
+        if rag_app is not None:
+            return
+
+        start = time.perf_counter()
+
+        # With reranking, retrieval over-fetches and the rerank node picks
+        # the chunks that reach the prompt
+        retriever = Retriever(top_k=RERANK_CANDIDATES if RERANK_ENABLED else RERANK_TOP_N)
+        reranker = CrossEncoderReranker() if RERANK_ENABLED else None
+
+        # Concurrent requests (one thread each) share embedding passes and vector queries
+        retrieval_batcher = RetrievalBatcher(retriever, sourced=True) if RETRIEVAL_BATCHING else None
+
+        # Shares the retriever's query encoder: a cache miss leaves the query
+        # vector in the encoder's LRU, so retrieval does not encode it again
+        answer_cache = AnswerCache(embed_fn=retriever.encoder.encode) if ANSWER_CACHE_ENABLED else None
+
+        rag_app = build_graph(with_rerank=reranker is not None)
+
+        logger.info(f"RAG pipeline ready in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+
+def warm_up_pipeline() -> None:
+    """
+    Builds the pipeline and loads the query encoder, the prompt's token
+    counter and the reranker model, so the first question doesn't pay for
+    them. Failures only log: the components load lazily again on first use.
+    """
+    init_pipeline()
+
+    start = time.perf_counter()
+    try:
+        retriever.encoder.encode("warm up")
+    except Exception as e:
+        logger.warning(f"Query encoder warm-up failed: {e}")
+    token_counter()
+    if reranker is not None:
+        reranker.model
+
+    logger.info(f"Pipeline models warmed up in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+
+def run_rag(
+    question: str,
+    model_name: str = DEFAULT_MODEL_NAME,
+    deadline: Optional[float] = None
+) -> str:
+    """
+    Answers one question. `deadline` (time.monotonic()) bounds the whole
+    request, including time spent queueing for retrieval and generation.
+    May raise SchedulerRejected / SchedulerTimeout under overload.
+    """
     logger.info(f"RAG pipeline invoked | model={model_name}")
+    init_pipeline()
+
+    resolved_model = resolve_model_name(model_name)
+
+    if answer_cache is not None:
+        with span("answer_cache") as cache_span:
+            cached = answer_cache.get(question, resolved_model)
+            cache_span.set_attribute("hit", cached is not None)
+        ANSWER_CACHE.inc("miss" if cached is None else "hit")
+        if cached is not None:
+            logger.info("Answer served from cache")
+            return cached
+
+    start = time.perf_counter()
 
     result = rag_app.invoke({
         "question": question,
         "context": [],
+        "scores": [],
+        "sources": [],
         "answer": "",
-        "model_name": model_name
+        "model_name": model_name,
+        "deadline": deadline
     })
 
+    cache_answer(question, resolved_model, result["answer"], start)
+
     logger.info("RAG pipeline completed")
     return result["answer"]
 
 
+def stream_rag(
+    question: str,
+    model_name: str = DEFAULT_MODEL_NAME,
+    deadline: Optional[float] = None
+) -> Iterator[str]:
+    """
+    Streaming variant of run_rag: retrieval runs first, then answer
+    tokens are yielded as the model produces them.
+    May raise ResponseReplaced (see Generator.stream).
+    """
+    logger.info(f"Streaming RAG pipeline invoked | model={model_name}")
+    init_pipeline()
+
+    resolved_model = resolve_model_name(model_name)
+
+    if answer_cache is not None:
+        with span("answer_cache") as cache_span:
+            cached = answer_cache.get(question, resolved_model)
+            cache_span.set_attribute("hit", cached is not None)
+        ANSWER_CACHE.inc("miss" if cached is None else "hit")
+        if cached is not None:
+            logger.info("Answer served from cache")
+            yield cached
+            return
+
+    start = time.perf_counter()
+
+    state = retrieve_node({
+        "question": question,
+        "context": [],
+        "scores": [],
+        "sources": [],
+        "answer": "",
+        "model_name": model_name,
+        "deadline": deadline
+    })
+
+    if route_after_retrieve(state) == "refuse":
+        answer = refuse_node(state)["answer"]
+        yield answer
+        cache_answer(question, resolved_model, answer, start)
+        return
+    if reranker is not None:
+        state = rerank_node(state)
+
+    logger.info(f"Streaming generation using model: {resolved_model}")
+
+    generator = get_generator(resolved_model)
+    tokens = []
+
+    # Not made current: the stream is resumed on different threads
+    generate_span = start_span("generate", model=resolved_model)
+    error = None
+    try:
+        with generation_scheduler.slot(resolved_model, deadline) as remaining:
+            answer = generator.stream(state["question"], state["context"], timeout=remaining, sources=state["sources"])
+            for token in answer:
+                tokens.append(token)
+                yield token
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        generate_span.end(error)
+
+    cache_answer(question, resolved_model, "".join(tokens), start)
+
+    logger.info("Streaming RAG pipeline completed")
+
+
+def cache_answer(question: str, model_name: str, answer: str, start: float) -> None:
+    """Stores a finished answer; error messages are never cached."""
+    if answer_cache is None or not answer.strip() or answer in ERROR_MESSAGES:
+        return
+
+    latency_ms = (time.perf_counter() - start) * 1000
+    answer_cache.put(question, model_name, answer, latency_ms=latency_ms)
+
+
 if __name__ == "__main__":
     query = "What are the library working hours?"
 
@@ -0,0 +1,137 @@
+# src/retrieval/batcher.py
+
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+import queue
+import threading
+import time
+
+from src.config import (
+    RETRIEVAL_BATCH_MAX_SIZE,
+    RETRIEVAL_BATCH_WAIT_MS,
+    RETRIEVAL_QUEUE_DEPTH,
+)
+from src.utils.logger import get_logger
+from src.utils.metrics import TIMEOUTS
+
+logger = get_logger(__name__)
+
+
+class BatcherOverloaded(RuntimeError):
+    """The retrieval queue is full; the request should be rejected."""
+
+
+class RetrievalBatcher:
+    """
+    Coalesces concurrent retrievals into batches.
+
+    Callers block in retrieve() while a single worker thread collects
+    the queries that arrive within `max_wait_ms` (up to `max_batch_size`),
+    runs one Retriever.retrieve_many() call for them — one embedding
+    pass, one vector query — and hands each caller its own result
+    (retrieve_many_scored() and (doc, similarity) pairs with scored=True,
+    retrieve_many_sourced() and (doc, similarity, source) with sourced=True).
+    """
+
+    def __init__(
+        self,
+        retriever,
+        max_batch_size: int = RETRIEVAL_BATCH_MAX_SIZE,
+        max_wait_ms: float = RETRIEVAL_BATCH_WAIT_MS,
+        max_queue_depth: int = RETRIEVAL_QUEUE_DEPTH,
+        scored: bool = False,
+        sourced: bool = False
+    ):
+        self.retriever = retriever
+        self.scored = scored
+        self.sourced = sourced
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue: "queue.Queue[Tuple[str, Future]]" = queue.Queue(maxsize=max_queue_depth)
+
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+
+        self.batches = 0
+        self.queries = 0
+        self.largest_batch = 0
+        self.rejected = 0
+
+    def retrieve(self, query: str, timeout: Optional[float] = None) -> list:
+        future: Future = Future()
+
+        try:
+            self._queue.put_nowait((query, future))
+        except queue.Full:
+            self.rejected += 1
+            logger.warning("Retrieval queue full — rejecting request")
+            raise BatcherOverloaded("retrieval queue is full")
+
+        self._ensure_worker()
+        try:
+            return future.result(timeout=timeout)
+        except TimeoutError:
+            TIMEOUTS.inc("retrieve")
+            raise
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None:
+            return
+        with self._worker_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._run, name="retrieval-batcher", daemon=True
+                )
+                self._worker.start()
+
+    def _collect(self) -> List[Tuple[str, Future]]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    # Window closed: still take whatever is already waiting
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            queries = [q for q, _ in batch]
+
+            try:
+                if self.sourced:
+                    results = self.retriever.retrieve_many_sourced(queries)
+                elif self.scored:
+                    results = self.retriever.retrieve_many_scored(queries)
+                else:
+                    results = self.retriever.retrieve_many(queries)
+            except Exception as e:
+                logger.exception("Batched retrieval failed")
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), docs in zip(batch, results):
+                future.set_result(docs)
+
+            self.batches += 1
+            self.queries += len(batch)
+            self.largest_batch = max(self.largest_batch, len(batch))
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "queue_depth": self._queue.qsize(),
+            "batches": self.batches,
+            "queries": self.queries,
+            "average_batch_size": self.queries / self.batches if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "rejected": self.rejected
+        }
@@ -0,0 +1,211 @@
+# src/retrieval/filters.py
+
+"""
+Metadata filters detected from the question.
+
+An alias index is built once from the extractor tables (ACADEMIC_FILES,
+ADMIN_REGULATION_FILES):
+- programs: "B.Tech", "M.Tech", "MBA", "MCA", "M.Sc", "PhD", plus "UG"/"PG"
+- departments: file codes (CSE, ECE, "datascience", "iot", ...) and
+  department names ("computer science and engineering", "data science", ...)
+
+A question naming a program and/or department is restricted to the
+matching sources, dropping the curricula and regulations of every other
+program. Regulations stay in scope for every department of their
+program, and sections without a program (fees, campus, faculty, ...)
+stay in scope of every filter: "head of the CSE department" is answered
+by faculty_staff, not by the CSE curriculum.
+
+Filters are {metadata key: allowed values}, e.g. {"source": [...]}.
+"""
+
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Set
+import os
+import re
+
+Filters = Dict[str, List[str]]
+
+# Codes this short are ordinary words in lowercase ("it", "me"),
+# so they only match when written in capitals
+MAX_CASED_CODE = 2
+
+# Common shorthand not derivable from the tables
+DEPARTMENT_SHORTHAND = {
+    "mech": "me",
+    "cs": "cse",
+    "ai": "datascience",
+}
+
+
+def _normalize(text: str) -> str:
+    """Lowercase, no dots or dashes: "B.Tech." → "btech", "M. Tech" → "m tech"."""
+    text = re.sub(r"[.]", "", text.lower())
+    return re.sub(r"[\s\-–,]+", " ", text).strip()
+
+
+def _program_key(program: str) -> str:
+    return _normalize(program.split()[-1]).replace(" ", "")
+
+
+def _source(filename: str) -> str:
+    return os.path.splitext(filename)[0]
+
+
+class AliasIndex:
+    """
+    alias → sources, for programs and departments.
+    """
+
+    def __init__(self, academic_files, regulation_files, general_sources: Iterable[str] = ()):
+        self.general = set(general_sources)
+        self.programs: Dict[str, Set[str]] = {}
+        self.departments: Dict[str, Set[str]] = {}
+        self.cased_departments: Dict[str, Set[str]] = {}
+        self.regulations: Dict[str, Set[str]] = {}   # program key → regulation sources
+        self.program_of: Dict[str, str] = {}         # source → program key
+        self.levels: Dict[str, str] = {}             # program key → "UG" / "PG"
+
+        for program, department, filename in academic_files:
+            source = _source(filename)
+            key = _program_key(program)
+            self.program_of[source] = key
+            self._add_program(program, key, source)
+            self._add_department(department, source)
+
+        for program, _, filename in regulation_files:
+            source = _source(filename)
+            key = _program_key(program)
+            self.program_of[source] = key
+            self.regulations.setdefault(key, set()).add(source)
+            self._add_program(program, key, source)
+
+        self._program_pattern = self._pattern(self.programs)
+        self._department_pattern = self._pattern(self.departments)
+        self._cased_pattern = self._pattern(self.cased_departments)
+
+    @staticmethod
+    def _pattern(aliases: Dict[str, Set[str]]) -> Optional[re.Pattern]:
+        if not aliases:
+            return None
+        # Longest first, so "data science" wins over "science"
+        alternation = "|".join(re.escape(a) for a in sorted(aliases, key=len, reverse=True))
+        return re.compile(rf"\b(?:{alternation})\b")
+
+    def _add(self, table: Dict[str, Set[str]], alias: str, source: str) -> None:
+        table.setdefault(alias, set()).add(source)
+
+    def _add_program(self, program: str, key: str, source: str) -> None:
+        self._add(self.programs, key, source)
+        if len(key) > 2 and key[1:] in ("tech", "sc"):
+            self._add(self.programs, f"{key[0]} {key[1:]}", source)   # "b tech"
+
+        # "UG B.Tech" → UG; regulations say "B.Tech" and inherit the level
+        if " " in program:
+            self.levels[key] = program.split()[0]
+        level = self.levels.get(key)
+        if level == "UG":
+            self._add(self.programs, "ug", source)
+            self._add(self.programs, "undergraduate", source)
+        elif level == "PG":
+            self._add(self.programs, "pg", source)
+            self._add(self.programs, "postgraduate", source)
+
+    def _add_department(self, department: str, source: str) -> None:
+        # ug_btech_cse → ["cse"], pg_mtech_cse_datascience → ["cse", "datascience"],
+        # mba_ib → ["ib"]
+        parts = source.split("_")
+        if parts[0] == "ug":
+            codes = [" ".join(parts[2:])]
+        else:
+            codes = parts[2:] if parts[0] == "pg" else parts[1:]
+
+        names = [department]
+        if "–" in department:
+            prefix, name = (p.strip() for p in department.split("–", 1))
+            codes.insert(0, prefix.lower())
+            names = [name]
+
+        for code in codes:
+            if len(code) <= MAX_CASED_CODE:
+                self._add(self.cased_departments, code.upper(), source)
+            else:
+                self._add(self.departments, code, source)
+
+        for name in names:
+            alias = _normalize(name)
+            if " " in alias:
+                self._add(self.departments, alias, source)
+            # "computer science and engineering" → "computer science"
+            short = re.sub(r"( and)? engineering$", "", alias)
+            if short != alias:
+                self._add(self.departments, short, source)
+
+        for short, code in DEPARTMENT_SHORTHAND.items():
+            if code in codes:
+                self._add(self.departments, short, source)
+
+    def _matches(self, pattern: Optional[re.Pattern], text: str, table: Dict[str, Set[str]]) -> Set[str]:
+        if pattern is None:
+            return set()
+        sources: Set[str] = set()
+        for match in pattern.finditer(text):
+            sources |= table[match.group(0)]
+        return sources
+
+    def detect(self, question: str) -> Optional[Filters]:
+        """
+        Sources the question is about, or None when it names no
+        program or department (or the names contradict each other).
+        """
+        text = _normalize(question)
+        programs = self._matches(self._program_pattern, text, self.programs)
+        departments = (
+            self._matches(self._department_pattern, text, self.departments)
+            | self._matches(self._cased_pattern, question.replace(".", ""), self.cased_departments)
+        )
+
+        if departments:
+            for key in {self.program_of[s] for s in departments}:
+                departments |= self.regulations.get(key, set())
+
+        if programs and departments:
+            sources = programs & departments or programs
+        else:
+            sources = programs or departments
+
+        if not sources:
+            return None
+        return {"source": sorted(sources | self.general)}
+
+
+@lru_cache(maxsize=1)
+def alias_index() -> AliasIndex:
+    # Imported here: the extractor tables pull in PyMuPDF
+    from src.data_extraction.extract_academics import ACADEMIC_FILES
+    from src.data_extraction.extract_admin import ADMIN_REGULATION_FILES
+    from src.data_extraction.run_extraction import build_jobs
+    from src.embeddings.embedder import header_metadata
+
+    general = [
+        meta["source"] for meta in (header_metadata(job.header) for job in build_jobs())
+        if "program" not in meta
+    ]
+    return AliasIndex(ACADEMIC_FILES, ADMIN_REGULATION_FILES, general)
+
+
+def detect_filters(question: str) -> Optional[Filters]:
+    return alias_index().detect(question)
+
+
+def where_clause(filters: Filters) -> dict:
+    """Chroma `where` for a filter dict."""
+    clauses = [{key: {"$in": list(values)}} for key, values in sorted(filters.items())]
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+def filter_key(filters: Optional[Filters]):
+    """Hashable form, for grouping queries with the same filter."""
+    if not filters:
+        return None
+    return tuple((key, tuple(sorted(values))) for key, values in sorted(filters.items()))
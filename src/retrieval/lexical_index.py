@@ -0,0 +1,152 @@
+# src/retrieval/lexical_index.py
+
+"""
+BM25 inverted index, stored as flat arrays next to the numpy read index.
+
+MiniLM embeds exact tokens poorly: course codes (CSUC106), scholarship
+names, fee amounts (32,101), clause numbers (4.1). BM25 over the same
+chunks catches those; the Retriever fuses both rankings (RRF).
+
+Postings are CSR-style arrays with the BM25 weight of every (term, chunk)
+pair precomputed at build time, so a query is one slice-and-add per
+query term plus a top-k over the score vector. Rows are the rows of the
+numpy index (same order), so metadata filters reuse its partitions.
+
+Files (inside the numpy index directory):
+    lexical_terms.json     vocabulary, sorted; position = term id
+    lexical_offsets.npy    (V + 1,) int64 start of each term's postings
+    lexical_rows.npy       (P,) uint32 chunk rows, grouped by term
+    lexical_weights.npy    (P,) float32 BM25 weight of each posting
+"""
+
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+import json
+import math
+import os
+import re
+
+import numpy as np
+
+# Words, codes and numbers; "32,101" and "32101" are the same token,
+# "4.1" keeps its dot
+TOKEN = re.compile(r"[a-z0-9]+(?:[.,][0-9]+)*")
+
+# "it" and "me" stay: they are department codes (IT, ME)
+STOPWORDS = frozenset("""
+a an and are as at be by can do does for from has have how i in is its
+my of on or the their there this to was what when where which who why
+will with you your
+""".split())
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    tokens = []
+    for token in TOKEN.findall(text.lower()):
+        token = token.replace(",", "")
+        if token not in STOPWORDS:
+            tokens.append(token)
+    return tokens
+
+
+# ---------- Build ----------
+def write_lexical_index(path: str, documents: Iterable[str], k1: float = BM25_K1, b: float = BM25_B) -> None:
+    """Writes the lexical_* files for `documents` (numpy index row order) into `path`."""
+    term_ids: Dict[str, int] = {}
+    postings: List[List[Tuple[int, int]]] = []
+    lengths: List[int] = []
+
+    for row, text in enumerate(documents):
+        counts = Counter(tokenize(text))
+        lengths.append(sum(counts.values()))
+        for term, tf in counts.items():
+            term_id = term_ids.setdefault(term, len(term_ids))
+            if term_id == len(postings):
+                postings.append([])
+            postings[term_id].append((row, tf))
+
+    n = len(lengths)
+    doc_lengths = np.asarray(lengths, dtype=np.float32)
+    avg_length = float(doc_lengths.mean()) if n else 0.0
+    norms = k1 * (1 - b + b * doc_lengths / avg_length) if n else doc_lengths
+
+    terms = sorted(term_ids)
+    offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+    for i, term in enumerate(terms):
+        offsets[i + 1] = offsets[i] + len(postings[term_ids[term]])
+
+    rows = np.empty(offsets[-1], dtype=np.uint32)
+    weights = np.empty(offsets[-1], dtype=np.float32)
+    for i, term in enumerate(terms):
+        entries = postings[term_ids[term]]
+        posting_rows = np.fromiter((r for r, _ in entries), dtype=np.uint32, count=len(entries))
+        tfs = np.fromiter((tf for _, tf in entries), dtype=np.float32, count=len(entries))
+        idf = math.log(1 + (n - len(entries) + 0.5) / (len(entries) + 0.5))
+        rows[offsets[i]:offsets[i + 1]] = posting_rows
+        weights[offsets[i]:offsets[i + 1]] = idf * tfs * (k1 + 1) / (tfs + norms[posting_rows])
+
+    with open(os.path.join(path, "lexical_terms.json"), "w", encoding="utf-8") as f:
+        json.dump(terms, f)
+    np.save(os.path.join(path, "lexical_offsets.npy"), offsets)
+    np.save(os.path.join(path, "lexical_rows.npy"), rows)
+    np.save(os.path.join(path, "lexical_weights.npy"), weights)
+
+
+def has_lexical_index(path: str) -> bool:
+    return os.path.exists(os.path.join(path, "lexical_terms.json"))
+
+
+# ---------- Read ----------
+class LexicalIndex:
+    """
+    BM25 top-k over memory-mapped postings.
+    """
+
+    def __init__(self, path: str, size: int, mmap: bool = True):
+        mode = "r" if mmap else None
+        self.size = size
+
+        with open(os.path.join(path, "lexical_terms.json"), "r", encoding="utf-8") as f:
+            self.term_ids = {term: i for i, term in enumerate(json.load(f))}
+
+        self.offsets = np.load(os.path.join(path, "lexical_offsets.npy"), mmap_mode=mode)
+        self.rows = np.load(os.path.join(path, "lexical_rows.npy"), mmap_mode=mode)
+        self.weights = np.load(os.path.join(path, "lexical_weights.npy"), mmap_mode=mode)
+
+    def scores(self, query: str) -> np.ndarray:
+        scores = np.zeros(self.size, dtype=np.float32)
+        for term in set(tokenize(query)):
+            term_id = self.term_ids.get(term)
+            if term_id is None:
+                continue
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            # a term lists each row once, so fancy-index += is safe
+            scores[self.rows[start:end]] += self.weights[start:end]
+        return scores
+
+    def search(
+        self,
+        query: str,
+        k: int,
+        runs: Optional[List[Tuple[int, int]]] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Rows matching at least one query term, best BM25 score first,
+        restricted to `runs` (row ranges from NumpyVectorIndex.runs) if given.
+        """
+        scores = self.scores(query)
+
+        if runs is not None:
+            allowed = np.zeros(self.size, dtype=bool)
+            for start, stop in runs:
+                allowed[start:stop] = True
+            scores[~allowed] = 0.0
+
+        matched = np.flatnonzero(scores)
+        if len(matched) > k:
+            matched = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+        order = np.argsort(-scores[matched], kind="stable")
+        return matched[order], scores[matched[order]]
@@ -0,0 +1,278 @@
+# src/retrieval/numpy_index.py
+
+"""
+In-process exact vector index for the read path.
+
+The whole corpus is a few thousand chunks, so exact cosine top-k is one
+matrix multiply. Embeddings live in a contiguous (n, dim) .npy matrix and
+chunk texts in one UTF-8 blob with an offsets array; both are memory-mapped,
+so loading is near-instant and the pages are shared between processes.
+
+Rows are grouped by source, so a metadata filter on "source" selects a
+few contiguous slices of the matrix (one partition per source) and
+filtered search only multiplies those, without copying.
+
+Layout of NUMPY_INDEX_PATH:
+    embeddings.npy   (n, dim) float32 or float16, L2-normalized rows
+    offsets.npy      (n + 1,) int64 byte offsets into documents.bin
+    documents.bin    UTF-8 chunk texts, back to back
+    ids.json         chunk ids, same order as the rows
+    metadatas.json   chunk metadata, same order as the rows
+    meta.json        dtype, dim, count, source index version
+    lexical_*        BM25 postings over the same rows (see lexical_index)
+"""
+
+from typing import Dict, List, Optional, Tuple
+import json
+import os
+import shutil
+
+import numpy as np
+
+from src.embeddings.index_version import read_index_version
+from src.retrieval.lexical_index import LexicalIndex, has_lexical_index, write_lexical_index
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+NUMPY_INDEX_PATH = os.environ.get(
+    "SAGE_NUMPY_INDEX_PATH",
+    os.path.join(BASE_DIR, "data", "vector_db", "numpy_index")
+)
+
+
+# ---------- Build ----------
+def write_numpy_index(
+    path: str,
+    ids: List[str],
+    documents: List[str],
+    embeddings: np.ndarray,
+    dtype: str = "float32",
+    index_version: Optional[str] = None,
+    metadatas: Optional[List[Dict[str, str]]] = None
+) -> None:
+    """Writes an index directory atomically (build in tmp, then swap)."""
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+
+    if metadatas is not None:
+        order = sorted(range(len(ids)), key=lambda i: (metadatas[i].get("source", ""), ids[i]))
+        ids = [ids[i] for i in order]
+        documents = [documents[i] for i in order]
+        metadatas = [metadatas[i] for i in order]
+        embeddings = embeddings[order] if len(order) else embeddings
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    embeddings = (embeddings / norms).astype(dtype)
+
+    tmp_path = f"{path}.tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    np.save(os.path.join(tmp_path, "embeddings.npy"), np.ascontiguousarray(embeddings))
+
+    offsets = np.zeros(len(documents) + 1, dtype=np.int64)
+    with open(os.path.join(tmp_path, "documents.bin"), "wb") as f:
+        for i, doc in enumerate(documents):
+            data = doc.encode("utf-8")
+            f.write(data)
+            offsets[i + 1] = offsets[i] + len(data)
+    np.save(os.path.join(tmp_path, "offsets.npy"), offsets)
+
+    write_lexical_index(tmp_path, documents)
+
+    with open(os.path.join(tmp_path, "ids.json"), "w", encoding="utf-8") as f:
+        json.dump(list(ids), f)
+
+    if metadatas is not None:
+        with open(os.path.join(tmp_path, "metadatas.json"), "w", encoding="utf-8") as f:
+            json.dump(metadatas, f)
+
+    with open(os.path.join(tmp_path, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "count": len(documents),
+            "dim": int(embeddings.shape[1]) if len(documents) else 0,
+            "dtype": dtype,
+            "index_version": index_version if index_version is not None else read_index_version()
+        }, f)
+
+    shutil.rmtree(path, ignore_errors=True)
+    os.rename(tmp_path, path)
+
+
+def export_from_chroma(
+    collection,
+    path: str = NUMPY_INDEX_PATH,
+    dtype: str = "float32",
+    page_size: int = 5000
+) -> int:
+    """Copies ids, documents, metadata and stored embeddings out of a Chroma collection."""
+    ids, documents, metadatas, embeddings = [], [], [], []
+
+    offset = 0
+    while True:
+        page = collection.get(
+            include=["documents", "metadatas", "embeddings"],
+            limit=page_size,
+            offset=offset
+        )
+        if not page["ids"]:
+            break
+        ids.extend(page["ids"])
+        documents.extend(page["documents"])
+        metadatas.extend(meta or {} for meta in page["metadatas"])
+        embeddings.append(np.asarray(page["embeddings"], dtype=np.float32))
+        offset += len(page["ids"])
+
+    matrix = np.concatenate(embeddings) if embeddings else np.zeros((0, 0), dtype=np.float32)
+    write_numpy_index(path, ids, documents, matrix, dtype=dtype, metadatas=metadatas)
+
+    logger.info(f"Exported {len(ids)} chunks to numpy index ({dtype}) at {path}")
+    return len(ids)
+
+
+# ---------- Read ----------
+class NumpyVectorIndex:
+    """
+    Exact cosine top-k over a memory-mapped embedding matrix.
+    """
+
+    def __init__(self, path: str = NUMPY_INDEX_PATH, mmap: bool = True):
+        self.path = path
+        mode = "r" if mmap else None
+
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+
+        self.embeddings = np.load(os.path.join(path, "embeddings.npy"), mmap_mode=mode)
+        self.offsets = np.load(os.path.join(path, "offsets.npy"), mmap_mode=mode)
+
+        with open(os.path.join(path, "ids.json"), "r", encoding="utf-8") as f:
+            self.ids = json.load(f)
+
+        # Indexes exported before metadata was stored can't be filtered
+        self.metadatas: Optional[List[Dict[str, str]]] = None
+        metadatas_path = os.path.join(path, "metadatas.json")
+        if os.path.exists(metadatas_path):
+            with open(metadatas_path, "r", encoding="utf-8") as f:
+                self.metadatas = json.load(f)
+        else:
+            logger.warning("Numpy index has no metadata, filters are ignored — re-export it")
+        self._runs_cache: Dict[tuple, List[Tuple[int, int]]] = {}
+
+        self.lexical: Optional[LexicalIndex] = None
+        if has_lexical_index(path):
+            self.lexical = LexicalIndex(path, len(self.ids), mmap=mmap)
+
+        docs_path = os.path.join(path, "documents.bin")
+        if os.path.getsize(docs_path):
+            self._documents = np.memmap(docs_path, dtype=np.uint8, mode="r") if mmap \
+                else np.fromfile(docs_path, dtype=np.uint8)
+        else:
+            self._documents = np.zeros(0, dtype=np.uint8)
+
+        if self.meta.get("index_version") != read_index_version():
+            logger.warning("Numpy index is older than the Chroma collection — re-export it")
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def document(self, i: int) -> str:
+        start, end = int(self.offsets[i]), int(self.offsets[i + 1])
+        return self._documents[start:end].tobytes().decode("utf-8")
+
+    def runs(self, filters: Dict[str, List[str]]) -> List[Tuple[int, int]]:
+        """
+        Row ranges [start, stop) whose metadata matches every filter key.
+        Source filters hit whole partitions, so there are few ranges.
+        """
+        key = tuple((k, tuple(sorted(v))) for k, v in sorted(filters.items()))
+        cached = self._runs_cache.get(key)
+        if cached is not None:
+            return cached
+
+        runs: List[Tuple[int, int]] = []
+        for i, meta in enumerate(self.metadatas):
+            if all(meta.get(k) in values for k, values in filters.items()):
+                if runs and runs[-1][1] == i:
+                    runs[-1] = (runs[-1][0], i + 1)
+                else:
+                    runs.append((i, i + 1))
+
+        self._runs_cache[key] = runs
+        return runs
+
+    def _scores(self, queries: np.ndarray, start: int, stop: int, block: int = 4096) -> np.ndarray:
+        if self.embeddings.dtype == np.float32:
+            return queries @ self.embeddings[start:stop].T
+
+        # numpy has no BLAS path for float16: upcast block by block so the
+        # matmul stays in sgemm without materializing a float32 copy
+        scores = np.empty((len(queries), stop - start), dtype=np.float32)
+        for offset in range(start, stop, block):
+            end = min(offset + block, stop)
+            chunk = np.asarray(self.embeddings[offset:end], dtype=np.float32)
+            scores[:, offset - start:end - start] = queries @ chunk.T
+        return scores
+
+    def search(
+        self,
+        queries: np.ndarray,
+        k: int,
+        filters: Optional[Dict[str, List[str]]] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        queries: (q, dim) unit vectors.
+        filters: {metadata key: allowed values}, searched over the
+        matching rows only (ignored by indexes without metadata).
+        Returns (indices, cosine scores), each (q, k'), best first,
+        with k' = min(k, matching rows).
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+
+        if self.metadatas is None:
+            filters = None
+
+        runs = self.runs(filters) if filters else [(0, len(self.ids))]
+        n = sum(stop - start for start, stop in runs)
+        k = min(k, n)
+        if k == 0:
+            empty = np.zeros((len(queries), 0))
+            return empty.astype(np.int64), empty.astype(np.float32)
+
+        if len(runs) == 1:
+            scores = self._scores(queries, *runs[0])
+        else:
+            scores = np.concatenate([self._scores(queries, *run) for run in runs], axis=1)
+
+        if k < n:
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            top = np.broadcast_to(np.arange(n), (len(queries), n))
+
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+
+        # Positions in the concatenated runs → row numbers
+        if runs[0][0] != 0 or len(runs) > 1:
+            rows = np.concatenate([np.arange(start, stop) for start, stop in runs])
+            top = rows[top]
+
+        return top, np.take_along_axis(top_scores, order, axis=1).astype(np.float32)
+
+
+# ---------- Run ----------
+if __name__ == "__main__":
+    import argparse
+    import chromadb
+
+    from src.retrieval.retriever import VECTOR_DB_PATH, COLLECTION_NAME
+
+    parser = argparse.ArgumentParser(description="Export the Chroma collection to a numpy index")
+    parser.add_argument("--dtype", choices=["float32", "float16"], default="float32")
+    args = parser.parse_args()
+
+    client = chromadb.PersistentClient(path=VECTOR_DB_PATH)
+    count = export_from_chroma(client.get_collection(COLLECTION_NAME), dtype=args.dtype)
+    print(f"✅ Exported {count} chunks → {NUMPY_INDEX_PATH}")
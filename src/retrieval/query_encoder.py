@@ -0,0 +1,104 @@
+# src/retrieval/query_encoder.py
+
+from collections import OrderedDict
+from typing import Dict, List
+import threading
+
+import numpy as np
+
+from src.config import EMBEDDING_MODEL, QUERY_CACHE_SIZE
+from src.utils.clean_text import normalize_query
+from src.utils.logger import get_logger
+from src.utils.tracing import span
+
+logger = get_logger(__name__)
+
+
+class QueryEncoder:
+    """
+    MiniLM query encoder owned by the Retriever.
+
+    - Loads the model lazily on first use
+    - LRU cache of query vectors keyed by normalized text
+    - encode_many() encodes all cache misses in one forward pass
+    """
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL, cache_size: int = QUERY_CACHE_SIZE):
+        self.model_name = model_name
+        self.cache_size = cache_size
+
+        self._model = None
+        self._model_lock = threading.Lock()
+
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    from sentence_transformers import SentenceTransformer
+                    logger.info(f"Loading query encoder: {self.model_name}")
+                    with span("load_model", model=self.model_name):
+                        self._model = SentenceTransformer(self.model_name)
+        return self._model
+
+    def encode(self, query: str) -> np.ndarray:
+        return self.encode_many([query])[0]
+
+    def encode_many(self, queries: List[str]) -> np.ndarray:
+        """
+        Returns a (len(queries), dim) float32 matrix of unit vectors.
+        The normalized question is only the cache key; the model embeds
+        the question as asked ("M.Tech", "Rs. 30,000"), like the documents.
+        """
+        keys = [normalize_query(q) for q in queries]
+        found: Dict[str, np.ndarray] = {}
+
+        with self._cache_lock:
+            for key in keys:
+                vector = self._cache.get(key)
+                if vector is not None:
+                    self._cache.move_to_end(key)
+                    found[key] = vector
+
+        # First spelling of each missing key
+        missing: Dict[str, str] = {}
+        for key, query in zip(keys, queries):
+            if key not in found and key not in missing:
+                missing[key] = query.strip()
+
+        if missing:
+            vectors = self.model.encode(
+                list(missing.values()),
+                batch_size=max(32, len(missing)),
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+                show_progress_bar=False
+            ).astype(np.float32, copy=False)
+
+            with self._cache_lock:
+                for key, vector in zip(missing, vectors):
+                    vector.flags.writeable = False
+                    found[key] = vector
+                    self._cache[key] = vector
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        with self._cache_lock:
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+
+        return np.stack([found[k] for k in keys])
+
+    def stats(self) -> Dict[str, int]:
+        with self._cache_lock:
+            return {
+                "entries": len(self._cache),
+                "hits": self.hits,
+                "misses": self.misses
+            }
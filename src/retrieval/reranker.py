@@ -0,0 +1,155 @@
+# src/retrieval/reranker.py
+
+from typing import Callable, Dict, Iterable, List, Optional
+import threading
+import time
+
+import numpy as np
+
+from src.config import (
+    GENERATION_MIN_SECONDS,
+    RERANK_EXPECTED_SECONDS,
+    RERANK_MODEL,
+    RERANK_TOKEN_BUDGET,
+    RERANK_TOP_N,
+)
+from src.utils.logger import get_logger
+from src.utils.tracing import span
+
+logger = get_logger(__name__)
+
+# Weight of the latest measurement in the expected rerank cost
+LATENCY_SMOOTHING = 0.2
+
+
+class CrossEncoderReranker:
+    """
+    Re-orders retrieved chunks by a cross-encoder score of
+    (question, chunk) and keeps the best `top_n` within `token_budget`.
+
+    - Loads the model lazily on first use; if it can't be loaded, chunks
+      keep their retrieval order for the life of the process
+    - Scores all candidates of a question in one batched predict() call
+    - Skipped (retrieval order kept) when the request deadline leaves
+      less than the expected rerank cost plus GENERATION_MIN_SECONDS
+    """
+
+    def __init__(
+        self,
+        model_name: str = RERANK_MODEL,
+        top_n: int = RERANK_TOP_N,
+        token_budget: int = RERANK_TOKEN_BUDGET,
+        count_tokens: Optional[Callable[[str], int]] = None,
+        expected_seconds: float = RERANK_EXPECTED_SECONDS
+    ):
+        self.model_name = model_name
+        self.top_n = top_n
+        self.token_budget = token_budget
+        self._count_tokens = count_tokens
+
+        self._model = None
+        self._unavailable = False
+        self._model_lock = threading.Lock()
+
+        self._stats_lock = threading.Lock()
+        self.expected_seconds = expected_seconds
+        self.reranked = 0
+        self.skipped = 0
+
+    @property
+    def model(self):
+        if self._model is None and not self._unavailable:
+            with self._model_lock:
+                if self._model is None and not self._unavailable:
+                    try:
+                        from sentence_transformers import CrossEncoder
+                        logger.info(f"Loading reranker: {self.model_name}")
+                        with span("load_model", model=self.model_name):
+                            self._model = CrossEncoder(self.model_name, device="cpu")
+                    except Exception:
+                        logger.exception("Reranker unavailable — keeping retrieval order")
+                        self._unavailable = True
+        return self._model
+
+    @property
+    def count_tokens(self) -> Callable[[str], int]:
+        if self._count_tokens is None:
+            from src.embeddings.embedder import token_counter
+            self._count_tokens = token_counter()
+        return self._count_tokens
+
+    def _has_time(self, deadline: Optional[float]) -> bool:
+        if deadline is None:
+            return True
+        remaining = deadline - time.monotonic()
+        return remaining >= self.expected_seconds + GENERATION_MIN_SECONDS
+
+    def _select(self, docs: List[str], order: Iterable[int]) -> List[int]:
+        """Indices in `order` (best first), up to top_n and token_budget (the first always fits)."""
+        selected: List[int] = []
+        used = 0
+        for i in order:
+            if len(selected) == self.top_n:
+                break
+            tokens = self.count_tokens(docs[i])
+            if selected and used + tokens > self.token_budget:
+                continue
+            selected.append(i)
+            used += tokens
+        return selected
+
+    def _skip(self, docs: List[str], reason: str) -> List[int]:
+        with self._stats_lock:
+            self.skipped += 1
+        logger.debug(f"Rerank skipped ({reason}) | candidates={len(docs)}")
+        return self._select(docs, range(len(docs)))
+
+    def rerank(self, question: str, docs: List[str], deadline: Optional[float] = None) -> List[str]:
+        return [docs[i] for i in self.rerank_indices(question, docs, deadline)]
+
+    def rerank_indices(self, question: str, docs: List[str], deadline: Optional[float] = None) -> List[int]:
+        """
+        Same as rerank(), as indices into `docs`: lets callers keep what
+        belongs to each chunk (its source) even when two chunks' texts match.
+        """
+        if len(docs) <= 1:
+            return list(range(len(docs)))
+
+        if not self._has_time(deadline):
+            return self._skip(docs, "request budget")
+
+        model = self.model
+        if model is None:
+            return self._skip(docs, "no model")
+
+        start = time.perf_counter()
+        try:
+            scores = model.predict(
+                [(question, doc) for doc in docs],
+                batch_size=len(docs),
+                show_progress_bar=False
+            )
+        except Exception:
+            logger.exception("Rerank failed — keeping retrieval order")
+            return self._skip(docs, "error")
+        elapsed = time.perf_counter() - start
+
+        with self._stats_lock:
+            self.reranked += 1
+            self.expected_seconds += LATENCY_SMOOTHING * (elapsed - self.expected_seconds)
+
+        order = np.argsort(-np.asarray(scores, dtype=np.float32), kind="stable")
+        selected = self._select(docs, (int(i) for i in order))
+
+        logger.info(
+            f"Reranked {len(docs)} → {len(selected)} chunks in {elapsed * 1000:.0f} ms"
+        )
+        return selected
+
+    def stats(self) -> Dict[str, float]:
+        with self._stats_lock:
+            return {
+                "reranked": self.reranked,
+                "skipped": self.skipped,
+                "expected_ms": round(self.expected_seconds * 1000, 1)
+            }
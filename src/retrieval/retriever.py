@@ -1,17 +1,72 @@
 # src/retrieval/retriever.py
 
 import os
-from typing import List
-import chromadb
+from typing import Dict, List, Optional, Tuple
+import numpy as np
 
+from src.config import (
+    HYBRID_CANDIDATES,
+    RETRIEVAL_AUTO_FILTER,
+    RETRIEVAL_BACKEND,
+    RETRIEVAL_HYBRID,
+    RETRIEVAL_MIN_SCORE,
+    RETRIEVAL_SCORE_GAP,
+    RRF_K,
+)
+from src.retrieval.filters import Filters, detect_filters, filter_key, where_clause
+from src.retrieval.query_encoder import QueryEncoder
+from src.utils.lazy_import import lazy_import
 from src.utils.logger import get_logger
+from src.utils.tracing import span
 
 logger = get_logger(__name__)
 
+# Loaded when the Chroma backend first opens the collection
+chromadb = lazy_import("chromadb")
+
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
 VECTOR_DB_PATH = os.path.join(BASE_DIR, "data", "vector_db")
 COLLECTION_NAME = "sage_docs"
 
+# (document, cosine similarity to the question)
+ScoredDoc = Tuple[str, float]
+# (doc, similarity, source); source is "" for chunks stored without one
+SourcedDoc = Tuple[str, float, str]
+
+
+# ---------- Relevance Gate ----------
+def distance_to_similarity(distances: np.ndarray, metric: str) -> np.ndarray:
+    """
+    Cosine similarity from a Chroma distance ("hnsw:space"). MiniLM
+    vectors are unit length, so squared L2 is 2 - 2 * cosine.
+    """
+    if metric == "l2":
+        return 1.0 - distances / 2.0
+    if metric in ("cosine", "ip"):
+        return 1.0 - distances
+    raise ValueError(f"Unknown distance metric '{metric}'")
+
+
+def relevance_mask(similarities: np.ndarray, min_score: float, top_k: int, max_gap: float) -> np.ndarray:
+    """
+    similarities: (queries, k), best first, NaN where a query has fewer
+    hits. True for hits that are among the top_k, at least min_score,
+    and within max_gap of the query's best hit.
+    """
+    with np.errstate(invalid="ignore"):
+        mask = (similarities >= min_score) & (similarities >= similarities[:, :1] - max_gap)
+    mask[:, top_k:] = False
+    return mask
+
+
+def _padded(rows: List[List[float]]) -> np.ndarray:
+    width = max((len(r) for r in rows), default=0)
+    matrix = np.full((len(rows), width), np.nan, dtype=np.float32)
+    for i, row in enumerate(rows):
+        matrix[i, :len(row)] = row
+    return matrix
+
+
 
 class Retriever:
     """
@@ -19,16 +74,50 @@ class Retriever:
 
     Features:
     - top_k results
-    - relevance threshold check to avoid hallucination
+    - relevance gate on cosine similarity (threshold + score gap) to
+      avoid hallucination; *_scored() variants return the similarities,
+      *_sourced() ones also each chunk's source
+    - own query encoder with an LRU cache of query vectors
+    - retrieve_many() for batches of questions in one Chroma call
+    - backend="numpy" serves reads from an in-process NumpyVectorIndex
+    - metadata filters, given or detected from the question (auto_filter),
+      restrict the search to the matching sources
+    - hybrid=True fuses the vector hits with BM25 over the exported read
+      index (reciprocal rank fusion)
     """
 
-    def __init__(self, top_k: int = 10, min_score: float = 0.2):
+    def __init__(
+        self,
+        top_k: int = 10,
+        min_score: float = RETRIEVAL_MIN_SCORE,
+        max_gap: float = RETRIEVAL_SCORE_GAP,
+        encoder: Optional[QueryEncoder] = None,
+        backend: str = RETRIEVAL_BACKEND,
+        auto_filter: bool = RETRIEVAL_AUTO_FILTER,
+        hybrid: bool = RETRIEVAL_HYBRID
+    ):
         self.top_k = top_k
         self.min_score = min_score
+        self.max_gap = max_gap
+        self.backend = backend
+        self.auto_filter = auto_filter
         self.collection = None
+        self.metric = "l2"       # distance space of the collection
+        self.index = None
+        self.read_index = None   # NumpyVectorIndex whose BM25 postings feed hybrid search
+        self.encoder = encoder or QueryEncoder()
 
-        logger.info("Initializing Retriever")
+        logger.info(f"Initializing Retriever | backend={backend} | hybrid={hybrid}")
 
+        if backend == "numpy":
+            self._load_numpy_index()
+        else:
+            self._load_collection()
+
+        if hybrid:
+            self._load_lexical_index()
+
+    def _load_collection(self) -> None:
         if not os.path.exists(VECTOR_DB_PATH):
             logger.warning("Vector DB path does not exist")
             return
@@ -36,40 +125,226 @@ class Retriever:
         try:
             client = chromadb.PersistentClient(path=VECTOR_DB_PATH)
             self.collection = client.get_collection(name=COLLECTION_NAME)
-            logger.info("ChromaDB collection loaded successfully")
+            metadata = self.collection.metadata
+            if isinstance(metadata, dict):
+                self.metric = metadata.get("hnsw:space", "l2")
+            logger.info(f"ChromaDB collection loaded successfully | metric={self.metric}")
         except Exception as e:
             logger.exception("Failed to load ChromaDB collection")
             self.collection = None
 
-    def retrieve(self, query: str) -> List[str]:
+    def _load_numpy_index(self) -> None:
+        from src.retrieval.numpy_index import NUMPY_INDEX_PATH, NumpyVectorIndex
+
+        if not os.path.exists(NUMPY_INDEX_PATH):
+            logger.warning("Numpy index not found — export it with python -m src.retrieval.numpy_index")
+            return
+
+        try:
+            self.index = NumpyVectorIndex(NUMPY_INDEX_PATH)
+            logger.info(f"Numpy index loaded | chunks={len(self.index)}")
+        except Exception:
+            logger.exception("Failed to load numpy index")
+            self.index = None
+
+    def _load_lexical_index(self) -> None:
+        from src.retrieval.numpy_index import NUMPY_INDEX_PATH, NumpyVectorIndex
+
+        read_index = self.index
+        if read_index is None and os.path.exists(NUMPY_INDEX_PATH):
+            try:
+                # Memory-mapped: only the documents of lexical hits are read
+                read_index = NumpyVectorIndex(NUMPY_INDEX_PATH)
+            except Exception:
+                logger.exception("Failed to load read index for hybrid search")
+
+        if read_index is None or read_index.lexical is None:
+            logger.warning("No BM25 index — hybrid search off (re-export with python -m src.retrieval.numpy_index)")
+            return
+
+        self.read_index = read_index
+        logger.info(f"BM25 index loaded | terms={len(read_index.lexical.term_ids)}")
+
+    @property
+    def n_results(self) -> int:
+        """Vector candidates per query; hybrid search fuses a longer list."""
+        return max(self.top_k, HYBRID_CANDIDATES) if self.read_index is not None else self.top_k
+
+    @property
+    def available(self) -> bool:
+        return self.collection is not None or self.index is not None
+
+    def _query_numpy(self, queries: List[str], filters: Optional[Filters] = None) -> dict:
+        """
+        Same result shape as Chroma's query(). Distances are squared L2
+        between unit vectors (2 - 2 * cosine), matching the collection's
+        default "l2" space, so thresholds mean the same on both backends.
+        """
+        with span("encode", queries=len(queries)):
+            embeddings = self.encoder.encode_many(queries)
+        with span("vector_search", backend="numpy"):
+            indices, scores = self.index.search(embeddings, self.n_results, filters)
+
+        return {
+            "ids": [[self.index.ids[i] for i in row] for row in indices],
+            "documents": [[self.index.document(i) for i in row] for row in indices],
+            "distances": (2.0 - 2.0 * scores).tolist(),
+            "metadatas": [[self.index.metadatas[i] for i in row] for row in indices]
+            if self.index.metadatas is not None else None,
+            "query_embeddings": embeddings
+        }
+
+    def _query(self, queries: List[str], filters: Optional[Filters] = None) -> dict:
+        """
+        One Chroma call for all queries, using our cached query vectors.
+        Falls back to Chroma's own embedding if the encoder is unavailable.
+        """
+        if self.index is not None:
+            return self._query_numpy(queries, filters)
+
+        where = where_clause(filters) if filters else None
+
+        try:
+            with span("encode", queries=len(queries)):
+                embeddings = self.encoder.encode_many(queries)
+        except ImportError:
+            logger.warning("Query encoder unavailable — letting Chroma embed the query")
+            return self.collection.query(
+                query_texts=queries,
+                n_results=self.n_results,
+                where=where,
+                include=["documents", "distances", "metadatas"]
+            )
+
+        with span("vector_search", backend="chroma"):
+            results = self.collection.query(
+                query_embeddings=embeddings.tolist(),
+                n_results=self.n_results,
+                where=where,
+                include=["documents", "distances", "metadatas"]
+            )
+        return {**results, "query_embeddings": embeddings}
+
+    def _resolve_filters(self, query: str, filters: Optional[Filters]) -> Optional[Filters]:
+        if filters is None and self.auto_filter:
+            filters = detect_filters(query)
+            if filters:
+                logger.info(f"Detected filter | sources={len(filters['source'])}")
+        return filters or None
+
+    def _fuse(
+        self,
+        query: str,
+        hits: List[Tuple[str, str, float, str]],
+        filters: Optional[Filters],
+        query_vector: Optional[np.ndarray]
+    ) -> List[Tuple[str, str, float, str]]:
+        """
+        Reciprocal rank fusion of the relevant vector hits (id, doc,
+        similarity, source) with the BM25 ranking. BM25 only re-ranks and adds to
+        an answer the vectors found relevant; it never turns a refusal
+        into one. Hits only BM25 found get their similarity from the read
+        index (NaN without a query vector).
+        """
+        index = self.read_index
+        runs = index.runs(filters) if filters and index.metadatas is not None else None
+        rows, _ = index.lexical.search(query, HYBRID_CANDIDATES, runs)
+
+        fused: Dict[str, float] = {}
+        found: Dict[str, Tuple[str, float, str]] = {}
+        lexical_rows: Dict[str, int] = {}
+
+        for rank, (key, doc, score, source) in enumerate(hits):
+            fused[key] = fused.get(key, 0.0) + 1.0 / (RRF_K + rank + 1)
+            found[key] = (doc, score, source)
+        for rank, row in enumerate(rows):
+            key = index.ids[row]
+            fused[key] = fused.get(key, 0.0) + 1.0 / (RRF_K + rank + 1)
+            lexical_rows.setdefault(key, int(row))
+
+        best = sorted(fused, key=fused.get, reverse=True)[:self.top_k]
+        for key in best:
+            if key not in found:
+                row = lexical_rows[key]
+                score = float(np.dot(index.embeddings[row], query_vector)) if query_vector is not None else float("nan")
+                source = index.metadatas[row].get("source", "") if index.metadatas is not None else ""
+                found[key] = (index.document(row), score, source)
+        return [(key, *found[key]) for key in best]
+
+    def _search_one(self, query: str, filters: Optional[Filters]) -> List[SourcedDoc]:
+        return self._search_groups([query], [0], [filters]).get(0, [])
+
+    def _search_groups(self, queries: List[str], indices: List[int], filters: List[Optional[Filters]]) -> Dict[int, List[SourcedDoc]]:
+        """One vector query per distinct filter; results keyed by index."""
+        groups: Dict[tuple, List[int]] = {}
+        for i in indices:
+            groups.setdefault(filter_key(filters[i]), []).append(i)
+
+        found: Dict[int, List[SourcedDoc]] = {}
+        for members in groups.values():
+            group_filters = filters[members[0]]
+            results = self._query([queries[i] for i in members], group_filters)
+
+            all_docs = results.get("documents") or [[] for _ in members]
+            # Mocked or older results may lack ids; documents then stand in as keys
+            all_ids = results.get("ids") or all_docs
+            all_metadatas = results.get("metadatas") or [[] for _ in members]
+            query_vectors = results.get("query_embeddings")
+
+            similarities = distance_to_similarity(
+                _padded(results.get("distances") or [[] for _ in members]), self.metric
+            )
+            kept = relevance_mask(similarities, self.min_score, self.n_results, self.max_gap).sum(axis=1)
+
+            for n, (i, ids, docs, metadatas) in enumerate(zip(members, all_ids, all_docs, all_metadatas)):
+                sources = [(meta or {}).get("source", "") for meta in metadatas or []]
+                sources += ["" for _ in range(len(docs) - len(sources))]
+                # Hits are best first, so the mask is a prefix of each row
+                hits = [
+                    (key, doc, float(score), source)
+                    for key, doc, source, score in zip(ids, docs, sources, similarities[n, :kept[n]])
+                ]
+                if hits and self.read_index is not None:
+                    query_vector = query_vectors[n] if query_vectors is not None else None
+                    hits = self._fuse(queries[i], hits, group_filters, query_vector)
+                found[i] = [(doc, score, source) for _, doc, score, source in hits[:self.top_k]]
+        return found
+
+    def retrieve(self, query: str, filters: Optional[Filters] = None) -> List[str]:
+        return [doc for doc, _ in self.retrieve_scored(query, filters)]
+
+    def retrieve_scored(self, query: str, filters: Optional[Filters] = None) -> List[ScoredDoc]:
+        return [(doc, score) for doc, score, _ in self.retrieve_sourced(query, filters)]
+
+    def retrieve_sourced(self, query: str, filters: Optional[Filters] = None) -> List[SourcedDoc]:
+        """
+        Relevant docs with their cosine similarity to the query and their
+        source, best first.
+        filters: {metadata key: allowed values}, e.g. {"source": [...]};
+        detected from the question when None and auto_filter is on.
+        A filter that leaves nothing relevant falls back to the full index.
+        """
         if not query or not query.strip():
             logger.warning("Empty query received")
             return []
 
-        if self.collection is None:
+        if not self.available:
             logger.warning("No vector collection available")
             return []
 
         try:
             logger.info(f"Querying vector DB | top_k={self.top_k}")
 
-            results = self.collection.query(
-                query_texts=[query],
-                n_results=self.top_k,
-                include=["documents", "distances"]
-            )
+            filters = self._resolve_filters(query, filters)
+            filtered_docs = self._search_one(query, filters)
 
-            docs = results.get("documents", [[]])[0]
-            scores = results.get("distances", [[]])[0]
-
-            filtered_docs = [
-                doc for doc, score in zip(docs, scores)
-                if score >= self.min_score
-            ]
+            if filters and not filtered_docs:
+                logger.info("Nothing relevant within the filter — searching the full index")
+                filtered_docs = self._search_one(query, None)
 
             logger.info(
                 f"Retrieved {len(filtered_docs)} relevant docs "
-                f"(threshold={self.min_score})"
+                f"(threshold={self.min_score}, gap={self.max_gap})"
             )
 
             return filtered_docs
@@ -78,9 +353,71 @@ class Retriever:
             logger.exception("Error during retrieval")
             return []
 
+    def retrieve_many(
+        self,
+        queries: List[str],
+        filters: Optional[List[Optional[Filters]]] = None
+    ) -> List[List[str]]:
+        return [
+            [doc for doc, _ in scored]
+            for scored in self.retrieve_many_scored(queries, filters)
+        ]
+
+    def retrieve_many_scored(
+        self,
+        queries: List[str],
+        filters: Optional[List[Optional[Filters]]] = None
+    ) -> List[List[ScoredDoc]]:
+        return [
+            [(doc, score) for doc, score, _ in sourced]
+            for sourced in self.retrieve_many_sourced(queries, filters)
+        ]
+
+    def retrieve_many_sourced(
+        self,
+        queries: List[str],
+        filters: Optional[List[Optional[Filters]]] = None
+    ) -> List[List[SourcedDoc]]:
+        """
+        Retrieves for several questions at once: one encoder forward pass
+        for the uncached queries and one multi-query Chroma call per
+        distinct filter. Results are in the same order as `queries`.
+        """
+        results_per_query: List[List[SourcedDoc]] = [[] for _ in queries]
+
+        valid = [i for i, q in enumerate(queries) if q and q.strip()]
+        if not valid or not self.available:
+            if not self.available:
+                logger.warning("No vector collection available")
+            return results_per_query
+
+        try:
+            logger.info(f"Querying vector DB | batch={len(valid)} | top_k={self.top_k}")
+
+            given = filters or [None for _ in queries]
+            resolved = [self._resolve_filters(q, f) if q and q.strip() else None for q, f in zip(queries, given)]
+
+            for i, docs in self._search_groups(queries, valid, resolved).items():
+                results_per_query[i] = docs
+
+            # Filters that left nothing relevant fall back to the full index
+            empty = [i for i in valid if resolved[i] and not results_per_query[i]]
+            if empty:
+                no_filters = [None for _ in queries]
+                for i, docs in self._search_groups(queries, empty, no_filters).items():
+                    results_per_query[i] = docs
+
+        except Exception:
+            logger.exception("Error during batched retrieval")
+
+        return results_per_query
+
 
 # ---------- Local Test ----------
 if __name__ == "__main__":
-    r = Retriever(top_k=10, min_score=0.2)
-    docs = r.retrieve("What clubs are present?")
-    print("Retrieved:", len(docs))
+    r = Retriever(top_k=10)
+    for doc, score in r.retrieve_scored("What clubs are present?"):
+        print(f"{score:.3f}  {doc[:80]}")
+
+    batch = r.retrieve_many(["What clubs are present?", "What is the hostel fee?"])
+    print("Batch retrieved:", [len(d) for d in batch])
@@ -1,45 +1,153 @@
 import re
-import string
+import unicodedata
+from typing import Dict, Iterable, Iterator, Optional
+
+# Bump whenever cleaning output changes: it is part of the extraction cache key
+CLEANER_VERSION = "2"
+
+HYPHENATED_END = re.compile(r'\w-$')
+WORD_START = re.compile(r'\w')
+
+# One pass over the text finds both
+# - a hyphen + line break (_clean_match checks a word character precedes it)
+# - runs of characters outside printable ASCII, fixed up via CLEAN_TABLE
+SPECIAL_CHARS = r'[^\t\n\x0b\x0c\r\x20-\x7e]+'
+SPECIAL_RUN = re.compile(SPECIAL_CHARS)
+CLEAN_PATTERN = re.compile(r'-[^\S\n]*\n\s*(?=\w)|' + SPECIAL_CHARS)
+
+# Applied after NFKC, which already expands the ﬁ/ﬂ/ﬀ/ﬃ/ﬄ ligatures,
+# full-width forms and no-break spaces.
+TYPOGRAPHIC = {
+    "\u2018": "'", "\u2019": "'", "\u201a": "'", "\u201b": "'",
+    "\u201c": '"', "\u201d": '"', "\u201e": '"', "\u201f": '"',
+    "\u2016": '"', "\u01c1": '"',                 # ‖ ǁ: broken quotes in Word exports
+    "\u2010": "-", "\u2011": "-", "\u2012": "-", "\u2013": "-",
+    "\u2014": "-", "\u2015": "-", "\u2212": "-",
+    "\u019f": "ti", "\u01ab": "tt",                # Ɵ ƫ: Calibri ti/tt ligatures
+    "\u20b9": "Rs. ",
+}
+
+
+class _CleanTable(dict):
+    """
+    str.translate table, filled lazily per code point:
+    - TYPOGRAPHIC replacements
+    - whitespace kept (line breaks matter for de-hyphenation)
+    - private-use glyphs (symbol-font bullets) and other symbols
+      (bullets, boxes, check marks) become spaces
+    - control, format and unassigned characters dropped
+    - everything else kept
+    """
+
+    def __missing__(self, code: int) -> Optional[str]:
+        char = chr(code)
+        category = unicodedata.category(char)
+
+        if char in TYPOGRAPHIC:
+            value = TYPOGRAPHIC[char]
+        elif char.isspace():
+            value = char
+        elif category == "Co" or category == "So":
+            value = " "
+        elif category[0] == "C":
+            value = None
+        else:
+            value = char
+
+        self[code] = value
+        return value
+
+
+CLEAN_TABLE: Dict[int, Optional[str]] = _CleanTable()
+
+
+def _normalize(text: str) -> str:
+    if text.isascii() or unicodedata.is_normalized("NFKC", text):
+        return text
+    return unicodedata.normalize("NFKC", text)
+
+
+def _translate_run(match: re.Match) -> str:
+    return match.group().translate(CLEAN_TABLE)
+
+
+def _clean_match(match: re.Match) -> str:
+    found = match.group()
+    if found[0] != "-":
+        return found.translate(CLEAN_TABLE)
+
+    # Hyphenation only when the hyphen ends a word (\w before it)
+    start = match.start()
+    before = match.string[start - 1] if start else ""
+    return "" if before.isalnum() or before == "_" else found
+
 
 def clean_text_basic(text: str) -> str:
     """
     Basic, universal cleanup safe for ALL PDFs.
-    - Removes non-printable characters
-    - Normalizes common PDF ligatures
+    - Unicode NFKC normalization (expands ligatures, full-width forms)
+    - Maps typographic quotes/dashes and broken font ligatures to ASCII
+    - Removes control and private-use characters
     """
     if not text:
         return ""
 
-    text = ''.join(c for c in text if c in string.printable)
-
-    ligatures = {
-        "ﬁ": "fi",
-        "ﬂ": "fl",
-        "ﬀ": "ff",
-        "ﬃ": "ffi",
-        "ﬄ": "ffl"
-    }
-    for k, v in ligatures.items():
-        text = text.replace(k, v)
-
-    return text
+    return SPECIAL_RUN.sub(_translate_run, _normalize(text))
 
 
 def clean_text(text: str) -> str:
     """
     Stronger cleanup for final output.
-    - Collapses whitespace
+    - Everything clean_text_basic does
     - Removes hyphenation at line breaks
+    - Collapses whitespace
+    One regex pass does the first two.
     """
     if not text:
         return ""
 
-    text = clean_text_basic(text)
-    text = re.sub(r'(\w)-\s*\n\s*(\w)', r'\1\2', text)
-    text = re.sub(r'\s+', ' ', text)
+    text = CLEAN_PATTERN.sub(_clean_match, _normalize(text))
+
+    return " ".join(text.split())
+
 
+def iter_clean_text(pages: Iterable[str]) -> Iterator[str]:
+    """
+    Streaming clean_text over pages.
+    - Cleans one page at a time
+    - Joins pages with a space, or without one when a word is
+      hyphenated across the page break
+    Concatenating the output gives clean_text("\\n".join(pages)).
+    """
+    pending = ""
+    for page in pages:
+        cleaned = clean_text(page)
+        if not cleaned:
+            continue
+
+        if pending:
+            if HYPHENATED_END.search(pending) and WORD_START.match(cleaned):
+                yield pending[:-1]
+            else:
+                yield pending + " "
+        pending = cleaned
+
+    if pending:
+        yield pending
+
+
+def normalize_query(text: str) -> str:
+    """
+    Canonical form of a user question, used as a cache key.
+    - Lowercases
+    - Drops punctuation
+    - Collapses whitespace
+    """
+    if not text:
+        return ""
 
-    return text.strip()
+    text = re.sub(r'[^\w\s]', ' ', text.lower())
+    return ' '.join(text.split())
 
 
 # 🔹 LOCAL TEST (REMOVE BEFORE COMMIT)
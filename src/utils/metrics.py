@@ -0,0 +1,196 @@
+# src/utils/metrics.py
+
+"""
+Latency histograms and counters, rendered in the Prometheus text format
+(GET /metrics on the backend) without a client library.
+
+- Histogram: fixed bucket bounds and one pre-built series per label
+  value. observe() is a bisect and three increments under that series'
+  lock; nothing is stored per sample, so memory stays constant.
+  p50/p95/p99 are estimated from the buckets (linear within a bucket)
+  and exported alongside as a gauge.
+- Counter: one integer per label value.
+
+Label values are fixed when a metric is created, so recording never
+builds a new series. Values are per process: with several workers
+(sage-backend/serve.py) each scrape sees the worker that answered.
+"""
+
+from bisect import bisect_left
+from typing import Dict, List, Sequence
+import threading
+
+# Seconds; covers cache hits (~1 ms) to CPU generation timeouts (~2 min)
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 15.0, 20.0, 30.0, 45.0, 60.0, 90.0, 120.0
+)
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+_registry: List = []
+
+
+def quote(value) -> str:
+    return f'"{value}"'
+
+
+def _labels(name: str, value: str, extra: str = "") -> str:
+    pairs = [p for p in (f"{name}={quote(value)}" if name else "", extra) if p]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Series:
+    __slots__ = ("bounds", "counts", "count", "sum", "max", "lock")
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)   # last slot: above the largest bound
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        i = bisect_left(self.bounds, value)
+        with self.lock:
+            self.counts[i] += 1
+            self.count += 1
+            self.sum += value
+            if value > self.max:
+                self.max = value
+
+    def quantile(self, q: float) -> float:
+        with self.lock:
+            counts = list(self.counts)
+            total = self.count
+            largest = self.max
+        if not total:
+            return 0.0
+
+        rank = q * total
+        seen = 0
+        for i, n in enumerate(counts):
+            if n and seen + n >= rank:
+                lower = self.bounds[i - 1] if i > 0 else 0.0
+                upper = min(self.bounds[i], largest) if i < len(self.bounds) else largest
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return largest
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        label: str = "",
+        values: Sequence[str] = ("",),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.buckets = tuple(buckets)
+        self._series: Dict[str, _Series] = {v: _Series(self.buckets) for v in values}
+        _registry.append(self)
+
+    def observe(self, value: float, label: str = "") -> None:
+        self._series[label].observe(value)
+
+    def quantile(self, q: float, label: str = "") -> float:
+        return self._series[label].quantile(q)
+
+    def percentiles_ms(self, label: str = "") -> Dict[str, float]:
+        """p50/p95/p99 in milliseconds, for /internal/metrics."""
+        return {f"p{round(q * 100)}": round(self.quantile(q, label) * 1000, 1) for q in QUANTILES}
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for value, series in self._series.items():
+            with series.lock:
+                counts = list(series.counts)
+                total, total_sum = series.count, series.sum
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_labels(self.label, value, 'le=' + quote(le))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label, value)} {total_sum}")
+            lines.append(f"{self.name}_count{_labels(self.label, value)} {total}")
+
+        lines += [f"# HELP {self.name}_quantile {self.help} (estimated from the buckets)",
+                  f"# TYPE {self.name}_quantile gauge"]
+        for value, series in self._series.items():
+            for q in QUANTILES:
+                labels = _labels(self.label, value, "quantile=" + quote(q))
+                lines.append(f"{self.name}_quantile{labels} {series.quantile(q)}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help: str, label: str = "", values: Sequence[str] = ("",)):
+        self.name = name
+        self.help = help
+        self.label = label
+        self._values: Dict[str, int] = {v: 0 for v in values}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, label: str = "", amount: int = 1) -> None:
+        with self._lock:
+            self._values[label] += amount
+
+    def value(self, label: str = "") -> int:
+        return self._values[label]
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = dict(self._values)
+        for value, n in values.items():
+            lines.append(f"{self.name}{_labels(self.label, value)} {n}")
+        return lines
+
+
+def render_metrics() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ---------- SAGE metrics ----------
+STAGE_SECONDS = Histogram(
+    "sage_stage_seconds",
+    "Latency of each question-answering stage in seconds",
+    label="stage",
+    values=("retrieve", "rerank", "prompt", "first_token", "generate", "total")
+)
+
+HTTP_SECONDS = Histogram(
+    "sage_http_request_seconds",
+    "Latency of every HTTP request in seconds"
+)
+
+ANSWER_CACHE = Counter(
+    "sage_answer_cache_total",
+    "Answer cache lookups",
+    label="result",
+    values=("hit", "miss")
+)
+
+REFUSALS = Counter(
+    "sage_refusals_total",
+    "Questions answered with the refusal message",
+    label="reason",
+    values=("no_context", "blocked")
+)
+
+TIMEOUTS = Counter(
+    "sage_timeouts_total",
+    "Requests that ran out of time",
+    label="stage",
+    values=("retrieve", "queue", "generate")
+)
@@ -0,0 +1,216 @@
+# src/utils/rate_limiter.py
+
+"""
+Token bucket rate limiting per client.
+
+Each client has a bucket of `capacity` tokens, refilled continuously at
+`rate` tokens per second; a request takes one token or is rejected. A bucket
+is two numbers (tokens, last update), so a check is O(1) whatever the
+client's history.
+
+A bucket left alone for capacity / rate seconds is full
+again — the same as having no bucket — so idle clients are evicted
+without changing any decision. Stores also cap the number of clients,
+dropping the least recently seen.
+
+Stores:
+- MemoryStore: per process, an LRU-ordered dict
+- SQLiteStore: one SQLite file shared by the worker processes of a host
+  (each check is a short write transaction)
+"""
+
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import os
+import sqlite3
+import threading
+import time
+
+from src.config import (
+    RATE_LIMIT_MAX_CLIENTS,
+    RATE_LIMIT_REQUESTS,
+    RATE_LIMIT_STORE,
+    RATE_LIMIT_WINDOW_SECONDS,
+)
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+RATE_LIMIT_DB_PATH = os.environ.get(
+    "SAGE_RATE_LIMIT_DB_PATH",
+    os.path.join(BASE_DIR, "data", "rate_limits.sqlite3")
+)
+
+
+def refill(tokens: float, updated: float, now: float, capacity: float, rate: float) -> float:
+    return min(capacity, tokens + max(0.0, now - updated) * rate)
+
+
+# ---------- Stores ----------
+class MemoryStore:
+    """
+    Buckets in a dict ordered by last use: idle clients are at the front,
+    so eviction pops from there and never scans active ones.
+    """
+
+    def __init__(self, max_clients: int = RATE_LIMIT_MAX_CLIENTS):
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, now: float, capacity: float, rate: float) -> bool:
+        with self._lock:
+            bucket = self._buckets.pop(key, None)
+            tokens = capacity if bucket is None else refill(*bucket, now, capacity, rate)
+
+            allowed = tokens >= 1.0
+            self._buckets[key] = (tokens - 1.0 if allowed else tokens, now)
+
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+            return allowed
+
+    def evict_idle(self, cutoff: float) -> int:
+        """Drops buckets last used before `cutoff`."""
+        evicted = 0
+        with self._lock:
+            while self._buckets:
+                key, (_, updated) = next(iter(self._buckets.items()))
+                if updated >= cutoff:
+                    break
+                del self._buckets[key]
+                evicted += 1
+        return evicted
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class SQLiteStore:
+    """
+    Buckets in an SQLite table, so all workers see the same limits.
+
+    WAL mode lets readers proceed during writes; each check is one
+    BEGIN IMMEDIATE transaction (read, refill, write back). The table is
+    trimmed to max_clients after every max_clients / 10 new clients this
+    process adds, so it stays within ~10% per worker of the bound.
+    """
+
+    def __init__(self, path: str = RATE_LIMIT_DB_PATH, max_clients: int = RATE_LIMIT_MAX_CLIENTS):
+        self.path = path
+        self.max_clients = max_clients
+        self._trim_every = max(1, max_clients // 10)
+        self._inserts = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS buckets "
+            "(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS buckets_updated ON buckets (updated)")
+
+    def take(self, key: str, now: float, capacity: float, rate: float) -> bool:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+                tokens = capacity if row is None else refill(*row, now, capacity, rate)
+
+                allowed = tokens >= 1.0
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                    (key, tokens - 1.0 if allowed else tokens, now)
+                )
+                if row is None:
+                    self._inserts += 1
+                    if self._inserts >= self._trim_every:
+                        self._inserts = 0
+                        self._trim()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            return allowed
+
+    def evict_idle(self, cutoff: float) -> int:
+        """Drops buckets last used before `cutoff`, then the oldest beyond max_clients."""
+        with self._lock:
+            evicted = self._conn.execute("DELETE FROM buckets WHERE updated < ?", (cutoff,)).rowcount
+            return evicted + self._trim()
+
+    def _trim(self) -> int:
+        return self._conn.execute(
+            "DELETE FROM buckets WHERE key IN "
+            "(SELECT key FROM buckets ORDER BY updated DESC LIMIT -1 OFFSET ?)",
+            (self.max_clients,)
+        ).rowcount
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM buckets").fetchone()[0]
+
+
+def make_store(kind: str = RATE_LIMIT_STORE):
+    if kind == "sqlite":
+        return SQLiteStore()
+    if kind != "memory":
+        logger.warning(f"Unknown rate limit store {kind!r}, using memory")
+    return MemoryStore()
+
+
+# ---------- Limiter ----------
+class TokenBucketLimiter:
+    """
+    allow(key) takes a token from the client's bucket.
+
+    Idle buckets are evicted every `evict_interval` seconds, from inside
+    allow() — no background thread.
+    """
+
+    def __init__(
+        self,
+        capacity: int = RATE_LIMIT_REQUESTS,
+        window_seconds: float = RATE_LIMIT_WINDOW_SECONDS,
+        store=None,
+        evict_interval: float = 60.0,
+        clock=time.time
+    ):
+        self.capacity = capacity
+        self.rate = capacity / window_seconds
+        self.store = store if store is not None else make_store()
+        self.evict_interval = evict_interval
+        self.clock = clock
+
+        # Time for an idle bucket to fill up again
+        self.idle_seconds = capacity / self.rate
+        self._next_eviction = clock() + evict_interval
+
+        self.allowed = 0
+        self.limited = 0
+        self.evicted = 0
+
+    def allow(self, key: str, now: Optional[float] = None) -> bool:
+        now = self.clock() if now is None else now
+        if now >= self._next_eviction:
+            self._next_eviction = now + self.evict_interval
+            self.evicted += self.store.evict_idle(now - self.idle_seconds)
+
+        if self.store.take(key, now, self.capacity, self.rate):
+            self.allowed += 1
+            return True
+        self.limited += 1
+        return False
+
+    def stats(self) -> Dict:
+        return {
+            "store": type(self.store).__name__,
+            "clients": len(self.store),
+            "allowed": self.allowed,
+            "limited": self.limited,
+            "evicted": self.evicted
+        }
@@ -0,0 +1,298 @@
+# src/utils/tracing.py
+
+"""
+Per-request tracing: spans for the backend request, each graph node,
+model loads and the generator backend, all carrying the request ID.
+
+- start_trace() (backend middleware) opens the root span of a request
+  and samples it (TRACE_SAMPLE_RATE)
+- span(name, **attributes) opens a child of the current span; traced()
+  wraps a function (the graph nodes) in one
+- start_span() is the same child span without making it current, for
+  generators: a streamed answer is resumed on different threads, where
+  the current span can't be swapped in and out
+- use_span() makes a span current without ending it, for the root of a
+  streamed response, which ends when its body does
+
+Outside a sampled trace these return a shared no-op span, so untraced
+requests pay one ContextVar lookup per span. The current span lives in
+a ContextVar and follows asyncio.to_thread and the threadpool that
+iterates streamed responses.
+
+Finished spans go to the exporter: one JSON object per line in
+TRACE_PATH ("jsonl"), or OTLP/HTTP JSON batches posted to a local
+collector by a background thread ("otlp").
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Dict, List, Optional
+import json
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+
+from src.config import TRACE_EXPORTER, TRACE_OTLP_ENDPOINT, TRACE_SAMPLE_RATE
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+TRACE_PATH = os.environ.get("SAGE_TRACE_PATH", os.path.join(BASE_DIR, "logs", "traces.jsonl"))
+
+SERVICE_NAME = "sage-backend"
+
+
+# ---------- Spans ----------
+class Span:
+    __slots__ = (
+        "name", "trace_id", "span_id", "parent_id", "request_id",
+        "start_ns", "end_ns", "attributes", "error", "_token"
+    )
+
+    def __init__(self, name: str, trace_id: str, request_id: str, parent_id: Optional[str], attributes: Dict):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.request_id = request_id
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = attributes
+        self.error = None
+        self._token = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def child(self, name: str, attributes: Dict) -> "Span":
+        return Span(name, self.trace_id, self.request_id, self.span_id, attributes)
+
+    def end(self, error: Optional[BaseException] = None) -> None:
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        if _exporter is not None:
+            _exporter.export(self)
+
+    def __enter__(self) -> "Span":
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        _current.reset(self._token)
+        self.end(exc)
+        return False
+
+    def to_dict(self) -> Dict:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "request_id": self.request_id,
+            "start_ns": self.start_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+            "error": self.error
+        }
+
+
+class _NoOpSpan:
+    """Returned outside a sampled trace; records nothing."""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def end(self, error: Optional[BaseException] = None) -> None:
+        pass
+
+    def __enter__(self) -> "_NoOpSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+NOOP_SPAN = _NoOpSpan()
+
+_current: ContextVar[Optional[Span]] = ContextVar("sage_current_span", default=None)
+
+
+def start_trace(name: str, request_id: Optional[str] = None, **attributes):
+    """Root span of a request, or the no-op span if tracing is off or it isn't sampled."""
+    if _exporter is None or random.random() >= _sample_rate:
+        return NOOP_SPAN
+    request_id = request_id or uuid.uuid4().hex
+    return Span(name, f"{random.getrandbits(128):032x}", request_id, None, attributes)
+
+
+def span(name: str, **attributes):
+    """Child of the current span; use as a context manager."""
+    parent = _current.get()
+    if parent is None:
+        return NOOP_SPAN
+    return parent.child(name, attributes)
+
+
+def start_span(name: str, **attributes):
+    """Child of the current span that is never made current; call .end()."""
+    return span(name, **attributes)
+
+
+@contextmanager
+def use_span(current):
+    """Makes `current` the current span for the block; the caller ends it."""
+    if current is NOOP_SPAN:
+        yield current
+        return
+    token = _current.set(current)
+    try:
+        yield current
+    finally:
+        _current.reset(token)
+
+
+def traced(name: str):
+    """Runs the wrapped function inside span(name)."""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# ---------- Exporters ----------
+class JSONLExporter:
+    """Appends each finished span as one JSON line; flushed when a request's root span ends."""
+
+    def __init__(self, path: str = TRACE_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str) + "\n"
+        with self._lock:
+            self._file.write(line)
+            if span.parent_id is None:
+                self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+def _otlp_value(value: Any) -> Dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def otlp_span(span: Span) -> Dict:
+    attributes = {**span.attributes, "request_id": span.request_id}
+    otlp = {
+        "traceId": span.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": 2 if span.parent_id is None else 1,   # SERVER for the request, INTERNAL below it
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.end_ns),
+        "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in attributes.items()],
+        "status": {"code": 2, "message": span.error} if span.error else {"code": 1}
+    }
+    if span.parent_id is not None:
+        otlp["parentSpanId"] = span.parent_id
+    return otlp
+
+
+class OTLPExporter:
+    """
+    Batches spans and posts them as OTLP/HTTP JSON to {endpoint}/v1/traces
+    from a background thread; a full queue drops spans rather than block.
+    """
+
+    def __init__(
+        self,
+        endpoint: str = TRACE_OTLP_ENDPOINT,
+        max_batch: int = 256,
+        flush_interval: float = 1.0,
+        max_queue: int = 4096
+    ):
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue[Span]" = queue.Queue(maxsize=max_queue)
+        self.dropped = 0
+        self._failing = False
+        threading.Thread(target=self._run, name="otlp-exporter", daemon=True).start()
+
+    def export(self, span: Span) -> None:
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        while True:
+            batch: List[Span] = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._post(batch)
+
+    def _post(self, batch: List[Span]) -> None:
+        import requests
+
+        payload = {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+            "scopeSpans": [{"scope": {"name": "sage"}, "spans": [otlp_span(s) for s in batch]}]
+        }]}
+        try:
+            requests.post(self.url, json=payload, timeout=2).raise_for_status()
+            self._failing = False
+        except Exception as e:
+            # Log once per outage, not once per batch
+            if not self._failing:
+                logger.warning(f"Trace export to {self.url} failed: {e}")
+            self._failing = True
+
+
+def make_exporter(kind: str = TRACE_EXPORTER):
+    if kind == "jsonl":
+        return JSONLExporter()
+    if kind == "otlp":
+        return OTLPExporter()
+    if kind:
+        logger.warning(f"Unknown trace exporter {kind!r}, tracing off")
+    return None
+
+
+_exporter = make_exporter()
+_sample_rate = TRACE_SAMPLE_RATE
+
+
+def configure(exporter=None, sample_rate: float = 1.0) -> None:
+    """Replaces the exporter and sampling rate (tests, scripts)."""
+    global _exporter, _sample_rate
+    _exporter = exporter
+    _sample_rate = sample_rate
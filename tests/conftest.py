@@ -3,4 +3,7 @@ import os
 
 # Add project root to Python path
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-sys.path.insert(0, project_root)
\ No newline at end of file
+sys.path.insert(0, project_root)
+
+# Tests never download models; the embedder falls back to approximate token counts
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
@@ -0,0 +1,101 @@
+# tests/test_answer_cache.py
+
+import numpy as np
+
+from src.pipeline.answer_cache import AnswerCache
+from src.retrieval.query_encoder import QueryEncoder
+from src.utils.clean_text import normalize_query
+
+VECTORS = {
+    "what are the library hours": [1.0, 0.0, 0.0],
+    "library working hours": [0.98, 0.2, 0.0],
+    "what is the hostel fee": [0.0, 1.0, 0.0],
+}
+
+
+def fake_embed(text):
+    return np.array(VECTORS.get(normalize_query(text), [0.0, 0.0, 1.0]), dtype=np.float32)
+
+
+def make_cache(**kwargs):
+    kwargs.setdefault("embed_fn", fake_embed)
+    kwargs.setdefault("version_fn", lambda: "v1")
+    kwargs.setdefault("version_check_interval", 0)
+    return AnswerCache(**kwargs)
+
+
+def test_exact_hit_on_normalized_question():
+    cache = make_cache()
+    cache.put("What are the library hours?", "llama3.1:8b", "8 AM to 8 PM", latency_ms=900)
+
+    assert cache.get("  what are the LIBRARY hours ", "llama3.1:8b") == "8 AM to 8 PM"
+    assert cache.get("What are the library hours?", "deepseek-r1:8b") is None
+
+    stats = cache.stats()
+    assert stats["hits_exact"] == 1
+    assert stats["saved_latency_ms"] == 900
+
+
+def test_semantic_hit_above_threshold_only():
+    cache = make_cache(similarity_threshold=0.95)
+    cache.put("What are the library hours?", "llama3.1:8b", "8 AM to 8 PM")
+
+    assert cache.get("Library working hours", "llama3.1:8b") == "8 AM to 8 PM"
+    assert cache.get("What is the hostel fee?", "llama3.1:8b") is None
+    assert cache.stats()["hits_semantic"] == 1
+
+
+def test_lru_eviction_and_ttl():
+    cache = make_cache(max_entries=2, embed_fn=None)
+    cache.put("q one", "m", "a1")
+    cache.put("q two", "m", "a2")
+    cache.get("q one", "m")
+    cache.put("q three", "m", "a3")
+
+    assert cache.get("q two", "m") is None
+    assert cache.get("q one", "m") == "a1"
+
+    expired = make_cache(ttl_seconds=0, embed_fn=None)
+    expired.put("q one", "m", "a1")
+    assert expired.get("q one", "m") is None
+
+
+def test_memory_bound():
+    cache = make_cache(max_bytes=2000, embed_fn=None)
+    for i in range(50):
+        cache.put(f"question {i}", "m", "x" * 200)
+
+    assert cache.stats()["bytes"] <= 2000
+    assert cache.stats()["evictions"] > 0
+
+
+def test_cleared_when_index_version_changes():
+    version = {"value": "v1"}
+    cache = make_cache(version_fn=lambda: version["value"])
+    cache.put("What are the library hours?", "m", "8 AM to 8 PM")
+
+    version["value"] = "v2"
+    assert cache.get("What are the library hours?", "m") is None
+    assert cache.stats()["invalidations"] == 1
+
+
+class RecordingModel:
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, **kwargs):
+        self.calls.append(list(texts))
+        return np.array([[float(len(t)), 1.0] for t in texts], dtype=np.float32)
+
+
+def test_miss_embeds_the_question_as_asked():
+    encoder = QueryEncoder()
+    encoder._model = RecordingModel()
+    cache = make_cache(embed_fn=encoder.encode)
+
+    question = "What are the M.Tech fees? Rs. 30,000"
+    assert cache.get(question, "llama3.1:8b") is None
+    # Retrieval then reuses the cached vector of the same question
+    encoder.encode_many([question])
+
+    assert encoder._model.calls == [[question]]
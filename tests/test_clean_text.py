@@ -10,8 +10,14 @@ def test_clean_text_basic_removes_non_printable():
 def test_clean_text_basic_ligatures():
     text = "ﬁ ﬂ ﬀ ﬃ ﬄ"
     cleaned = clean_text_basic(text)
-    # Ligatures are removed, not expanded
-    assert cleaned.strip() == ""
+    # Ligatures are expanded, not removed
+    assert cleaned == "fi fl ff ffi ffl"
+
+
+def test_clean_text_basic_normalizes_unicode():
+    text = "\u201cHostel\u201d fee \u2013 \u20b95,000 per\xa0year \uf0b7Communica\u019fon \uff21\uff22\x00"
+    cleaned = clean_text_basic(text)
+    assert cleaned == '"Hostel" fee - Rs. 5,000 per year  Communication AB'
 
 
 
@@ -26,3 +32,14 @@ def test_clean_text_removes_hyphenation():
     text = "exam-\nple"
     cleaned = clean_text(text)
     assert cleaned == "example"
+
+
+def test_clean_text_keeps_dashes_between_words():
+    assert clean_text("B.Tech -\n2024 and pre-\n registration") == "B.Tech - 2024 and preregistration"
+
+
+def test_iter_clean_text_matches_whole_text():
+    from src.utils.clean_text import iter_clean_text
+
+    pages = ["Hostel fees are pay-  ", "able each semester.\n\n", "Library  opens at 8 AM."]
+    assert "".join(iter_clean_text(pages)) == clean_text("\n".join(pages))
@@ -31,3 +31,59 @@ def test_extract_empty_pdf(tmp_path):
 
     with pytest.raises(Exception):
         extract_from_pdf_fitz(str(empty_pdf))
+
+
+def test_page_ranges_match_whole_file():
+    """Page-range extraction (used by the process pool) rebuilds the same text"""
+    from src.data_extraction.extract_base import pdf_page_count
+
+    pdf_path = os.path.join(DATA_DIR, "sample.pdf")
+    if not os.path.exists(pdf_path):
+        pytest.skip("PDF not available for test")
+
+    pages = pdf_page_count(pdf_path)
+    parts = [extract_from_pdf_fitz(pdf_path, p, p + 1) for p in range(pages)]
+
+    assert "\n".join(p for p in parts if p) == extract_from_pdf_fitz(pdf_path)
+
+
+def test_parallel_extraction_is_deterministic():
+    """Output order does not depend on the worker count"""
+    from src.data_extraction.run_extraction import ExtractionJob, extract_jobs
+
+    pdf_path = os.path.join(DATA_DIR, "sample.pdf")
+    if not os.path.exists(pdf_path):
+        pytest.skip("PDF not available for test")
+
+    jobs = [ExtractionJob(f"sample-{i}", pdf_path, f"===== SOURCE: sample-{i} =====") for i in range(3)]
+
+    serial = extract_jobs(jobs, workers=1, pages_per_task=1)
+    parallel = extract_jobs(jobs, workers=2, pages_per_task=1)
+
+    assert serial == parallel
+    assert len(serial) == 3 and serial[0]
+
+
+def test_extraction_cache_keys_on_content(tmp_path):
+    """Cache hits survive a touch, miss on changed bytes, and prune old entries"""
+    from src.data_extraction.extraction_cache import ExtractionCache
+
+    pdf = tmp_path / "doc.pdf"
+    pdf.write_bytes(b"%PDF-1 first")
+    cache_dir = str(tmp_path / "cache")
+
+    cache = ExtractionCache(cache_dir)
+    assert cache.get(str(pdf)) is None
+    cache.put(str(pdf), "cleaned v1")
+    cache.save([str(pdf)])
+
+    os.utime(pdf, (1, 1))
+    cache = ExtractionCache(cache_dir)
+    assert cache.get(str(pdf)) == "cleaned v1"
+
+    pdf.write_bytes(b"%PDF-1 second")
+    assert cache.get(str(pdf)) is None
+    cache.put(str(pdf), "cleaned v2")
+    cache.save([str(pdf)])
+
+    assert len([n for n in os.listdir(cache_dir) if n.endswith(".txt")]) == 1
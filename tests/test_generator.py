@@ -1,19 +1,34 @@
-from src.generation.generator import Generator
+from src.generation.generator import (
+    ForbiddenPhraseGuard,
+    Generator,
+    ResponseReplaced,
+)
+from src.generation.registry import GeneratorRegistry
+from src.generation.scheduler import (
+    GenerationScheduler,
+    SchedulerRejected,
+    SchedulerTimeout,
+)
+from benchmarks.fake_ollama import FakeOllamaServer
 from unittest.mock import patch
+import pytest
 import subprocess
+import time
 
 def fake_subprocess_run_success(*args, **kwargs):
     class FakeResult:
-        stdout = b"The library is open from 8 AM to 8 PM on weekdays."
-        stderr = b""
+        returncode = 0
+        stdout = "The library is open from 8 AM to 8 PM on weekdays."
+        stderr = ""
     return FakeResult()
 
 def fake_subprocess_run_error(*args, **kwargs):
     raise FileNotFoundError()
 
+@patch.dict("os.environ", {"OLLAMA_PATH": "ollama"})
 @patch("subprocess.run", side_effect=fake_subprocess_run_success)
 def test_generator_with_mocked_llm(mock_run):
-    gen = Generator()
+    gen = Generator(backend="subprocess")
     answer = gen.generate(
         "What are the library working hours?",
         ["Library timings are available."]
@@ -25,9 +40,10 @@ def test_empty_context_refusal():
     answer = gen.generate("What is hostel curfew?", [])
     assert "don't have" in answer.lower()
 
+@patch.dict("os.environ", {"OLLAMA_PATH": "ollama"})
 @patch("subprocess.run", side_effect=fake_subprocess_run_error)
 def test_model_not_available(mock_run):
-    gen = Generator()
+    gen = Generator(backend="subprocess")
     answer = gen.generate(
         "What are the library hours?",
         ["Library timings exist."]
@@ -37,3 +53,194 @@ def test_model_not_available(mock_run):
     or "ollama is not installed" in answer.lower()
 )
 
+def test_http_backend_uses_keep_alive():
+    with FakeOllamaServer() as server:
+        gen = Generator()
+        gen.backend.host = server.url
+        answer = gen.generate(
+            "What are the library working hours?",
+            ["Library timings are available."]
+        )
+
+    assert "8 AM" in answer
+    assert server.requests[0]["keep_alive"]
+    assert server.requests[0]["stream"] is False
+
+@patch.dict("os.environ", {"OLLAMA_PATH": "ollama"})
+@patch("subprocess.run", side_effect=fake_subprocess_run_success)
+def test_http_backend_falls_back_to_subprocess(mock_run):
+    gen = Generator()
+    gen.backend.host = "http://127.0.0.1:9"  # nothing listens here
+    answer = gen.generate(
+        "What are the library working hours?",
+        ["Library timings are available."]
+    )
+    assert "8 AM" in answer
+    assert mock_run.called
+
+def test_stream_time_to_first_token():
+    with FakeOllamaServer(token_delay=0.05) as server:
+        gen = Generator()
+        gen.backend.host = server.url
+
+        start = time.perf_counter()
+        first_token_at = None
+        tokens = []
+        for token in gen.stream(
+            "What are the library working hours?",
+            ["Library timings are available."]
+        ):
+            if first_token_at is None:
+                first_token_at = time.perf_counter() - start
+            tokens.append(token)
+        total = time.perf_counter() - start
+
+    assert "".join(tokens) == server.response
+    assert first_token_at < total / 3
+
+def test_guard_blocks_phrase_split_across_tokens():
+    guard = ForbiddenPhraseGuard()
+    emitted = ""
+    for token in ["The library is ", "gener", "ally open ", "at 8 AM."]:
+        emitted += guard.feed(token)
+    assert guard.blocked
+    assert "gener" not in emitted
+
+def test_stream_replaces_blocked_answer():
+    with FakeOllamaServer(
+        response="The hostel has rooms for first years and usually opens in July."
+    ) as server:
+        gen = Generator()
+        gen.backend.host = server.url
+
+        with pytest.raises(ResponseReplaced) as exc:
+            list(gen.stream("When does the hostel open?", ["Hostel details."]))
+
+    assert "don't have" in exc.value.message.lower()
+
+def test_registry_reuses_generator_per_model():
+    registry = GeneratorRegistry()
+    assert registry.get("llama3.1:8b") is registry.get("llama3.1:8b")
+    assert registry.get("llama3.1:8b") is not registry.get("deepseek-r1:8b")
+
+    with pytest.raises(ValueError):
+        registry.get("not-a-model")
+
+def test_registry_warm_up_loads_model():
+    registry = GeneratorRegistry()
+    with FakeOllamaServer() as server:
+        registry.get("llama3.1:8b").backend.host = server.url
+        assert registry.warm_up("llama3.1:8b")
+
+    assert registry.is_healthy("llama3.1:8b")
+    assert "llama3.1:8b" in server.loaded_models
+
+def test_scheduler_rejects_when_queue_full():
+    scheduler = GenerationScheduler(concurrency={"m": 1}, max_waiting=0)
+    with scheduler.slot("m"):
+        with pytest.raises(SchedulerRejected):
+            with scheduler.slot("m"):
+                pass
+
+    assert scheduler.stats()["m"]["rejected"] == 1
+
+def test_scheduler_wait_counts_against_deadline():
+    scheduler = GenerationScheduler(
+        concurrency={"m": 1}, max_waiting=4, min_generation_seconds=0.05
+    )
+    with scheduler.slot("m"):
+        start = time.monotonic()
+        with pytest.raises(SchedulerTimeout):
+            with scheduler.slot("m", deadline=time.monotonic() + 0.15):
+                pass
+        waited = time.monotonic() - start
+
+    assert 0.05 <= waited < 0.5
+    assert scheduler.stats()["m"]["timeouts"] == 1
+
+def test_scheduler_hands_remaining_budget_to_generation():
+    scheduler = GenerationScheduler(concurrency={"m": 2}, min_generation_seconds=0)
+    with scheduler.slot("m", deadline=time.monotonic() + 10) as remaining:
+        assert 9 < remaining <= 10
+        assert scheduler.stats()["m"]["active"] == 1
+    assert scheduler.stats()["m"]["active"] == 0
+
+def test_scheduler_passes_slot_on_when_woken_waiter_is_out_of_budget(monkeypatch):
+    import threading
+    import types
+    from src.generation import scheduler as scheduler_module
+
+    # A fake clock lets the first waiter's deadline pass while it is still
+    # blocked in cond.wait, so the freed slot's notify is what wakes it
+    clock = [0.0]
+    monkeypatch.setattr(scheduler_module, "time", types.SimpleNamespace(monotonic=lambda: clock[0]))
+    scheduler = GenerationScheduler(concurrency={"m": 1}, max_waiting=4, min_generation_seconds=0)
+    results = {}
+
+    def wait_for_slot(name, deadline):
+        try:
+            with scheduler.slot("m", deadline=deadline):
+                results[name] = "admitted"
+        except SchedulerTimeout:
+            results[name] = "timeout"
+
+    def wait_until_queued(count):
+        for _ in range(200):
+            if scheduler.stats()["m"]["queue_depth"] == count:
+                return
+            time.sleep(0.01)
+        raise AssertionError("waiter never queued")
+
+    with scheduler.slot("m"):
+        first = threading.Thread(target=wait_for_slot, args=("first", 5.0), daemon=True)
+        first.start()
+        wait_until_queued(1)
+        second = threading.Thread(target=wait_for_slot, args=("second", None), daemon=True)
+        second.start()
+        wait_until_queued(2)
+        clock[0] = 6.0
+
+    first.join(2)
+    second.join(2)
+    assert results == {"first": "timeout", "second": "admitted"}
+
+def count_words(text):
+    return len(text.split())
+
+def test_context_merges_overlapping_chunks():
+    from src.generation.context import build_context
+
+    text = "Hostel curfew is 9 PM for all first year students. Late entry needs the warden's written permission."
+    first, second = text[:70], text[40:]          # 30 characters repeated, as the chunker overlaps
+
+    assert build_context([second, first], 100, count_words) == [text]
+    assert build_context([text, first], 100, count_words) == [text]   # contained
+
+def test_context_merges_overlaps_only_within_a_source():
+    from src.generation.context import build_context
+
+    text = "Hostel curfew is 9 PM for all first year students. Late entry needs the warden's written permission."
+    first, second = text[:70], text[40:]
+
+    assert build_context([second, first], 100, count_words, ["hostel.pdf", "hostel.pdf"]) == [text]
+    assert build_context([second, first], 100, count_words, ["hostel.pdf", "rules.pdf"]) == [second.strip(), first]
+    # A chunk contained in another is a duplicate whatever its source
+    assert build_context([text, first], 100, count_words, ["hostel.pdf", "rules.pdf"]) == [text]
+
+def test_context_drops_near_duplicates_and_packs_budget():
+    from src.generation.context import build_context
+
+    a = "The library is open from 8 AM to 8 PM on weekdays and 9 AM to 5 PM on weekends"
+    b = "The library is open from 8 AM to 8 PM on weekdays and 9 AM to 5 PM on Sundays"
+    c = "Hostel fee is Rs. 30,000 per semester"
+    d = "Mess fee is Rs. 4,000 monthly"
+
+    assert build_context([a, b, c, d], 100, count_words) == [a, c, d]
+    # d still fits after c is too long for what is left
+    assert build_context([a, c, d], len(a.split()) + 6, count_words) == [a, d]
+
+def test_prompt_context_is_packed():
+    gen = Generator()
+    chunk = "Hostel curfew is 9 PM for all first year students."
+    prompt = gen.build_prompt("When is curfew?", [chunk, chunk + " "])
+    assert prompt.count("Hostel curfew") == 1
@@ -0,0 +1,49 @@
+import tracemalloc
+
+from src.utils.metrics import Counter, Histogram, render_metrics
+
+
+def test_histogram_quantiles_from_buckets():
+    histogram = Histogram("test_latency_seconds", "Test latency", label="stage", values=("a", "b"))
+    for i in range(1, 101):
+        histogram.observe(i / 100, "a")   # 0.01 … 1.0 s
+
+    assert 0.4 <= histogram.quantile(0.5, "a") <= 0.6
+    assert 0.9 <= histogram.quantile(0.95, "a") <= 1.0
+    assert histogram.quantile(0.99, "a") <= 1.0
+    assert histogram.quantile(0.5, "b") == 0.0
+    assert histogram.percentiles_ms("a")["p99"] <= 1000
+
+
+def test_prometheus_text_format():
+    histogram = Histogram("test_render_seconds", "Render test", buckets=(0.1, 1.0))
+    counter = Counter("test_render_total", "Render test", label="result", values=("hit", "miss"))
+    histogram.observe(0.05)
+    histogram.observe(5.0)
+    counter.inc("hit")
+
+    text = render_metrics()
+    assert "# TYPE test_render_seconds histogram" in text
+    assert 'test_render_seconds_bucket{le="0.1"} 1' in text
+    assert 'test_render_seconds_bucket{le="1.0"} 1' in text
+    assert 'test_render_seconds_bucket{le="+Inf"} 2' in text
+    assert "test_render_seconds_count 2" in text
+    assert 'test_render_seconds_quantile{quantile="0.5"}' in text
+    assert 'test_render_total{result="hit"} 1' in text
+    assert 'test_render_total{result="miss"} 0' in text
+
+
+def test_recording_does_not_grow_memory():
+    histogram = Histogram("test_memory_seconds", "Memory test")
+    histogram.observe(0.5)
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for i in range(100000):
+        histogram.observe((i % 1000) / 100)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    grown = sum(stat.size_diff for stat in after.compare_to(before, "lineno") if stat.size_diff > 0)
+    assert grown < 4096
+    assert histogram._series[""].count == 100001
@@ -0,0 +1,117 @@
+from unittest.mock import MagicMock
+import pytest
+
+import src.pipeline.rag_graph as rag_graph
+from src.generation.generator import REFUSAL_MESSAGE
+from src.utils.metrics import REFUSALS
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    """rag_graph with a scripted retriever, a fake generator, no cache and a pass-through reranker."""
+    rag_graph.init_pipeline()
+
+    retriever = MagicMock()
+    retriever.min_score = 0.2
+    generator = MagicMock()
+    generator.generate.return_value = "The library opens at 8 AM."
+    generator.stream.return_value = iter(["The library ", "opens at 8 AM."])
+    get_generator = MagicMock(return_value=generator)
+    reranker = MagicMock()
+    reranker.rerank_indices.side_effect = lambda question, docs, deadline: list(range(len(docs)))
+
+    monkeypatch.setattr(rag_graph, "retriever", retriever)
+    monkeypatch.setattr(rag_graph, "retrieval_batcher", None)
+    monkeypatch.setattr(rag_graph, "answer_cache", None)
+    monkeypatch.setattr(rag_graph, "reranker", reranker)
+    monkeypatch.setattr(rag_graph, "get_generator", get_generator)
+    monkeypatch.setattr(rag_graph, "_branch_counts", rag_graph.Counter())
+    return retriever, get_generator, reranker
+
+
+def test_off_topic_question_is_refused_without_a_model(pipeline):
+    retriever, get_generator, _ = pipeline
+    retriever.retrieve_sourced.return_value = []
+    refusals = REFUSALS.value("no_context")
+
+    assert rag_graph.run_rag("Who won the world cup?") == REFUSAL_MESSAGE
+    assert "".join(rag_graph.stream_rag("Who won the world cup?")) == REFUSAL_MESSAGE
+
+    get_generator.assert_not_called()
+    assert rag_graph.graph_stats()["refuse"] == 2
+    assert REFUSALS.value("no_context") == refusals + 2
+
+
+def test_low_scores_are_refused_and_relevant_context_generates(pipeline):
+    retriever, get_generator, _ = pipeline
+
+    retriever.retrieve_sourced.return_value = [("weak match", 0.1, "clubs")]
+    assert rag_graph.run_rag("library hours?") == REFUSAL_MESSAGE
+    get_generator.assert_not_called()
+
+    retriever.retrieve_sourced.return_value = [("Library: 8 AM to 8 PM", 0.7, "library")]
+    assert rag_graph.run_rag("library hours?") == "The library opens at 8 AM."
+    assert get_generator.call_count == 1
+    # Each chunk's source reaches the generator, which merges overlaps within one source
+    assert get_generator.return_value.generate.call_args.kwargs["sources"] == ["library"]
+
+    assert rag_graph.graph_stats() == {"refuse": 1, "answer": 1, "refused_share": 0.5}
+
+
+
+def test_pipeline_is_built_on_first_use_not_at_import():
+    import subprocess
+    import sys
+
+    # A fresh interpreter: this test session has already built the pipeline
+    code = (
+        "import sys, src.pipeline.rag_graph as g\n"
+        "assert g.rag_app is None and g.retriever is None\n"
+        "assert 'langgraph' not in sys.modules\n"
+        "assert 'chromadb.api' not in sys.modules\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+def test_graph_nodes_are_traced_under_the_request(pipeline):
+    import contextvars
+    from concurrent.futures import ThreadPoolExecutor
+    from src.utils import tracing
+
+    retriever, _, _ = pipeline
+    retriever.retrieve_sourced.return_value = [("Library: 8 AM to 8 PM", 0.7, "library")]
+    spans = []
+    exporter = MagicMock()
+    exporter.export.side_effect = spans.append
+    tracing.configure(exporter)
+    try:
+        with tracing.start_trace("POST /ask", "req-42"):
+            rag_graph.run_rag("library hours?")
+
+            # Like the backend's streaming response: every chunk is pulled
+            # on a worker thread, in a copy of the request's context
+            stream = rag_graph.stream_rag("library hours?")
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                while pool.submit(contextvars.copy_context().run, next, stream, None).result() is not None:
+                    pass
+    finally:
+        tracing.configure(None)
+
+    names = [s.name for s in spans]
+    assert names.count("retrieve") == 2 and names.count("generate") == 2
+    assert "rerank" in names
+    assert {s.request_id for s in spans} == {"req-42"}
+
+
+def test_rerank_keeps_each_chunks_source(pipeline):
+    retriever, get_generator, reranker = pipeline
+    # Same text in two programs' documents; the reranker swaps them
+    retriever.retrieve_sourced.return_value = [
+        ("Tuition fee is Rs. 30,000", 0.7, "ug_btech"),
+        ("Tuition fee is Rs. 30,000", 0.6, "pg_mtech")
+    ]
+    reranker.rerank_indices.side_effect = lambda question, docs, deadline: [1, 0]
+
+    "".join(rag_graph.stream_rag("tuition fee?"))
+
+    assert get_generator.return_value.stream.call_args.kwargs["sources"] == ["pg_mtech", "ug_btech"]
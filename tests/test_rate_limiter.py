@@ -0,0 +1,69 @@
+import pytest
+
+from src.utils.rate_limiter import MemoryStore, SQLiteStore, TokenBucketLimiter
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_store(request, tmp_path):
+    if request.param == "memory":
+        return lambda max_clients=100: MemoryStore(max_clients=max_clients)
+    return lambda max_clients=100: SQLiteStore(str(tmp_path / "limits.sqlite3"), max_clients=max_clients)
+
+
+def test_bucket_allows_a_burst_then_refills(make_store):
+    limiter = TokenBucketLimiter(capacity=3, window_seconds=3, store=make_store(), evict_interval=1e9)
+
+    assert [limiter.allow("1.2.3.4", now=100.0) for _ in range(4)] == [True, True, True, False]
+    # Other clients have their own bucket
+    assert limiter.allow("5.6.7.8", now=100.0)
+    # One token per second comes back
+    assert limiter.allow("1.2.3.4", now=101.0)
+    assert not limiter.allow("1.2.3.4", now=101.0)
+    assert limiter.stats()["limited"] == 2
+
+
+def test_idle_clients_are_evicted(make_store):
+    store = make_store()
+    limiter = TokenBucketLimiter(capacity=30, window_seconds=60, store=store, evict_interval=10)
+    limiter._next_eviction = 10.0
+
+    for i in range(50):
+        limiter.allow(f"10.0.0.{i}", now=0.0)
+    limiter.allow("10.0.1.1", now=50.0)
+    assert len(store) == 51
+
+    # Full again after 60 s idle: the first 50 go, the recent one stays
+    limiter.allow("10.0.1.2", now=70.0)
+    assert len(store) == 2
+    assert limiter.stats()["evicted"] == 50
+
+
+def test_eviction_does_not_reset_a_limited_client(make_store):
+    limiter = TokenBucketLimiter(capacity=2, window_seconds=60, store=make_store(), evict_interval=1)
+    limiter._next_eviction = 0.0
+
+    assert limiter.allow("a", now=0.0) and limiter.allow("a", now=0.0)
+    assert not limiter.allow("a", now=5.0)
+    assert not limiter.allow("a", now=6.0)
+
+
+def test_table_size_is_bounded(make_store):
+    store = make_store(max_clients=10)
+    limiter = TokenBucketLimiter(capacity=5, window_seconds=60, store=store, evict_interval=1)
+    limiter._next_eviction = 0.0
+
+    for i in range(100):
+        limiter.allow(f"ip-{i}", now=float(i) / 100)
+    assert len(store) <= 11
+    # The most recent clients are the ones kept
+    assert not store.evict_idle(0.9)
+
+
+def test_sqlite_store_is_shared_between_processes(tmp_path):
+    path = str(tmp_path / "limits.sqlite3")
+    worker_a = TokenBucketLimiter(capacity=2, window_seconds=60, store=SQLiteStore(path))
+    worker_b = TokenBucketLimiter(capacity=2, window_seconds=60, store=SQLiteStore(path))
+
+    assert worker_a.allow("1.2.3.4", now=0.0)
+    assert worker_b.allow("1.2.3.4", now=0.0)
+    assert not worker_a.allow("1.2.3.4", now=0.0)
@@ -1,6 +1,11 @@
 # tests/test_retriever.py
 
 from unittest.mock import MagicMock, patch
+import threading
+import numpy as np
+import pytest
+from src.retrieval.batcher import BatcherOverloaded, RetrievalBatcher
+from src.retrieval.query_encoder import QueryEncoder
 from src.retrieval.retriever import Retriever
 
 
@@ -48,3 +53,346 @@ def test_retriever_no_crash_on_random_query(mock_client):
 
     r = Retriever()
     assert isinstance(r.retrieve("asdkjhaskjdhkajshdk"), list)
+
+
+class FakeModel:
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, **kwargs):
+        self.calls.append(list(texts))
+        return np.array([[float(len(t)), 1.0] for t in texts], dtype=np.float32)
+
+
+def test_query_encoder_caches_normalized_queries():
+    encoder = QueryEncoder()
+    encoder._model = FakeModel()
+
+    encoder.encode("Library hours?")
+    encoder.encode_many(["library   HOURS", "hostel fee", "hostel fee", "M.Tech fees in Rs. 30,000"])
+
+    # Normalized form is the cache key; the model sees the question as asked
+    assert encoder._model.calls == [["Library hours?"], ["hostel fee", "M.Tech fees in Rs. 30,000"]]
+    assert encoder.stats()["misses"] == 3
+
+
+def test_retrieve_many_single_batched_query():
+    encoder = QueryEncoder()
+    encoder._model = FakeModel()
+
+    r = Retriever(top_k=2, min_score=0.0, encoder=encoder)
+    r.collection = MagicMock()
+    r.collection.query.return_value = {
+        "documents": [["lib doc"], ["hostel doc"]],
+        "distances": [[0.5], [0.6]]
+    }
+
+    results = r.retrieve_many(["library hours", "", "hostel fee"])
+
+    assert results == [["lib doc"], [], ["hostel doc"]]
+    assert r.collection.query.call_count == 1
+    assert len(r.collection.query.call_args.kwargs["query_embeddings"]) == 2
+    assert len(encoder._model.calls) == 1
+
+
+def test_batcher_coalesces_concurrent_queries():
+    retriever = MagicMock()
+    retriever.retrieve_many.side_effect = lambda qs: [[f"doc:{q}"] for q in qs]
+    batcher = RetrievalBatcher(retriever, max_batch_size=8, max_wait_ms=50)
+
+    results = {}
+
+    def ask(i):
+        results[i] = batcher.retrieve(f"q{i}")
+
+    threads = [threading.Thread(target=ask, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == {i: [f"doc:q{i}"] for i in range(8)}
+    assert retriever.retrieve_many.call_count < 8
+
+
+def test_batcher_rejects_when_queue_full():
+    batcher = RetrievalBatcher(MagicMock(), max_queue_depth=1)
+    batcher._ensure_worker = lambda: None  # nothing drains the queue
+    batcher._queue.put_nowait(("waiting", None))
+
+    with pytest.raises(BatcherOverloaded):
+        batcher.retrieve("one more")
+
+
+def write_test_index(path):
+    from src.retrieval.numpy_index import write_numpy_index
+
+    vectors = np.array([[1.0, 0.0], [0.0, 1.0], [0.7, 0.7]], dtype=np.float32)
+    write_numpy_index(str(path), ["a", "b", "c"], ["doc a", "doc b", "doc ç"], vectors)
+
+
+def test_numpy_index_exact_top_k(tmp_path):
+    from src.retrieval.numpy_index import NumpyVectorIndex
+
+    write_test_index(tmp_path / "idx")
+    index = NumpyVectorIndex(str(tmp_path / "idx"))
+
+    indices, scores = index.search(np.array([[1.0, 0.1]]), k=2)
+
+    assert indices.tolist() == [[0, 2]]
+    assert scores[0, 0] > scores[0, 1]
+    assert index.document(2) == "doc ç"
+    assert index.search(np.array([[0.0, 1.0]]), k=10)[0].shape == (1, 3)
+
+
+def test_retriever_numpy_backend(tmp_path, monkeypatch):
+    import src.retrieval.numpy_index as numpy_index
+
+    write_test_index(tmp_path / "idx")
+    monkeypatch.setattr(numpy_index, "NUMPY_INDEX_PATH", str(tmp_path / "idx"))
+
+    encoder = QueryEncoder()
+    encoder._model = MagicMock()
+    encoder._model.encode.side_effect = lambda texts, **kw: np.array(
+        [[0.0, 1.0] if "hostel" in t else [1.0, 0.0] for t in texts], dtype=np.float32
+    )
+
+    r = Retriever(top_k=1, min_score=0.0, encoder=encoder, backend="numpy")
+
+    assert r.collection is None
+    assert r.retrieve_many(["library", "hostel"]) == [["doc a"], ["doc b"]]
+
+
+def test_detect_filters_from_program_and_department():
+    from src.retrieval.filters import detect_filters
+
+    sources = detect_filters("CSE M.Tech syllabus")["source"]
+
+    assert {"pg_mtech_cse_datascience", "pg_mtech_cse_infosec"} <= set(sources)
+    assert "24 may 2023_PTU_MTech_Regulations_2021" in sources
+    assert "faculty_staff" in sources            # sections without a program stay in scope
+    assert "ug_btech_cse" not in sources
+    assert "mca" not in sources
+
+    assert detect_filters("What is it about?") is None    # "it" is not IT
+    assert detect_filters("What is the hostel fee?") is None
+
+
+def test_numpy_index_filtered_search(tmp_path):
+    from src.retrieval.numpy_index import NumpyVectorIndex, write_numpy_index
+
+    vectors = np.array([[1.0, 0.0], [0.0, 1.0], [0.9, 0.1], [0.1, 0.9]], dtype=np.float32)
+    metas = [{"source": "x"}, {"source": "y"}, {"source": "y"}, {"source": "x"}]
+    write_numpy_index(str(tmp_path / "idx"), ["a", "b", "c", "d"], ["a", "b", "c", "d"], vectors, metadatas=metas)
+    index = NumpyVectorIndex(str(tmp_path / "idx"))
+
+    # rows are grouped by source, so each source is one contiguous run
+    assert index.runs({"source": ["y"]}) == [(2, 4)]
+
+    indices, _ = index.search(np.array([[1.0, 0.0]]), k=1, filters={"source": ["y"]})
+    assert index.document(int(indices[0, 0])) == "c"
+
+    indices, _ = index.search(np.array([[1.0, 0.0]]), k=5, filters={"source": ["x"]})
+    assert [index.document(int(i)) for i in indices[0]] == ["a", "d"]
+
+
+def test_retrieve_many_groups_queries_by_detected_filter():
+    encoder = QueryEncoder()
+    encoder._model = FakeModel()
+
+    r = Retriever(top_k=2, min_score=0.0, encoder=encoder)
+    r.collection = MagicMock()
+    r.collection.query.side_effect = lambda **kw: {
+        "documents": [["doc"] for _ in kw["query_embeddings"]],
+        "distances": [[0.5] for _ in kw["query_embeddings"]]
+    }
+
+    results = r.retrieve_many(["M.Tech data science electives", "library hours"])
+
+    assert results == [["doc"], ["doc"]]
+    wheres = [call.kwargs["where"] for call in r.collection.query.call_args_list]
+    assert None in wheres
+    assert "pg_mtech_cse_datascience" in [w for w in wheres if w][0]["source"]["$in"]
+
+
+def test_retrieve_falls_back_when_filter_finds_nothing():
+    encoder = QueryEncoder()
+    encoder._model = FakeModel()
+
+    r = Retriever(top_k=2, min_score=0.0, encoder=encoder)
+    r.collection = MagicMock()
+    r.collection.query.side_effect = lambda **kw: (
+        {"documents": [[]], "distances": [[]]} if kw["where"]
+        else {"documents": [["general doc"]], "distances": [[0.5]]}
+    )
+
+    assert r.retrieve("PhD hostel rules") == ["general doc"]
+    assert r.collection.query.call_count == 2
+
+
+def test_lexical_index_matches_codes_and_amounts(tmp_path):
+    from src.retrieval.lexical_index import LexicalIndex, write_lexical_index
+
+    docs = [
+        "CSUC106 Programming in C, 3 credits",
+        "Tuition fee Rs. 32,101 per semester",
+        "Hostel fee Rs. 30,000 per semester",
+        "Clause 4.1 covers attendance",
+    ]
+    write_lexical_index(str(tmp_path), docs)
+    index = LexicalIndex(str(tmp_path), size=len(docs))
+
+    rows, scores = index.search("What is CSUC106?", k=5)
+    assert rows.tolist() == [0]
+
+    rows, _ = index.search("is the fee 32101", k=5)
+    assert rows[0] == 1
+    assert set(rows.tolist()) == {1, 2}
+
+    rows, _ = index.search("fee", k=5, runs=[(2, 4)])
+    assert rows.tolist() == [2]
+
+    assert index.search("clause 4.1", k=5)[0].tolist() == [3]
+    assert index.search("unknown words", k=5)[0].size == 0
+
+
+def test_retriever_hybrid_adds_lexical_hits(tmp_path, monkeypatch):
+    import src.retrieval.numpy_index as numpy_index
+    from src.retrieval.numpy_index import write_numpy_index
+
+    vectors = np.array([[1.0, 0.0], [0.9, 0.1], [0.0, 1.0]], dtype=np.float32)
+    docs = ["library opening hours", "library membership rules", "CSUC106 library lab manual"]
+    write_numpy_index(str(tmp_path / "idx"), ["a", "b", "c"], docs, vectors)
+    monkeypatch.setattr(numpy_index, "NUMPY_INDEX_PATH", str(tmp_path / "idx"))
+
+    encoder = QueryEncoder()
+    encoder._model = FakeModel()
+
+    r = Retriever(top_k=2, min_score=0.0, encoder=encoder, auto_filter=False, hybrid=True)
+    r.collection = MagicMock()
+    r.collection.query.side_effect = lambda **kw: {
+        "ids": [["a"]],
+        "documents": [["library opening hours"]],
+        "distances": [[0.9]]
+    }
+
+    assert r.read_index is not None
+    # the exact code only BM25 finds is fused in, ahead of "b"
+    assert r.retrieve("CSUC106 library") == ["library opening hours", "CSUC106 library lab manual"]
+    assert r.collection.query.call_args.kwargs["n_results"] == r.n_results > r.top_k
+
+
+def test_retriever_hybrid_keeps_refusals(tmp_path, monkeypatch):
+    import src.retrieval.numpy_index as numpy_index
+
+    write_test_index(tmp_path / "idx")
+    monkeypatch.setattr(numpy_index, "NUMPY_INDEX_PATH", str(tmp_path / "idx"))
+
+    encoder = QueryEncoder()
+    encoder._model = FakeModel()
+
+    r = Retriever(top_k=2, min_score=0.5, encoder=encoder, auto_filter=False, hybrid=True)
+    r.collection = MagicMock()
+    r.collection.query.return_value = {"ids": [["a"]], "documents": [["doc a"]], "distances": [[1.5]]}
+
+    # "doc" matches BM25, but no vector hit passed the threshold (similarity 0.25)
+    assert r.retrieve("doc") == []
+
+
+class FakeCrossEncoder:
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, pairs, **kwargs):
+        self.calls.append(list(pairs))
+        # more shared words with the question = more relevant
+        return np.array([len(set(q.split()) & set(d.split())) for q, d in pairs], dtype=np.float32)
+
+
+def count_words(text):
+    return len(text.split())
+
+
+def test_reranker_orders_by_cross_encoder_within_budgets():
+    from src.retrieval.reranker import CrossEncoderReranker
+
+    reranker = CrossEncoderReranker(top_n=2, token_budget=8, count_tokens=count_words)
+    reranker._model = FakeCrossEncoder()
+
+    docs = ["library rules", "hostel fee is due in june", "hostel mess fee per month", "hostel"]
+    question = "hostel mess fee"
+
+    # best three: mess fee (3 words shared), fee due (2), hostel (1);
+    # "fee is due" would overflow the 8-token budget, so "hostel" is next
+    assert reranker.rerank(question, docs) == ["hostel mess fee per month", "hostel"]
+    assert len(reranker._model.calls) == 1                 # one batched call
+    assert len(reranker._model.calls[0]) == len(docs)
+    assert reranker.stats()["reranked"] == 1
+    assert reranker.rerank_indices(question, docs) == [2, 3]
+
+
+def test_reranker_skips_when_budget_exhausted_or_model_missing():
+    import time
+    from src.retrieval.reranker import CrossEncoderReranker
+
+    reranker = CrossEncoderReranker(top_n=2, token_budget=100, count_tokens=count_words)
+    reranker._model = FakeCrossEncoder()
+    docs = ["a", "b", "c hostel"]
+
+    # less time left than the rerank plus the generation minimum
+    assert reranker.rerank("hostel", docs, deadline=time.monotonic() + 1) == ["a", "b"]
+    assert reranker._model.calls == []
+
+    reranker._model = None
+    reranker._unavailable = True
+    assert reranker.rerank("hostel", docs) == ["a", "b"]
+    assert reranker.stats()["skipped"] == 2
+
+
+def test_relevance_gate_keeps_closest_hits():
+    from src.retrieval.retriever import distance_to_similarity, relevance_mask
+
+    # Chroma "l2" on unit vectors: distance 0.2 is similarity 0.9
+    distances = np.array([[0.2, 0.4, 1.0, 1.7], [1.7, 1.8, np.nan, np.nan]], dtype=np.float32)
+    similarities = distance_to_similarity(distances, "l2")
+
+    mask = relevance_mask(similarities, min_score=0.2, top_k=3, max_gap=0.25)
+
+    # 0.5 is more than 0.25 below the best 0.9; 0.15 and 0.1 are below 0.2
+    assert mask.tolist() == [[True, True, False, False], [False, False, False, False]]
+    assert distance_to_similarity(np.array([0.3]), "cosine").tolist() == pytest.approx([0.7])
+
+
+def test_retrieve_scored_drops_distant_hits():
+    encoder = QueryEncoder()
+    encoder._model = FakeModel()
+
+    r = Retriever(top_k=3, encoder=encoder, auto_filter=False, hybrid=False)
+    r.collection = MagicMock()
+    r.collection.query.return_value = {
+        "documents": [["close", "near", "far"]],
+        "distances": [[0.2, 0.3, 1.2]]
+    }
+
+    # the closest chunks are kept (the old check on distances kept "far")
+    assert r.retrieve_scored("library hours") == [("close", pytest.approx(0.9)), ("near", pytest.approx(0.85))]
+    assert r.retrieve("library hours") == ["close", "near"]
+
+
+def test_retrieve_sourced_carries_each_chunks_source():
+    encoder = QueryEncoder()
+    encoder._model = FakeModel()
+
+    r = Retriever(top_k=3, encoder=encoder, auto_filter=False, hybrid=False)
+    r.collection = MagicMock()
+    r.collection.query.return_value = {
+        "documents": [["hostel curfew", "hostel fee"]],
+        "distances": [[0.2, 0.3]],
+        "metadatas": [[{"source": "hostel_rules"}, None]]
+    }
+
+    assert r.retrieve_sourced("hostel") == [
+        ("hostel curfew", pytest.approx(0.9), "hostel_rules"),
+        ("hostel fee", pytest.approx(0.85), "")
+    ]
+    assert "metadatas" in r.collection.query.call_args.kwargs["include"]
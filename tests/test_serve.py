@@ -0,0 +1,95 @@
+import importlib.util
+import os
+import sys
+import types
+
+import numpy as np
+import pytest
+
+from src.embeddings.index_version import read_index_version
+from src.retrieval import numpy_index, retriever
+from src.retrieval.numpy_index import write_numpy_index
+
+SERVE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sage-backend", "serve.py")
+
+
+@pytest.fixture
+def serve():
+    spec = importlib.util.spec_from_file_location("sage_serve", SERVE_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_worker_environment_splits_shared_limits(serve, monkeypatch):
+    monkeypatch.setenv("SAGE_GENERATION_QUEUE_DEPTH", "8")
+    monkeypatch.setenv("SAGE_LLAMA_CONCURRENCY", "4")
+    monkeypatch.delenv("SAGE_DEEPSEEK_CONCURRENCY", raising=False)
+
+    env = serve.worker_environment(4)
+    assert env["SAGE_RETRIEVAL_BACKEND"] == "numpy"
+    assert env["SAGE_RATE_LIMIT_STORE"] == "sqlite"
+    assert env["SAGE_GENERATION_QUEUE_DEPTH"] == "2"
+    assert env["SAGE_LLAMA_CONCURRENCY"] == "1"
+    assert env["SAGE_DEEPSEEK_CONCURRENCY"] == "1"
+
+    env = serve.worker_environment(1)
+    assert env["SAGE_RATE_LIMIT_STORE"] == "memory"
+    assert env["SAGE_GENERATION_QUEUE_DEPTH"] == "8"
+    assert env["SAGE_LLAMA_CONCURRENCY"] == "4"
+
+
+def test_explicit_shared_limits_are_totals_across_workers(serve, monkeypatch):
+    # Recorded first, so monkeypatch also removes what apply_worker_environment adds
+    for key in serve.worker_environment(1):
+        monkeypatch.setenv(key, "")
+        monkeypatch.delenv(key)
+    monkeypatch.setenv("SAGE_GENERATION_QUEUE_DEPTH", "12")
+    monkeypatch.setenv("SAGE_LLAMA_CONCURRENCY", "4")
+    monkeypatch.setenv("SAGE_RETRIEVAL_BACKEND", "chroma")
+
+    serve.apply_worker_environment(4)
+
+    assert os.environ["SAGE_GENERATION_QUEUE_DEPTH"] == "3"
+    assert os.environ["SAGE_LLAMA_CONCURRENCY"] == "1"
+    assert os.environ["SAGE_DEEPSEEK_CONCURRENCY"] == "1"
+    # Other explicit settings are kept as they are
+    assert os.environ["SAGE_RETRIEVAL_BACKEND"] == "chroma"
+    assert os.environ["SAGE_RATE_LIMIT_STORE"] == "sqlite"
+
+
+def test_serve_does_not_import_config_before_the_environment_is_set(monkeypatch):
+    monkeypatch.delitem(sys.modules, "src.config")
+    spec = importlib.util.spec_from_file_location("sage_serve", SERVE_PATH)
+    spec.loader.exec_module(importlib.util.module_from_spec(spec))
+
+    assert "src.config" not in sys.modules
+
+
+def test_ensure_read_index_reexports_when_stale(serve, tmp_path, monkeypatch):
+    index_path = str(tmp_path / "numpy_index")
+    exports = []
+
+    def fake_export(collection):
+        exports.append(collection)
+        return 0
+
+    monkeypatch.setattr(numpy_index, "NUMPY_INDEX_PATH", index_path)
+    monkeypatch.setattr(numpy_index, "export_from_chroma", fake_export)
+    monkeypatch.setattr(retriever, "VECTOR_DB_PATH", str(tmp_path))
+    client = types.SimpleNamespace(get_collection=lambda name: name)
+    monkeypatch.setitem(sys.modules, "chromadb", types.SimpleNamespace(PersistentClient=lambda path: client))
+
+    # Missing
+    serve.ensure_read_index()
+    assert len(exports) == 1
+
+    matrix = np.ones((1, 4), dtype=np.float32)
+    write_numpy_index(index_path, ["a"], ["text"], matrix, index_version=read_index_version())
+    serve.ensure_read_index()
+    assert len(exports) == 1
+
+    # Chroma re-ingested since the export
+    write_numpy_index(index_path, ["a"], ["text"], matrix, index_version="older")
+    serve.ensure_read_index()
+    assert len(exports) == 2
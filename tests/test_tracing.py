@@ -0,0 +1,92 @@
+import json
+
+import pytest
+
+from src.utils import tracing
+
+
+class ListExporter:
+    def __init__(self):
+        self.spans = []
+
+    def export(self, span):
+        self.spans.append(span)
+
+
+@pytest.fixture
+def exporter():
+    exporter = ListExporter()
+    tracing.configure(exporter, sample_rate=1.0)
+    yield exporter
+    tracing.configure(None)
+
+
+def test_spans_nest_and_carry_the_request_id(exporter):
+    with tracing.start_trace("POST /ask", "req-1") as root:
+        with tracing.span("retrieve"):
+            with tracing.span("encode", queries=1):
+                pass
+        with pytest.raises(RuntimeError):
+            with tracing.span("generate"):
+                raise RuntimeError("model crashed")
+        root.set_attribute("status_code", 200)
+
+    spans = {s.name: s for s in exporter.spans}
+    assert set(spans) == {"POST /ask", "retrieve", "encode", "generate"}
+    assert {s.request_id for s in exporter.spans} == {"req-1"}
+    assert len({s.trace_id for s in exporter.spans}) == 1
+    assert spans["encode"].parent_id == spans["retrieve"].span_id
+    assert spans["generate"].parent_id == spans["POST /ask"].span_id
+    assert spans["generate"].error == "RuntimeError: model crashed"
+    assert spans["POST /ask"].attributes["status_code"] == 200
+
+
+def test_no_spans_outside_a_sampled_trace(exporter):
+    with tracing.span("retrieve") as span:
+        span.set_attribute("ignored", True)
+    assert span is tracing.NOOP_SPAN
+
+    tracing.configure(exporter, sample_rate=0.0)
+    with tracing.start_trace("POST /ask", "req-2"):
+        with tracing.span("retrieve"):
+            pass
+    assert exporter.spans == []
+
+
+def test_jsonl_and_otlp_formats(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    tracing.configure(tracing.JSONLExporter(str(path)))
+    try:
+        with tracing.start_trace("POST /ask", "req-3"):
+            with tracing.span("retrieve", chunks=5):
+                pass
+    finally:
+        tracing.configure(None)
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [line["name"] for line in lines] == ["retrieve", "POST /ask"]
+    assert lines[0]["attributes"] == {"chunks": 5}
+    assert lines[0]["parent_id"] == lines[1]["span_id"]
+    assert all(line["request_id"] == "req-3" for line in lines)
+
+    span = tracing.Span("retrieve", "a" * 32, "req-3", "b" * 16, {"chunks": 5})
+    span.end_ns = span.start_ns + 1000
+    otlp = tracing.otlp_span(span)
+    assert otlp["parentSpanId"] == "b" * 16
+    assert {"key": "chunks", "value": {"intValue": "5"}} in otlp["attributes"]
+    assert otlp["status"] == {"code": 1}
+
+
+def test_use_span_keeps_a_streamed_root_open(exporter):
+    root = tracing.start_trace("POST /ask/stream", "req-4")
+    with tracing.use_span(root):
+        generate = tracing.start_span("generate")
+    assert exporter.spans == []
+
+    # The body runs after the handler returned; the root ends with it
+    generate.end()
+    root.end()
+    assert [s.name for s in exporter.spans] == ["generate", "POST /ask/stream"]
+    assert generate.parent_id == root.span_id
+    assert root.start_ns <= generate.start_ns and generate.end_ns <= root.end_ns
+    assert tracing.span("after") is tracing.NOOP_SPAN
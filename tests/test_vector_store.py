@@ -0,0 +1,140 @@
+# tests/test_vector_store.py
+
+from unittest.mock import patch
+from src.embeddings.embedder import chunk_sections, split_sections
+from src.embeddings.vector_store import ChromaVectorStore, chunk_id
+
+
+class FakeCollection:
+    def __init__(self):
+        self.docs = {}
+        self.upserted = []
+
+    def get(self, include=None, limit=None, offset=0):
+        ids = sorted(self.docs)[offset:offset + limit]
+        return {"ids": ids}
+
+    def upsert(self, ids, documents, metadatas):
+        self.upserted.extend(ids)
+        self.docs.update(zip(ids, documents))
+
+    def delete(self, ids):
+        for i in ids:
+            del self.docs[i]
+
+
+def make_store():
+    store = ChromaVectorStore.__new__(ChromaVectorStore)
+    store.collection = FakeCollection()
+    return store
+
+
+CORPUS = """===== SOURCE: fees_scholarships =====
+B.Tech tuition is 50000 per year.
+===== PROGRAM: UG B.Tech =====
+===== DEPARTMENT: Computer Science and Engineering =====
+===== SOURCE FILE: ug_btech_cse =====
+Semester one covers programming.
+
+--- PhD | Regulations 2021 | PhD_Regulations_2021.pdf ---
+
+Minimum duration is three years.
+"""
+
+
+def test_split_sections_reads_extractor_headers():
+    sections = split_sections(CORPUS)
+
+    assert [meta["source"] for meta, _ in sections] == [
+        "fees_scholarships", "ug_btech_cse", "PhD_Regulations_2021"
+    ]
+    assert sections[1][0]["department"] == "Computer Science and Engineering"
+    assert sections[2][1] == "Minimum duration is three years."
+
+
+def test_chunk_id_depends_on_source():
+    assert chunk_id("same text", {"source": "a"}) == chunk_id("same text", {"source": "a"})
+    assert chunk_id("same text", {"source": "a"}) != chunk_id("same text", {"source": "b"})
+
+
+@patch("src.embeddings.vector_store.bump_index_version")
+def test_sync_only_embeds_changed_chunks(mock_bump):
+    store = make_store()
+
+    chunks, metas = chunk_sections(CORPUS)
+    assert store.sync_documents(chunks, metas) == {"added": 3, "removed": 0, "unchanged": 0}
+
+    store.collection.upserted.clear()
+    changed = CORPUS.replace("50000", "55000")
+    chunks, metas = chunk_sections(changed)
+
+    assert store.sync_documents(chunks, metas) == {"added": 1, "removed": 1, "unchanged": 2}
+    assert store.collection.upserted == [chunk_id(chunks[0], metas[0])]
+
+    mock_bump.reset_mock()
+    assert store.sync_documents(chunks, metas) == {"added": 0, "removed": 0, "unchanged": 3}
+    mock_bump.assert_not_called()
+
+
+def test_iter_chunks_matches_chunk_text():
+    from src.embeddings.embedder import chunk_text, iter_chunks
+
+    text = "".join(f"word{i} " for i in range(400))
+    pieces = [text[i:i + 37] for i in range(0, len(text), 37)]
+
+    assert list(iter_chunks(pieces, 120, 30)) == chunk_text(text, 120, 30)
+
+
+def count_words(text):
+    return len(text.split())
+
+
+def test_sentence_chunks_pack_whole_sentences_within_budget():
+    from src.embeddings.embedder import iter_sentence_chunks
+
+    text = "The fee is Rs. 30,000 per year. Contact Dr. G. Ramakrishna today. Hostels close at 9 PM. Apply online."
+    chunks = list(iter_sentence_chunks([text], 12, count_words))
+
+    assert chunks == [
+        "The fee is Rs. 30,000 per year. Contact Dr. G. Ramakrishna today.",
+        "Hostels close at 9 PM. Apply online."
+    ]
+
+
+def test_sentence_chunks_split_long_sentences_and_stream():
+    from src.embeddings.embedder import iter_sentence_chunks
+
+    text = " ".join(f"CS{i} Course {i}" for i in range(30)) + ". Next sentence here."
+    pieces = [text[i:i + 23] for i in range(0, len(text), 23)]
+    chunks = list(iter_sentence_chunks([text], 16, count_words))
+
+    assert all(count_words(c) <= 16 for c in chunks)
+    assert " ".join(chunks) == text
+    assert list(iter_sentence_chunks(pieces, 16, count_words)) == chunks
+
+
+def test_chunk_sections_never_straddles_sources():
+    chunks, metas = chunk_sections(CORPUS, chunker="sentence")
+
+    assert chunks == [
+        "B.Tech tuition is 50000 per year.",
+        "Semester one covers programming.",
+        "Minimum duration is three years."
+    ]
+    assert metas[1] == {
+        "program": "UG B.Tech",
+        "department": "Computer Science and Engineering",
+        "source": "ug_btech_cse"
+    }
+
+
+@patch("src.embeddings.vector_store.bump_index_version")
+def test_sync_stream_upserts_in_batches(mock_bump):
+    store = make_store()
+    calls = []
+    upsert = store.collection.upsert
+    store.collection.upsert = lambda **kw: (calls.append(len(kw["ids"])), upsert(**kw))
+
+    chunks = ((f"chunk {i}", {"source": "s"}) for i in range(25))
+    assert store.sync_stream(chunks, batch_size=10)["added"] == 25
+    assert calls == [10, 10, 5]